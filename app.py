@@ -3,7 +3,7 @@ LastKingz POS - Flask Web Application
 Multi-workstation POS system with separate manager and cashier interfaces
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, Response, stream_with_context
 from functools import wraps
 from datetime import datetime, timedelta
 import os
@@ -12,16 +12,98 @@ from user_auth import UserAuth
 from shopping_cart import ShoppingCart
 from inventory_manager import InventoryManager
 from quick_sale import QuickSaleManager
+from sale_sync import SaleSyncManager
+from replication import ReplicationManager
+from reporting_snapshot import ReportingSnapshot
+from backup_service import BackupService
+from archive_manager import ArchiveManager
+from catalog_cache import CatalogCache
+from sales_analytics import SalesAnalytics, window as analytics_window
+from reorder_planner import ReorderPlanner
+from time_buckets import SalesTimeBuckets, DEFAULT_UTC_OFFSET
+from cashier_performance import CashierPerformance
+from session_store import SQLiteSessionInterface, load_secret_key
+import sql_profiler
+import static_assets
+import metrics
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
 app.permanent_session_lifetime = timedelta(hours=8)
 
+# Route, checkout stage and printer metrics at /metrics and in Server-Timing headers
+metrics.init_app(app)
+
+# Content-hashed static URLs served with immutable caching and precompressed copies
+static_assets.init_app(app)
+
+# Per-request SQL stats in an X-SQL-Stats header and the log
+if os.environ.get('LASTKINGZ_SQL_PROFILE') == '1':
+    sql_profiler.init_app(app)
+
+# Database file (override to run against another dataset)
+DB_NAME = os.environ.get('LASTKINGZ_DB', 'lastkings_pos.db')
+
 # Initialize components
-db = Database()
-auth = UserAuth()
+db = Database(DB_NAME)
+
+# Sessions live in the database and the signing key is stable, so logins survive
+# restarts and work on every worker
+app.secret_key = load_secret_key(DB_NAME)
+app.session_interface = SQLiteSessionInterface(db)
+auth = UserAuth(DB_NAME)
 inventory = InventoryManager(db)
-quick_sale = QuickSaleManager()
+quick_sale = QuickSaleManager(DB_NAME)
+sale_sync = SaleSyncManager(db)
+replication = ReplicationManager(db)
+
+# Products for scans, search and the POS pages (warmed before forking under gunicorn)
+catalog = CatalogCache(db)
+
+# Reports read a periodically refreshed replica when LASTKINGZ_REPORT_SNAPSHOT is set
+report_snapshot = ReportingSnapshot(db)
+
+# Scheduled online backups (LASTKINGZ_BACKUP_INTERVAL, 0 disables)
+backup_service = BackupService(db)
+
+# Background threads start with the first request, so worker boot (and importing app) stays fast
+_background_started = False
+
+@app.before_request
+def start_background_services():
+    global _background_started
+    if not _background_started:
+        _background_started = True
+        report_snapshot.start()
+        backup_service.start()
+
+def init_worker():
+    """
+    Per-process setup for a worker forked from a preloaded app (gunicorn post_fork).
+    Database connections are opened per call, so none are shared with the master;
+    background threads don't survive a fork and start again on the first request.
+    """
+    global _background_started
+    _background_started = False
+    if catalog.is_stale():
+        catalog.warm()
+
+# Sales moved to yearly archive files are attached only for reports that reach them
+archives = ArchiveManager(db)
+
+# Top sellers, slow movers and trends from per-product daily aggregates
+analytics = SalesAnalytics(db)
+
+# Reorder points from sales velocity (LASTKINGZ_LEAD_TIME_DAYS)
+reorder_planner = ReorderPlanner(db)
+
+# Sales by hour and weekday, closed days cached in memory
+time_buckets = SalesTimeBuckets(db, archives)
+
+# Throughput and idle time per cashier shift
+cashier_performance = CashierPerformance(db, archives)
+
+# Shared secret branches send when pushing changes (ingest is disabled when unset)
+REPLICATION_TOKEN = os.environ.get('LASTKINGZ_REPLICATION_TOKEN')
 
 # Login required decorator
 def login_required(f):
@@ -62,6 +144,7 @@ def login():
 
         user = auth.authenticate(username, password)
         if user:
+            session.regenerate()
             session.permanent = True
             session['user_id'] = user['id']
             session['username'] = user['username']
@@ -80,6 +163,7 @@ def login():
 @app.route('/logout')
 def logout():
     session.clear()
+    session.regenerate()
     flash('Logged out successfully', 'success')
     return redirect(url_for('login'))
 
@@ -129,12 +213,14 @@ def manager_dashboard():
     """, (week_start,))
     week_cash, week_ecocash = cursor.fetchone()
 
-    # Low stock items
+    # Low stock items: at or below the computed reorder point, or the manual
+    # threshold for products the reorder planner hasn't seen yet
     cursor.execute("""
-        SELECT name, stock, low_stock_threshold
-        FROM products
-        WHERE stock <= low_stock_threshold
-        ORDER BY stock ASC
+        SELECT p.name, p.stock, COALESCE(r.reorder_point, p.low_stock_threshold)
+        FROM products p
+        LEFT JOIN reorder_suggestions r ON r.product_id = p.id
+        WHERE p.stock <= COALESCE(r.reorder_point, p.low_stock_threshold)
+        ORDER BY p.stock ASC
         LIMIT 10
     """)
     low_stock_items = cursor.fetchall()
@@ -167,7 +253,7 @@ def manager_dashboard():
 @app.route('/manager/pos')
 @manager_required
 def manager_pos():
-    products = db.get_all_products()
+    products = catalog.get_all_products()
     quick_items = quick_sale.get_all_items()
     return render_template('manager/pos.html', products=products, quick_items=quick_items, user=session)
 
@@ -268,7 +354,7 @@ def cashier_dashboard():
 @app.route('/cashier/pos')
 @login_required
 def cashier_pos():
-    products = db.get_all_products()
+    products = catalog.get_all_products()
     quick_items = quick_sale.get_all_items()
     return render_template('cashier/pos.html', products=products, quick_items=quick_items, user=session)
 
@@ -276,20 +362,33 @@ def cashier_pos():
 @app.route('/api/product/<search_term>')
 @login_required
 def get_product(search_term):
-    # Try to find by barcode first
-    product = db.get_product_by_barcode(search_term)
-
-    # If not found, try to search by name
-    if not product:
-        products = db.get_all_products()
-        matching = [p for p in products if search_term.lower() in p['name'].lower()]
-        if matching:
-            return jsonify({
-                'success': True,
-                'product': matching[0]
-            })
+    with metrics.stage('scan', metrics.SCAN_LOOKUP) as timer:
+        # Try to find by barcode first (including case and price/quantity-embedded codes)
+        product, decoded = catalog.find_scanned_product(search_term)
+        timer.labels = {'match': 'barcode'}
+
+        # If not found, try to search by name
+        matching = []
+        if not product:
+            products = catalog.get_all_products()
+            matching = [p for p in products if search_term.lower() in p['name'].lower()]
+            timer.labels = {'match': 'name' if matching else 'miss'}
+
+    if matching:
+        return jsonify({
+            'success': True,
+            'product': matching[0]
+        })
 
     if product:
+        if decoded is not None:
+            if decoded.quantity is None:
+                return jsonify({'success': False, 'message': f'No units-per-case set for case code {search_term}'})
+            product['scan_quantity'] = decoded.quantity
+            if decoded.price is not None:
+                # The line keeps the product's barcode; the label's code and price travel alongside
+                product['label_code'] = search_term
+                product['label_price'] = decoded.price
         return jsonify({
             'success': True,
             'product': product
@@ -303,7 +402,7 @@ def search_products():
     if not query or len(query) < 2:
         return jsonify({'success': False, 'products': []})
 
-    products = db.get_all_products()
+    products = catalog.get_all_products()
     results = [p for p in products if query in p['name'].lower() or query in p['barcode'].lower()]
 
     # Limit to 10 results
@@ -314,6 +413,44 @@ def search_products():
         'products': results
     })
 
+@app.route('/api/products/changes')
+@login_required
+def product_changes():
+    """Products changed since ?since=<version>; send the returned version next time"""
+    since = request.args.get('since', 0, type=int)
+    return jsonify({'success': True, **db.changes_since(since)})
+
+def print_sale_receipt(total, cash_received, change, sale_items):
+    """Print a sale's receipt, returns False if it went to a file instead"""
+    from receipt_printer import ReceiptPrinter
+    printer = ReceiptPrinter()
+    sale_data = {
+        'total': total,
+        'cash_received': cash_received,
+        'change': change,
+        'date': datetime.now()
+    }
+    metrics.PRINT_QUEUE_DEPTH.inc()
+    try:
+        with metrics.stage('print'):
+            print_success = printer.print_receipt(sale_data, sale_items)
+    finally:
+        metrics.PRINT_QUEUE_DEPTH.dec()
+    metrics.RECEIPTS_PRINTED.inc(result='printed' if print_success else 'failed')
+    return print_success
+
+def already_saved(previous, total, change):
+    """Response for a resent sale, without printing its receipt again"""
+    return jsonify({
+        'success': True,
+        'duplicate': True,
+        'sale_id': previous['sale_id'] if previous else None,
+        'change': change,
+        'total': total,
+        'receipt_printed': False,
+        'low_stock_alerts': []
+    })
+
 @app.route('/api/complete-sale', methods=['POST'])
 @login_required
 def complete_sale():
@@ -322,6 +459,7 @@ def complete_sale():
         items = data.get('items', [])
         cash_received = float(data.get('cash_received', 0))
         payment_method = data.get('payment_method', 'cash')
+        client_sale_id = data.get('client_sale_id')
 
         if not items:
             return jsonify({'success': False, 'message': 'Cart is empty'})
@@ -334,29 +472,37 @@ def complete_sale():
 
         change = cash_received - total
 
-        # Process inventory updates and collect low stock alerts
+        # Terminals resend a sale after a timeout - answer with the one already saved
+        if client_sale_id:
+            previous = sale_sync.get_synced_sale(client_sale_id)
+            if previous and previous['status'] == SaleSyncManager.STATUS_APPLIED:
+                return already_saved(previous, total, change)
+
+        # Check stock availability and collect the lines that take stock
         failed_items = []
         low_stock_alerts = []
         out_of_stock_items = []
-
-        # First pass: Check stock availability
-        for item in items:
-            # Skip inventory check for quick sale items
-            if item['barcode'].startswith('QUICK'):
-                continue
-
-            product = db.get_product_by_barcode(item['barcode'])
-            if not product:
-                failed_items.append(item.get('name', 'Unknown'))
-                continue
-
-            # Check if sufficient stock available
-            if product['stock'] < item['quantity']:
-                out_of_stock_items.append({
-                    'name': product['name'],
-                    'requested': item['quantity'],
-                    'available': product['stock']
-                })
+        stocked = []    # (barcode, product, quantity)
+
+        with metrics.stage('validate'):
+            for item in items:
+                # Skip inventory check for quick sale items
+                if item['barcode'].startswith('QUICK'):
+                    continue
+
+                product, _ = db.find_scanned_product(item['barcode'])
+                if not product:
+                    failed_items.append(item.get('name', 'Unknown'))
+                    continue
+                stocked.append((item['barcode'], product, item['quantity']))
+
+                # Check if sufficient stock available
+                if product['stock'] < item['quantity']:
+                    out_of_stock_items.append({
+                        'name': product['name'],
+                        'requested': item['quantity'],
+                        'available': product['stock']
+                    })
 
         if failed_items:
             return jsonify({
@@ -372,27 +518,6 @@ def complete_sale():
                 'message': f"Insufficient stock: {'; '.join(messages)}"
             })
 
-        # Second pass: Update inventory
-        for item in items:
-            # Skip inventory updates for quick sale items
-            if item['barcode'].startswith('QUICK'):
-                continue
-
-            product = db.get_product_by_barcode(item['barcode'])
-            if product:
-                # Update stock
-                new_stock = product['stock'] - item['quantity']
-                db.update_product_stock(product['id'], new_stock)
-
-                # Check for low stock
-                if new_stock <= product.get('low_stock_threshold', 10):
-                    low_stock_alerts.append({
-                        'product_name': product['name'],
-                        'current_stock': new_stock,
-                        'threshold': product.get('low_stock_threshold', 10),
-                        'message': f"LOW STOCK ALERT: {product['name']} - Only {new_stock} left!"
-                    })
-
         # Prepare items for saving (add subtotal and product_id fields)
         sale_items = []
         for item in items:
@@ -408,19 +533,30 @@ def complete_sale():
                 'subtotal': item['price'] * item['quantity']
             })
 
-        # Save sale to database
-        sale_id = db.save_sale(sale_items, total, cash_received, change, session.get('user_id'), payment_method)
+        # Stock, the sale and its client sale id commit together - terminals resend
+        # a sale after a timeout, and each client sale id is applied once
+        with metrics.stage('save_sale'):
+            saved = sale_sync.save_sale(client_sale_id, sale_items, stocked, total, cash_received, change,
+                                        session.get('user_id'), payment_method)
+        if saved is None:
+            return already_saved(sale_sync.get_synced_sale(client_sale_id), total, change)
+        sale_id = saved['sale_id']
+
+        sold = {product['id']: product for _, product, _ in stocked}
+        for product_id, new_stock in saved['stock'].items():
+            product = sold[product_id]
+            catalog.set_stock(product_id, new_stock)
+
+            # Check for low stock
+            if new_stock <= product.get('low_stock_threshold', 10):
+                low_stock_alerts.append({
+                    'product_name': product['name'],
+                    'current_stock': new_stock,
+                    'threshold': product.get('low_stock_threshold', 10),
+                    'message': f"LOW STOCK ALERT: {product['name']} - Only {new_stock} left!"
+                })
 
-        # Print receipt
-        from receipt_printer import ReceiptPrinter
-        printer = ReceiptPrinter()
-        sale_data = {
-            'total': total,
-            'cash_received': cash_received,
-            'change': change,
-            'date': datetime.now()
-        }
-        print_success = printer.print_receipt(sale_data, sale_items)
+        print_success = print_sale_receipt(total, cash_received, change, sale_items)
 
         return jsonify({
             'success': True,
@@ -433,6 +569,48 @@ def complete_sale():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/sync-sales', methods=['POST'])
+@login_required
+def sync_sales():
+    """Ingest sales queued by terminals - every sale goes through the queue, offline or not"""
+    try:
+        data = request.json or {}
+        sales = data.get('sales', [])
+        results = sale_sync.apply_batch(sales, session.get('user_id'))
+        catalog.invalidate()
+
+        # Sales pushed straight from checkout get their receipt now; ones that waited offline don't
+        for sale, result in zip(sales, results):
+            if sale.get('print_receipt') and result['status'] == SaleSyncManager.STATUS_APPLIED:
+                cash_received = float(sale.get('cash_received', 0))
+                sale_items = [{**item, 'subtotal': float(item['price']) * int(item['quantity'])}
+                              for item in sale['items']]
+                result['receipt_printed'] = print_sale_receipt(result['total'], cash_received,
+                                                               cash_received - result['total'], sale_items)
+        return jsonify({
+            'success': True,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/replication/ingest', methods=['POST'])
+def replication_ingest():
+    """Apply a batch of branch changes and acknowledge the highest sequence applied"""
+    if not REPLICATION_TOKEN or request.headers.get('X-Replication-Token') != REPLICATION_TOKEN:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    try:
+        data = request.json or {}
+        acked_seq = replication.apply_changes(data['node_id'], data.get('changes', []))
+        catalog.invalidate()
+        time_buckets.invalidate()
+        return jsonify({
+            'success': True,
+            'acked_seq': acked_seq
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/quick-sale/<int:item_id>')
 @login_required
 def get_quick_sale_item(item_id):
@@ -511,6 +689,7 @@ def add_product():
             data['low_stock_threshold']
         )
         if success:
+            catalog.invalidate()
             return jsonify({'success': True})
         return jsonify({'success': False, 'message': message})
     except Exception as e:
@@ -528,6 +707,7 @@ def update_product(product_id):
             data['stock'],
             data['low_stock_threshold']
         )
+        catalog.invalidate()
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -537,6 +717,7 @@ def update_product(product_id):
 def delete_product(product_id):
     try:
         db.delete_product(product_id)
+        catalog.invalidate()
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -558,6 +739,7 @@ def add_stock(product_id):
 
         # Update stock
         db.update_product_stock(product_id, new_stock)
+        catalog.set_stock(product_id, new_stock)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -582,10 +764,36 @@ def remove_stock(product_id):
 
         # Update stock
         db.update_product_stock(product_id, new_stock)
+        catalog.set_stock(product_id, new_stock)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/product/<int:product_id>/case-codes')
+@manager_required
+def get_case_codes(product_id):
+    return jsonify({'success': True, 'case_codes': db.get_case_codes(product_id)})
+
+@app.route('/api/product/<int:product_id>/case-codes', methods=['POST'])
+@manager_required
+def add_case_code(product_id):
+    """Register the barcode on a case of this product and how many units it holds"""
+    try:
+        data = request.json
+        if db.get_product_by_id(product_id) is None:
+            return jsonify({'success': False, 'message': 'Product not found'})
+        db.add_case_code(str(data['case_code']).strip(), product_id, int(data['units']))
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/case-codes/<case_code>', methods=['DELETE'])
+@manager_required
+def delete_case_code(case_code):
+    if db.delete_case_code(case_code):
+        return jsonify({'success': True})
+    return jsonify({'success': False, 'message': 'Case code not found'})
+
 # Sales Reports API Routes
 @app.route('/api/sales-report/<period>')
 @manager_required
@@ -616,11 +824,15 @@ def sales_report(period):
         else:
             return jsonify({'success': False, 'message': 'Invalid period'})
 
+        # Read from the reporting snapshot so report queries stay off the checkout database
+        report_db, freshness = report_snapshot.reader()
+        report_db = archives.spanning(report_db, str(start_date), str(end_date))
+
         # Get summary
-        summary = db.get_sales_report(str(start_date), str(end_date))
+        summary = report_db.get_sales_report(str(start_date), str(end_date))
 
         # Get individual sales
-        conn = db.get_connection()
+        conn = report_db.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT s.id, s.sale_date, s.total_amount, s.cash_received, s.change_given,
@@ -649,16 +861,131 @@ def sales_report(period):
             'success': True,
             'title': title,
             'summary': summary,
-            'sales': sales
+            'sales': sales,
+            'freshness': freshness
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+def _analytics_window():
+    """(start, end) from ?start=&end= (YYYY-MM-DD) or ?days= (default 30, ending today)"""
+    return analytics_window(request.args.get('days', 30, type=int),
+                            request.args.get('start'), request.args.get('end'))
+
+@app.route('/api/analytics/top-sellers')
+@manager_required
+def analytics_top_sellers():
+    try:
+        start_date, end_date = _analytics_window()
+        products = analytics.top_sellers(start_date, end_date, request.args.get('limit', 10, type=int),
+                                         request.args.get('by', 'quantity'))
+        return jsonify({'success': True, 'start': start_date, 'end': end_date, 'products': products})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/analytics/slow-movers')
+@manager_required
+def analytics_slow_movers():
+    try:
+        start_date, end_date = _analytics_window()
+        products = analytics.slow_movers(start_date, end_date, request.args.get('limit', 10, type=int))
+        return jsonify({'success': True, 'start': start_date, 'end': end_date, 'products': products})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/analytics/product/<barcode>/trend')
+@manager_required
+def analytics_product_trend(barcode):
+    try:
+        start_date, end_date = _analytics_window()
+        return jsonify({'success': True, 'start': start_date, 'end': end_date,
+                        'trend': analytics.trend(barcode, start_date, end_date)})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/sales-buckets/<grouping>')
+@manager_required
+def sales_buckets(grouping):
+    """
+    Sales and revenue arrays for charts: heatmap (weekday x hour), hour,
+    weekday, or series (?width=<seconds>, default a day). ?tz_offset= is the
+    shop's offset from UTC in minutes.
+    """
+    try:
+        start_date, end_date = _analytics_window()
+        offset = request.args.get('tz_offset', DEFAULT_UTC_OFFSET // 60, type=int) * 60
+        if grouping == 'heatmap':
+            buckets = time_buckets.heatmap(start_date, end_date, offset)
+        elif grouping == 'hour':
+            buckets = time_buckets.hour_of_day(start_date, end_date, offset)
+        elif grouping == 'weekday':
+            buckets = time_buckets.day_of_week(start_date, end_date, offset)
+        elif grouping == 'series':
+            buckets = time_buckets.series(start_date, end_date, request.args.get('width', 86400, type=int), offset)
+        else:
+            return jsonify({'success': False, 'message': 'Invalid grouping'}), 404
+        return jsonify({'success': True, 'start': start_date, 'end': end_date, **buckets})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/cashier-performance')
+@manager_required
+def cashier_performance_report():
+    """
+    Sales per hour, basket size, items per minute and idle gaps for each
+    cashier shift. ?cashier_id= limits it to one cashier, ?format=csv streams
+    the shifts as a CSV download.
+    """
+    try:
+        start_date, end_date = _analytics_window()
+        cashier_id = request.args.get('cashier_id', type=int)
+        offset = request.args.get('tz_offset', DEFAULT_UTC_OFFSET // 60, type=int) * 60
+        if request.args.get('format') == 'csv':
+            lines = cashier_performance.csv_lines(start_date, end_date, cashier_id, offset)
+            return Response(stream_with_context(lines), mimetype='text/csv', headers={
+                'Content-Disposition': f'attachment; filename=cashier_performance_{start_date}_{end_date}.csv'})
+        report = cashier_performance.report(start_date, end_date, cashier_id, offset)
+        return jsonify({'success': True, 'start': start_date, 'end': end_date, **report})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/reorder/run', methods=['POST'])
+@manager_required
+def run_reorder_planner():
+    """Recompute reorder suggestions, optionally with another lead time or window"""
+    try:
+        data = request.get_json(silent=True) or {}
+        planner = ReorderPlanner(db, float(data.get('lead_time_days', reorder_planner.lead_time_days)),
+                                 float(data.get('review_days', reorder_planner.review_days)),
+                                 int(data.get('window_days', reorder_planner.window_days)))
+        return jsonify({'success': True, 'run': planner.run()})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/purchase-order/draft')
+@manager_required
+def purchase_order_draft():
+    return jsonify({'success': True, **reorder_planner.purchase_order_draft()})
+
+@app.route('/api/backup/status')
+@manager_required
+def backup_status():
+    """Result of the last database backup"""
+    return jsonify({'success': True, 'backup': backup_service.get_status()})
+
+@app.route('/api/backup/run', methods=['POST'])
+@manager_required
+def run_backup():
+    """Back up the database now"""
+    status = backup_service.run_backup()
+    return jsonify({'success': status['success'], 'message': status['message'], 'backup': status})
+
 @app.route('/api/sale-details/<int:sale_id>')
 @manager_required
 def sale_details(sale_id):
     try:
-        conn = db.get_connection()
+        # Sales keep their ids when archived, so look in the archives too
+        conn = archives.spanning(db).get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT product_name, quantity, unit_price, subtotal
@@ -0,0 +1,289 @@
+"""
+Cold-data archival of old sales
+Moves sales (and their items) from closed periods out of the till database
+into one archive database per year, e.g. lastkings_pos_archive_2024.db, so the
+hot database stays small. Reports whose date range reaches back into archived
+periods attach the archives they need and read through temporary views that
+shadow the sales and sale_items tables, so report SQL is unchanged.
+
+Usage:
+    python archive_manager.py --db lastkings_pos.db --older-than 12
+    python archive_manager.py --db lastkings_pos.db --list
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import date
+from typing import Dict, List
+from database import Database
+
+ARCHIVED_TABLES = ['sales', 'sale_items']
+
+# Columns added to the hot tables after some archives were written, and how
+# to compute them for rows archived before (see _prepare_archive)
+DERIVED_COLUMNS = {
+    ('sales', 'sale_epoch'): "CAST(strftime('%s', sale_date) AS INTEGER)",
+}
+
+class ArchiveSpanningDatabase(Database):
+    """Read-only view of a database plus attached yearly archives"""
+
+    def __init__(self, base: Database, archives: List[Dict]):
+        self.db_name = base.db_name
+        self.base = base
+        self.archives = archives
+
+    def get_connection(self):
+        conn = self.base.get_connection()
+        for archive in self.archives:
+            conn.execute("ATTACH DATABASE ? AS ?", (archive['path'], archive['schema']))
+
+        # Temp views are found before main tables, so existing report queries span the archives
+        conn.execute('PRAGMA query_only = OFF')
+        for table in ARCHIVED_TABLES:
+            columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+            selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+            for a in self.archives:
+                # Archives not written since a column was added don't have it yet
+                existing = {row[1] for row in conn.execute(f"PRAGMA {a['schema']}.table_info({table})")}
+                expressions = [c if c in existing else
+                               f"{DERIVED_COLUMNS.get((table, c), 'NULL')} AS {c}" for c in columns]
+                selects.append(f"SELECT {', '.join(expressions)} FROM {a['schema']}.{table}")
+            conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(selects)}")
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+class ArchiveManager:
+    """Moves closed periods into yearly archive files and attaches them for reports"""
+
+    BATCH_SIZE = 2000       # Sales moved per transaction
+    BATCH_PAUSE = 0.05      # Seconds between batches, so waiting checkouts get the write lock
+
+    def __init__(self, db: Database, archive_dir: str = None):
+        self.db = db
+        self.archive_dir = archive_dir or os.environ.get('LASTKINGZ_ARCHIVE_DIR') \
+            or os.path.dirname(os.path.abspath(db.db_name))
+        self.prefix = os.path.splitext(os.path.basename(db.db_name))[0] + '_archive_'
+
+    def archive_path(self, year: str) -> str:
+        return os.path.join(self.archive_dir, f"{self.prefix}{year}.db")
+
+    def get_archives(self, db: Database = None) -> List[Dict]:
+        """Archived years recorded in db (default: the hot database), oldest first"""
+        conn = (db or self.db).get_connection()
+        try:
+            rows = conn.execute("""
+                SELECT year, file_name, first_sale_date, last_sale_date, sales, archived_at
+                FROM sale_archives ORDER BY year
+            """).fetchall()
+        except sqlite3.OperationalError:
+            rows = []   # Snapshot taken before archiving was set up
+        finally:
+            conn.close()
+
+        return [{
+            'year': row[0],
+            'path': os.path.join(self.archive_dir, row[1]),
+            'schema': f"archive_{row[0]}",
+            'first_sale_date': row[2],
+            'last_sale_date': row[3],
+            'sales': row[4],
+            'archived_at': row[5]
+        } for row in rows]
+
+    def archives_for_range(self, start_date: str = None, end_date: str = None,
+                           db: Database = None) -> List[Dict]:
+        """Archives holding sales between start_date and end_date (inclusive, YYYY-MM-DD)"""
+        return [archive for archive in self.get_archives(db)
+                if (start_date is None or archive['last_sale_date'][:10] >= start_date)
+                and (end_date is None or archive['first_sale_date'][:10] <= end_date)
+                and os.path.exists(archive['path'])]
+
+    def spanning(self, db: Database, start_date: str = None, end_date: str = None) -> Database:
+        """
+        Database to read sales in a date range from: db itself when the range
+        is all hot data, otherwise db with the archives it needs attached.
+        The archive list is read from db itself, so a reporting snapshot taken
+        before an archive run never counts the moved sales twice.
+        """
+        archives = self.archives_for_range(start_date, end_date, db)
+        return ArchiveSpanningDatabase(db, archives) if archives else db
+
+    @staticmethod
+    def cutoff_for(months: int, today: date = None) -> str:
+        """First day of the month months before this one - earlier months are closed"""
+        today = today or date.today()
+        month_index = today.year * 12 + today.month - 1 - months
+        return date(month_index // 12, month_index % 12 + 1, 1).isoformat()
+
+    def pending_years(self, cutoff: str) -> List[str]:
+        conn = self.db.get_connection()
+        rows = conn.execute("""
+            SELECT DISTINCT strftime('%Y', sale_date) FROM sales WHERE sale_date < ? ORDER BY 1
+        """, (cutoff,)).fetchall()
+        conn.close()
+        return [row[0] for row in rows if row[0]]
+
+    def _prepare_archive(self, cursor, schema: str):
+        """Create the archive's tables from the hot schema and add any newer columns"""
+        for table in ARCHIVED_TABLES:
+            sql = cursor.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                                 (table,)).fetchone()[0]
+            cursor.execute(re.sub(r'^CREATE TABLE\s+"?' + table + r'"?',
+                                  f'CREATE TABLE IF NOT EXISTS {schema}.{table}', sql))
+
+            existing = {row[1] for row in cursor.execute(f"PRAGMA {schema}.table_info({table})")}
+            for row in cursor.execute(f"PRAGMA main.table_info({table})").fetchall():
+                if row[1] not in existing:
+                    cursor.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {row[1]} {row[2]}")
+                    if (table, row[1]) in DERIVED_COLUMNS:
+                        cursor.execute(f"UPDATE {schema}.{table} SET {row[1]} = {DERIVED_COLUMNS[(table, row[1])]}")
+
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sales_sale_date ON sales (sale_date)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sales_sale_epoch ON sales (sale_epoch, total_amount)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sales_cashier_epoch ON sales (cashier_id, sale_epoch, total_amount)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_sale_items_sale_id ON sale_items (sale_id)")
+
+    def archive(self, cutoff: str) -> List[Dict]:
+        """
+        Move sales dated before cutoff (YYYY-MM-DD) into yearly archives.
+        Sales move oldest first in transactions of BATCH_SIZE spanning the hot
+        and archive files, so checkouts only wait for one batch. Each batch
+        also updates the year's entry in sale_archives, so a report run part
+        way through still finds every sale in exactly one place.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        results = []
+
+        for year in self.pending_years(cutoff):
+            schema = f"archive_{year}"
+            path = self.archive_path(year)
+            end = min(cutoff, f"{int(year) + 1}-01-01")
+            copied = {'sales': 0, 'sale_items': 0}
+
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS ?", (path, schema))
+            try:
+                self._prepare_archive(cursor, schema)
+                conn.commit()
+                columns = {table: ", ".join(row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})"))
+                           for table in ARCHIVED_TABLES}
+
+                while True:
+                    moved = self._move_batch(cursor, schema, columns, f"{year}-01-01", end)
+                    if moved is None:
+                        break
+                    first, last, sales, items = moved
+                    cursor.execute("""
+                        INSERT INTO sale_archives (year, file_name, first_sale_date, last_sale_date, sales, archived_at)
+                        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(year) DO UPDATE SET
+                            first_sale_date = MIN(first_sale_date, excluded.first_sale_date),
+                            last_sale_date = MAX(last_sale_date, excluded.last_sale_date),
+                            sales = sales + excluded.sales, archived_at = excluded.archived_at
+                    """, (year, os.path.basename(path), first, last, sales))
+                    conn.commit()
+                    copied['sales'] += sales
+                    copied['sale_items'] += items
+                    time.sleep(self.BATCH_PAUSE)
+
+                results.append({'year': year, 'path': path, 'sales': copied['sales'],
+                                'items': copied['sale_items']})
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.execute("DETACH DATABASE " + schema)
+                conn.close()
+
+        return results
+
+    def _move_batch(self, cursor, schema: str, columns: Dict[str, str], start: str, end: str):
+        """
+        Open a write transaction and move the next BATCH_SIZE sales dated in
+        [start, end) with their items. Returns (first date, last date, sales,
+        items) for the caller to record and commit, or None (nothing left,
+        transaction closed).
+        """
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            CREATE TEMP TABLE archiving AS
+            SELECT id, sale_date FROM main.sales
+            WHERE sale_date >= ? AND sale_date < ?
+            ORDER BY sale_date LIMIT ?
+        """, (start, end, self.BATCH_SIZE))
+        first, last, sales = cursor.execute("""
+            SELECT MIN(sale_date), MAX(sale_date), COUNT(*) FROM temp.archiving
+        """).fetchone()
+        if not sales:
+            cursor.execute("DROP TABLE temp.archiving")
+            cursor.execute("COMMIT")
+            return None
+
+        paused = self._pause_replication(cursor)
+        copied = {}
+        for table, key in (('sales', 'id'), ('sale_items', 'sale_id')):
+            cursor.execute(f"""
+                INSERT INTO {schema}.{table} ({columns[table]})
+                SELECT {columns[table]} FROM main.{table} WHERE {key} IN (SELECT id FROM temp.archiving)
+            """)
+            copied[table] = cursor.rowcount
+
+        cursor.execute("DELETE FROM main.sale_items WHERE sale_id IN (SELECT id FROM temp.archiving)")
+        cursor.execute("DELETE FROM main.sales WHERE id IN (SELECT id FROM temp.archiving)")
+        cursor.execute("DROP TABLE temp.archiving")
+        if paused:
+            cursor.execute("DELETE FROM replication_state WHERE key = 'paused'")
+        return first, last, copied['sales'], copied['sale_items']
+
+    @staticmethod
+    def _pause_replication(cursor) -> bool:
+        """Stop change capture for this transaction - archived sales stay at head office"""
+        if cursor.execute("""
+            SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'replication_state'
+        """).fetchone() is None:
+            return False
+        cursor.execute("INSERT OR REPLACE INTO replication_state (key, value) VALUES ('paused', 'archive')")
+        return True
+
+    def vacuum(self):
+        """Return the space freed by archiving to the file system"""
+        conn = self.db.get_connection()
+        conn.execute("VACUUM")
+        conn.close()
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive old sales into yearly databases")
+    parser.add_argument('--db', default='lastkings_pos.db')
+    parser.add_argument('--dir', help="Archive directory (default: next to the database)")
+    parser.add_argument('--older-than', type=int, metavar='MONTHS',
+                        help="Archive sales from months that ended more than this many months ago")
+    parser.add_argument('--vacuum', action='store_true', help="Shrink the database file afterwards")
+    parser.add_argument('--list', action='store_true', help="List archives")
+    args = parser.parse_args(argv)
+
+    archives = ArchiveManager(Database(args.db), args.dir)
+
+    if args.older_than is not None:
+        cutoff = ArchiveManager.cutoff_for(args.older_than)
+        print(f"Archiving sales before {cutoff}...")
+        for result in archives.archive(cutoff):
+            print(f"  {result['year']}: {result['sales']} sales, {result['items']} items -> {result['path']}")
+        if args.vacuum:
+            archives.vacuum()
+    elif not args.list:
+        parser.error("give --older-than MONTHS or --list")
+
+    for archive in archives.get_archives():
+        print(f"{archive['year']}: {archive['sales']} sales "
+              f"({archive['first_sale_date']} to {archive['last_sale_date']}) in {archive['path']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
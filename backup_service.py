@@ -0,0 +1,220 @@
+"""
+Scheduled online backups of the till database
+Copies the database with SQLite's online backup API in small page steps, so
+checkouts keep getting the write lock, checks the copy with PRAGMA
+integrity_check, then stores it gzip-compressed under a timestamped name and
+deletes all but the newest backups. A copy that checkout writes keep
+restarting is given up and retried later, with a longer wait each time.
+
+Set LASTKINGZ_BACKUP_INTERVAL (seconds, 0 to disable), LASTKINGZ_BACKUP_DIR
+and LASTKINGZ_BACKUP_KEEP to configure the service in the app.
+
+Usage:
+    python backup_service.py --db lastkings_pos.db              # back up now
+    python backup_service.py --list
+    python backup_service.py --verify backups/lastkings_pos-20250101-120000.db.gz
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from database import BackupBusy, Database
+
+DEFAULT_INTERVAL = int(os.environ.get('LASTKINGZ_BACKUP_INTERVAL', 6 * 60 * 60))
+DEFAULT_BACKUP_DIR = os.environ.get('LASTKINGZ_BACKUP_DIR', 'backups')
+DEFAULT_KEEP = int(os.environ.get('LASTKINGZ_BACKUP_KEEP', 14))
+
+STATUS_FILE = 'last_backup.json'
+
+def check_integrity(path: str) -> str:
+    """PRAGMA integrity_check result for a database file ('ok' when sound)"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute('PRAGMA integrity_check').fetchall()
+    finally:
+        conn.close()
+    return "; ".join(row[0] for row in rows)
+
+def verify_backup(path: str) -> str:
+    """Decompress a backup to a temporary file and run integrity_check on it"""
+    fd, temp_path = tempfile.mkstemp(suffix='.db')
+    try:
+        with os.fdopen(fd, 'wb') as target, gzip.open(path, 'rb') as source:
+            shutil.copyfileobj(source, target)
+        return check_integrity(temp_path)
+    finally:
+        os.remove(temp_path)
+
+class BackupService:
+    """Paced, verified, rotated backups on a background thread"""
+
+    PAGES_PER_STEP = 64     # Pages copied per backup step
+    STEP_PAUSE = 0.01       # Seconds between steps, so checkout can take the write lock
+    RETRY_DELAY = 60        # Seconds before retrying a copy given up while busy, doubled each time
+
+    def __init__(self, db: Database, backup_dir: str = DEFAULT_BACKUP_DIR,
+                 interval: int = DEFAULT_INTERVAL, keep: int = DEFAULT_KEEP):
+        self.db = db
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.keep = keep
+        self.prefix = os.path.splitext(os.path.basename(db.db_name))[0] + '-'
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def list_backups(self) -> List[str]:
+        """Backup files, newest first"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        names = [name for name in os.listdir(self.backup_dir)
+                 if name.startswith(self.prefix) and name.endswith('.db.gz')]
+        # Timestamped names sort chronologically
+        return [os.path.join(self.backup_dir, name) for name in sorted(names, reverse=True)]
+
+    def _read_status(self) -> Dict:
+        try:
+            with open(os.path.join(self.backup_dir, STATUS_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'success': None, 'message': 'No backup has run yet'}
+
+    def get_status(self) -> Dict:
+        """Result of the last backup attempt, shared by every process using backup_dir"""
+        status = self._read_status()
+        status['backups'] = len(self.list_backups())
+        status['interval_seconds'] = self.interval
+        return status
+
+    def _write_status(self, status: Dict):
+        path = os.path.join(self.backup_dir, STATUS_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(status, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def is_due(self) -> bool:
+        # Backing off after a copy that checkout kept restarting
+        retry_at = self._read_status().get('retry_at')
+        if retry_at and datetime.now() < datetime.fromisoformat(retry_at):
+            return False
+        backups = self.list_backups()
+        return not backups or time.time() - os.path.getmtime(backups[0]) >= self.interval
+
+    def run_backup(self) -> Dict:
+        """Back up now. Returns the status recorded for this attempt."""
+        with self._lock:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            started = time.time()
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.backup_dir, f"{self.prefix}{stamp}.db.gz")
+            temp_path = os.path.join(self.backup_dir, f".{self.prefix}{stamp}.{os.getpid()}.tmp")
+
+            try:
+                self.db.backup_to(temp_path, self.PAGES_PER_STEP, self.STEP_PAUSE)
+                integrity = check_integrity(temp_path)
+                if integrity != 'ok':
+                    raise RuntimeError(f"Integrity check failed: {integrity}")
+
+                with open(temp_path, 'rb') as source, gzip.open(path + '.tmp', 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.replace(path + '.tmp', path)
+                removed = self.rotate()
+
+                status = {
+                    'success': True,
+                    'message': 'Backup completed',
+                    'file': os.path.basename(path),
+                    'size_bytes': os.path.getsize(path),
+                    'database_bytes': os.path.getsize(temp_path),
+                    'integrity': integrity,
+                    'removed': removed
+                }
+            except BackupBusy as e:
+                # Checkout kept writing - try again later rather than copy in one unpaced pass
+                busy_runs = self._read_status().get('busy_runs', 0) + 1
+                delay = min(self.RETRY_DELAY * 2 ** (busy_runs - 1), max(self.interval, self.RETRY_DELAY))
+                status = {
+                    'success': False,
+                    'message': f"{e} - retrying in {delay} seconds",
+                    'busy_runs': busy_runs,
+                    'retry_at': datetime.fromtimestamp(time.time() + delay).isoformat(timespec='seconds')
+                }
+            except Exception as e:
+                status = {'success': False, 'message': str(e)}
+            finally:
+                for leftover in (temp_path, path + '.tmp'):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+
+            status['finished_at'] = datetime.now().isoformat(timespec='seconds')
+            status['duration_seconds'] = round(time.time() - started, 3)
+            self._write_status(status)
+            return status
+
+    def rotate(self) -> List[str]:
+        """Delete all but the newest keep backups; returns the names removed"""
+        removed = []
+        for path in self.list_backups()[self.keep:]:
+            os.remove(path)
+            removed.append(os.path.basename(path))
+        return removed
+
+    def start(self):
+        """Back up on a daemon thread every interval seconds"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='backup-service', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Several web workers share one backup directory - only back up when due
+            if self.is_due():
+                status = self.run_backup()
+                if not status['success']:
+                    print(f"Backup failed: {status['message']}")
+            self._stop.wait(min(self.interval, 60))
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Back up the POS database")
+    parser.add_argument('--db', default='lastkings_pos.db')
+    parser.add_argument('--dir', default=DEFAULT_BACKUP_DIR, help="Backup directory")
+    parser.add_argument('--keep', type=int, default=DEFAULT_KEEP, help="Backups to keep")
+    parser.add_argument('--list', action='store_true', help="List backups and the last status")
+    parser.add_argument('--verify', metavar='FILE', help="Check a backup file's integrity")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        result = verify_backup(args.verify)
+        print(f"{args.verify}: {result}")
+        return 0 if result == 'ok' else 1
+
+    service = BackupService(Database(args.db), args.dir, keep=args.keep)
+    if args.list:
+        for path in service.list_backups():
+            print(f"{path}  {os.path.getsize(path):>12,} bytes")
+        print(json.dumps(service.get_status(), indent=2))
+        return 0
+
+    status = service.run_backup()
+    print(json.dumps(status, indent=2))
+    return 0 if status['success'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Barcode decoding for retail symbologies
+Verifies GS1 check digits for UPC-A, EAN-13, EAN-8 and ITF-14 so bad reads
+are rejected before any database lookup, decodes GS1 prefix-2 variable
+measure codes (price or quantity embedded in the barcode) and maps ITF-14
+case codes to their unit barcode. The packaging indicator digit doesn't say
+how many units a case holds; that comes from the case_codes table (see
+Database.find_scanned_product).
+
+    decoded = decode_barcode("10012345678902")
+    decoded.lookup_codes    # ['0012345678905', '012345678905']
+    decoded.quantity        # None - until the case code is registered
+"""
+
+from typing import List, Optional
+
+UPC_A = 'UPC-A'
+EAN_13 = 'EAN-13'
+EAN_8 = 'EAN-8'
+ITF_14 = 'ITF-14'
+
+SYMBOLOGY_LENGTHS = {12: UPC_A, 13: EAN_13, 8: EAN_8, 14: ITF_14}
+
+# GS1 prefix-2 (restricted circulation) layout used by in-store scales and labellers:
+# 2P IIIII VVVVV C  - P selects what V holds, IIIII is the item, C the check digit
+VARIABLE_MEASURE_PREFIXES = {
+    '20': 'price', '21': 'price', '22': 'price', '23': 'price', '24': 'price',
+    '25': 'quantity', '26': 'quantity', '27': 'quantity', '28': 'quantity', '29': 'quantity',
+}
+VARIABLE_MEASURE_ITEM_DIGITS = 7       # Prefix plus item reference
+VARIABLE_MEASURE_VALUE_DIGITS = 5
+
+def gtin_check_digit(digits: str) -> int:
+    """GS1 mod-10 check digit for data digits of any GTIN length"""
+    total = 0
+    # Weights alternate 3,1,3... starting from the digit next to the check digit
+    for position, digit in enumerate(reversed(digits)):
+        total += int(digit) * (3 if position % 2 == 0 else 1)
+    return (10 - total % 10) % 10
+
+def with_check_digit(digits: str) -> str:
+    """Append the check digit to data digits"""
+    return digits + str(gtin_check_digit(digits))
+
+def has_valid_check_digit(code: str) -> bool:
+    """True if code is all digits and its last digit is the correct check digit"""
+    return code.isdigit() and len(code) > 1 and gtin_check_digit(code[:-1]) == int(code[-1])
+
+def get_symbology(code: str) -> Optional[str]:
+    """Symbology name by length, or None"""
+    if not code.isdigit():
+        return None
+    return SYMBOLOGY_LENGTHS.get(len(code))
+
+class DecodedBarcode:
+    """What a scanned code means for a sale"""
+
+    def __init__(self, code: str, symbology: str, lookup_codes: List[str],
+                 quantity: Optional[int] = 1, price: float = None, kind: str = 'unit'):
+        self.code = code
+        self.symbology = symbology
+        self.lookup_codes = lookup_codes    # Product barcodes to try, in order
+        self.quantity = quantity            # Units this scan represents (None: unknown case size)
+        self.price = price                  # Embedded price, overrides the product price
+        self.kind = kind                    # 'unit', 'case', 'price' or 'quantity'
+
+    @property
+    def lookup_code(self) -> str:
+        return self.lookup_codes[0]
+
+    def __repr__(self):
+        return (f"DecodedBarcode({self.code!r}, {self.symbology}, kind={self.kind}, "
+                f"lookup={self.lookup_codes}, quantity={self.quantity}, price={self.price})")
+
+def _unit_codes(gtin13: str) -> List[str]:
+    """A GTIN-13 and, for UPC items, the same code as 12-digit UPC-A"""
+    if gtin13.startswith('0'):
+        return [gtin13, gtin13[1:]]
+    return [gtin13]
+
+def decode_barcode(code: str) -> Optional[DecodedBarcode]:
+    """
+    Decode a scanned retail barcode.
+    Returns None for anything that isn't a valid UPC-A/EAN-13/EAN-8/ITF-14.
+    """
+    code = code.strip()
+    symbology = get_symbology(code)
+    if symbology is None or not has_valid_check_digit(code):
+        return None
+
+    if symbology == UPC_A:
+        # Stores may have keyed the product as UPC-A or as EAN-13 with a leading zero
+        return DecodedBarcode(code, symbology, [code, '0' + code])
+
+    if symbology == EAN_8:
+        return DecodedBarcode(code, symbology, [code])
+
+    if symbology == EAN_13:
+        measure = VARIABLE_MEASURE_PREFIXES.get(code[:2])
+        if measure is None:
+            return DecodedBarcode(code, symbology, _unit_codes(code))
+
+        # Products are stored under the code with a zero value
+        item = code[:VARIABLE_MEASURE_ITEM_DIGITS]
+        value = int(code[VARIABLE_MEASURE_ITEM_DIGITS:VARIABLE_MEASURE_ITEM_DIGITS + VARIABLE_MEASURE_VALUE_DIGITS])
+        lookup = with_check_digit(item + '0' * VARIABLE_MEASURE_VALUE_DIGITS)
+        if measure == 'price':
+            return DecodedBarcode(code, symbology, [lookup], price=value / 100, kind='price')
+        return DecodedBarcode(code, symbology, [lookup], quantity=value, kind='quantity')
+
+    # ITF-14: packaging indicator + contained item's GTIN-13 data digits + check digit
+    indicator = code[0]
+    unit = with_check_digit(code[1:13])
+    if indicator == '0':
+        # Indicator 0 is the unit itself in 14-digit form
+        return DecodedBarcode(code, symbology, _unit_codes(unit))
+    return DecodedBarcode(code, symbology, _unit_codes(unit), quantity=None, kind='case')
+
+def is_valid_barcode(code: str) -> bool:
+    """True for a UPC-A, EAN-13, EAN-8 or ITF-14 with a correct check digit"""
+    return decode_barcode(code) is not None
+
+def lookup_code(code: str) -> str:
+    """Product barcode to look up for a scanned code (the code itself if it can't be decoded)"""
+    decoded = decode_barcode(code)
+    return decoded.lookup_code if decoded else code
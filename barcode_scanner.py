@@ -1,34 +1,149 @@
+import time
+from collections import deque
+from typing import List, Optional
+from barcode_decoder import is_valid_barcode
+
+class ScanResult:
+    """One completed input sequence"""
+
+    def __init__(self, code: str, from_scanner: bool, started: float, finished: float):
+        self.code = code
+        self.from_scanner = from_scanner    # False when it looked like someone typing
+        self.started = started
+        self.finished = finished
+
+    def __repr__(self):
+        source = "scanner" if self.from_scanner else "keyboard"
+        return f"ScanResult({self.code!r}, {source})"
+
 class BarcodeScanner:
     """
     Interface for barcode scanner integration.
     Most USB barcode scanners work as keyboard input devices.
     They scan and automatically "type" the barcode followed by Enter.
+
+    A scanner types far faster than a person, so input whose keys all arrive
+    within max_key_interval of each other is classified as a scan. Completed
+    inputs are queued in order, so back-to-back scans are never merged.
     """
 
-    def __init__(self):
-        self.scan_buffer = ""
+    MAX_KEY_INTERVAL = 0.05     # Seconds between keys for a scanner burst
+    MIN_SCAN_LENGTH = 6         # Shorter bursts are treated as typing
+    DEFAULT_SUFFIXES = ('\r', '\n')
+
+    def __init__(self, prefix: str = "", suffixes=DEFAULT_SUFFIXES,
+                 max_key_interval: float = MAX_KEY_INTERVAL, min_length: int = MIN_SCAN_LENGTH):
+        """
+        Args:
+            prefix: Character the scanner is programmed to send before each code (optional)
+            suffixes: Characters that end a code; empty if the scanner sends none
+            max_key_interval: Largest gap between keys that still counts as a scanner burst
+            min_length: Fewest characters for a burst to count as a scan
+        """
+        self.prefix = prefix
+        self.suffixes = tuple(suffixes)
+        self.max_key_interval = max_key_interval
+        self.min_length = min_length
+
+        self.scans = deque()        # Completed ScanResults, oldest first
+        self._chars: List[str] = []
+        self._started = None
+        self._last_key = None
+        self._burst = True          # All gaps so far within max_key_interval
+        self._prefixed = False
 
-    def process_input(self, key_input: str) -> str:
+    @property
+    def scan_buffer(self) -> str:
+        """Characters received for the code in progress"""
+        return "".join(self._chars)
+
+    def process_input(self, key_input: str, timestamp: float = None) -> str:
         """
         Process keyboard input from barcode scanner.
-        Returns barcode when Enter is detected, otherwise empty string.
-        """
-        if key_input == '\r' or key_input == '\n':
-            # Enter key detected - return complete barcode
-            barcode = self.scan_buffer
-            self.scan_buffer = ""
-            return barcode
-        else:
-            # Accumulate characters
-            self.scan_buffer += key_input
+        Returns barcode when Enter (or another suffix) is detected, otherwise empty string.
+        The completed code is also queued - see get_next_scan().
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+
+        if key_input in self.suffixes:
+            # Suffix detected - complete barcode
+            result = self._complete(now)
+            return result.code if result else ""
+
+        if self.prefix and key_input == self.prefix:
+            # Prefix always starts a fresh scan
+            self._reset()
+            self._prefixed = True
+            self._started = self._last_key = now
             return ""
 
+        # Scanners without a suffix: a long gap after a burst ends that code
+        if not self.suffixes and self._last_key is not None and now - self._last_key > self.max_key_interval:
+            self.check_timeout(now)
+
+        if self._last_key is None:
+            self._started = now
+        elif now - self._last_key > self.max_key_interval:
+            self._burst = False
+
+        # Accumulate characters
+        self._chars.append(key_input)
+        self._last_key = now
+        return ""
+
+    def check_timeout(self, now: float = None) -> Optional[ScanResult]:
+        """
+        Complete a scanner burst once keys stop arriving.
+        Only needed for scanners configured without a suffix; call it from a timer.
+        """
+        now = time.monotonic() if now is None else now
+        if (self._chars and self._last_key is not None
+                and now - self._last_key > self.max_key_interval and self._is_scan()):
+            return self._complete(self._last_key)
+        return None
+
+    def _is_scan(self) -> bool:
+        return self._prefixed or (self._burst and len(self._chars) >= self.min_length)
+
+    def _complete(self, now: float) -> Optional[ScanResult]:
+        if not self._chars:
+            self._reset()
+            return None
+
+        result = ScanResult("".join(self._chars), self._is_scan(), self._started, now)
+        self.scans.append(result)
+        self._reset()
+        return result
+
+    def _reset(self):
+        self._chars = []
+        self._started = None
+        self._last_key = None
+        self._burst = True
+        self._prefixed = False
+
+    def get_next_scan(self) -> Optional[ScanResult]:
+        """Oldest completed input, or None"""
+        return self.scans.popleft() if self.scans else None
+
+    def drain(self) -> List[ScanResult]:
+        """All completed inputs in arrival order"""
+        results = list(self.scans)
+        self.scans.clear()
+        return results
+
     def clear_buffer(self):
-        """Clear the scan buffer"""
-        self.scan_buffer = ""
+        """Clear the scan buffer and any queued scans"""
+        self._reset()
+        self.scans.clear()
 
     @staticmethod
-    def validate_barcode(barcode: str) -> bool:
-        """Basic barcode validation"""
-        # Most liquor barcodes are UPC-A (12 digits) or EAN-13 (13 digits)
-        return barcode.isdigit() and len(barcode) in [12, 13]
\ No newline at end of file
+    def validate_barcode(barcode: str, strict: bool = True) -> bool:
+        """
+        Check a barcode before looking it up.
+        strict: require a UPC-A/EAN-13/EAN-8/ITF-14 with a correct check digit.
+        Otherwise accept any 8-14 digit code, for typed in-store codes.
+        """
+        if strict:
+            return is_valid_barcode(barcode)
+        return barcode.isdigit() and 8 <= len(barcode) <= 14
@@ -0,0 +1,456 @@
+"""
+End-to-end throughput benchmark for the LastKingz Flask API
+Drives the real app through the Flask test client or a local gunicorn and
+reports p50/p95/p99 latency and requests per second as JSON.
+
+Usage:
+    python benchmark.py run --db loadtest_pos.db --output baseline.json
+    python benchmark.py run --mode gunicorn --workers 2 --concurrency 4 --output current.json
+    python benchmark.py compare baseline.json current.json --threshold 0.15
+    python benchmark.py startup --runs 10 --profile --output startup.json
+
+The dataset is copied to a scratch directory first, so sales made during the
+run never touch the source database. Without --db a small dataset is generated.
+"""
+
+import argparse
+import contextlib
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REPORT_PERIODS = ['today', 'yesterday', 'week', 'month', 'all']
+SALE_SIZES = [1, 10, 50]
+
+DEFAULT_CREDENTIALS = {
+    'cashier': ('cashier', 'cashier123'),
+    'manager': ('manager', 'manager123'),
+}
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies, elapsed, errors):
+    """Latency summary in milliseconds"""
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'rps': round(len(values) / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+class TestClientDriver:
+    """Send requests through Flask's test client (no network, single thread)"""
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self.clients = {}
+
+    def login(self, role, username, password):
+        client = self.app.test_client()
+        client.post('/login', data={'username': username, 'password': password})
+        self.clients[role] = client
+
+    def request(self, role, method, path, body=None):
+        response = self.clients[role].open(path, method=method, json=body)
+        ok = response.status_code == 200 and (not response.is_json or response.get_json().get('success', True))
+        return ok
+
+class HttpDriver:
+    """Send requests over HTTP to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.openers = {}
+
+    def login(self, role, username, password):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        form = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+        opener.open(self.base_url + '/login', data=form, timeout=30).read()
+        self.openers[role] = opener
+
+    def request(self, role, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        try:
+            with self.openers[role].open(req, timeout=60) as response:
+                payload = response.read()
+                if response.headers.get_content_type() == 'application/json':
+                    return json.loads(payload).get('success', True)
+                return True
+        except OSError:
+            return False
+
+def load_catalog(db_path):
+    """Products used to build requests"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, barcode, name, price
+        FROM products
+        WHERE barcode NOT LIKE 'QUICK%'
+        ORDER BY id
+    """)
+    products = [{'id': r[0], 'barcode': r[1], 'name': r[2], 'price': r[3]} for r in cursor.fetchall()]
+    conn.close()
+    return products
+
+def build_scenarios(products, rng):
+    """Scenario name -> (role, request factory returning (method, path, body))"""
+    def scan():
+        return 'GET', f"/api/product/{rng.choice(products)['barcode']}", None
+
+    def scan_miss():
+        # Falls back to the name search path
+        word = rng.choice(products)['name'].split()[0]
+        return 'GET', f"/api/product/{urllib.parse.quote(word.lower())}", None
+
+    def search():
+        # Search-as-you-type: 2 to 6 leading characters of a product name
+        name = rng.choice(products)['name']
+        return 'GET', f"/api/search-products?q={urllib.parse.quote(name[:rng.randint(2, 6)])}", None
+
+    def sale(lines):
+        def factory():
+            items = [{**p, 'quantity': 1} for p in rng.sample(products, min(lines, len(products)))]
+            total = sum(p['price'] for p in items)
+            return 'POST', '/api/complete-sale', {
+                'items': items, 'cash_received': round(total + 1, 2), 'payment_method': 'cash'
+            }
+        return factory
+
+    scenarios = {
+        'scan': ('cashier', scan),
+        'scan_miss': ('cashier', scan_miss),
+        'search': ('cashier', search),
+    }
+    for lines in SALE_SIZES:
+        scenarios[f'complete_sale_{lines}'] = ('cashier', sale(lines))
+    scenarios['cashier_dashboard'] = ('cashier', lambda: ('GET', '/cashier/dashboard', None))
+    scenarios['manager_dashboard'] = ('manager', lambda: ('GET', '/manager/dashboard', None))
+    for period in REPORT_PERIODS:
+        scenarios[f'report_{period}'] = ('manager', lambda period=period: ('GET', f'/api/sales-report/{period}', None))
+    return scenarios
+
+def run_scenario(driver, role, factory, iterations, warmup, concurrency):
+    """Time one scenario, returns the summary dict"""
+    for _ in range(warmup):
+        driver.request(role, *factory())
+
+    requests = [factory() for _ in range(iterations)]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(chunk):
+        local = []
+        failed = 0
+        for method, path, body in chunk:
+            started = time.perf_counter()
+            ok = driver.request(role, method, path, body)
+            local.append(time.perf_counter() - started)
+            failed += 0 if ok else 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        worker(requests)
+    else:
+        threads = [threading.Thread(target=worker, args=(requests[i::concurrency],)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, errors[0])
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_gunicorn(db_path, workdir, workers, threads):
+    """Start gunicorn on a free local port, returns (process, base_url)"""
+    port = free_port()
+    env = dict(os.environ, LASTKINGZ_DB=db_path, FLASK_ENV='production')
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--chdir', workdir,
+        '--pythonpath', REPO_DIR,
+        'app:app'
+    ], cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup (is it installed?)")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 30s")
+
+def prepare_dataset(source_db, workdir, seed):
+    """Copy (or generate) the dataset into the scratch directory"""
+    db_path = os.path.join(workdir, 'bench_pos.db')
+    if source_db:
+        shutil.copyfile(source_db, db_path)
+    else:
+        from generate_dataset import generate_dataset, SCALES
+        products, sales, days, cashiers = SCALES['small']
+        generate_dataset(db_path, products, sales, days, cashiers, seed)
+
+    # Sales made during the run must never fail on stock
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE products SET stock = 1000000")
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('products', 'sales', 'sale_items')}
+    conn.commit()
+    conn.close()
+    return db_path, counts
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix='lastkingz_bench_')
+    process = None
+    cwd = os.getcwd()
+    try:
+        db_path, counts = prepare_dataset(os.path.abspath(args.db) if args.db else None, workdir, args.seed)
+
+        if args.mode == 'gunicorn':
+            process, base_url = start_gunicorn(db_path, workdir, args.workers, args.threads)
+            driver = HttpDriver(base_url)
+            concurrency = args.concurrency
+        else:
+            # Receipts fall back to files in the working directory
+            os.environ['LASTKINGZ_DB'] = db_path
+            os.chdir(workdir)
+            sys.path.insert(0, REPO_DIR)
+            from app import app as flask_app
+            driver = TestClientDriver(flask_app)
+            concurrency = 1
+
+        for role, (username, password) in DEFAULT_CREDENTIALS.items():
+            driver.login(role, username, password)
+
+        rng = random.Random(args.seed)
+        scenarios = build_scenarios(load_catalog(db_path), rng)
+        selected = args.scenarios.split(',') if args.scenarios else list(scenarios)
+
+        results = {}
+        for name in selected:
+            role, factory = scenarios[name]
+            # Keep receipt printer chatter out of the JSON on stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                results[name] = run_scenario(driver, role, factory, args.iterations, args.warmup, concurrency)
+            r = results[name]
+            print(f"  {name:<20} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  "
+                  f"p99 {r['p99_ms']:>9.2f}ms  {r['rps']:>8.1f} req/s  errors {r['errors']}", file=sys.stderr)
+
+        return {
+            'meta': {
+                'mode': args.mode,
+                'workers': args.workers if args.mode == 'gunicorn' else None,
+                'threads': args.threads if args.mode == 'gunicorn' else None,
+                'concurrency': concurrency,
+                'iterations': args.iterations,
+                'seed': args.seed,
+                'dataset': counts,
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'timestamp': datetime.now().isoformat(timespec='seconds')
+            },
+            'results': results
+        }
+    finally:
+        os.chdir(cwd)
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# Cold start targets: module imported by a gunicorn worker or the desktop launcher
+STARTUP_TARGETS = {
+    'startup_app': 'app',
+    'startup_pos_system': 'pos_system',
+}
+
+STARTUP_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+import {module}
+sys.stdout.write(repr(time.perf_counter() - started))
+"""
+
+def time_import(module, workdir, env):
+    """Seconds a fresh interpreter spends importing module"""
+    output = subprocess.check_output([sys.executable, '-c', STARTUP_SCRIPT.format(module=module)],
+                                     cwd=workdir, env=env, stderr=subprocess.DEVNULL)
+    return float(output.decode().strip().splitlines()[-1])
+
+def import_profile(module, workdir, env, top):
+    """Slowest imports (cumulative microseconds) from python -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=workdir, env=env, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append({'module': name.strip(), 'self_us': int(self_us), 'cumulative_us': int(cumulative_us)})
+    return sorted(rows, key=lambda r: r['cumulative_us'], reverse=True)[:top]
+
+def run_startup(args):
+    """Time cold imports of the web app and the desktop client in fresh interpreters"""
+    workdir = tempfile.mkdtemp(prefix='lastkingz_startup_')
+    try:
+        db_path, counts = prepare_dataset(os.path.abspath(args.db) if args.db else None, workdir, args.seed)
+        env = dict(os.environ, LASTKINGZ_DB=db_path,
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+
+        results, profiles = {}, {}
+        for name, module in STARTUP_TARGETS.items():
+            try:
+                # First import compiles bytecode and migrates the copied database
+                time_import(module, workdir, env)
+            except subprocess.CalledProcessError:
+                print(f"  {name:<20} skipped ({module} failed to import)", file=sys.stderr)
+                continue
+
+            started = time.perf_counter()
+            latencies = [time_import(module, workdir, env) for _ in range(args.runs)]
+            results[name] = summarize(latencies, time.perf_counter() - started, 0)
+            r = results[name]
+            print(f"  {name:<20} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms", file=sys.stderr)
+
+            if args.profile:
+                profiles[name] = import_profile(module, workdir, env, args.top)
+                for row in profiles[name]:
+                    print(f"      {row['cumulative_us'] / 1000:>8.1f}ms  {row['module']}", file=sys.stderr)
+
+        report = {
+            'meta': {
+                'mode': 'startup',
+                'runs': args.runs,
+                'seed': args.seed,
+                'dataset': counts,
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'timestamp': datetime.now().isoformat(timespec='seconds')
+            },
+            'results': results
+        }
+        if profiles:
+            report['import_profile'] = profiles
+        return report
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare_results(baseline, current, threshold):
+    """List regressions where p95 latency rose or throughput fell by more than threshold"""
+    regressions = []
+    for name, base in baseline['results'].items():
+        now = current['results'].get(name)
+        if not now:
+            continue
+        if base['p95_ms'] > 0 and (now['p95_ms'] - base['p95_ms']) / base['p95_ms'] > threshold:
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f}ms -> {now['p95_ms']:.2f}ms")
+        if base['rps'] > 0 and (base['rps'] - now['rps']) / base['rps'] > threshold:
+            regressions.append(f"{name}: throughput {base['rps']:.1f} -> {now['rps']:.1f} req/s")
+        if now['errors'] > base['errors']:
+            regressions.append(f"{name}: errors {base['errors']} -> {now['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="LastKingz API benchmark")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="Run the benchmark suite")
+    run.add_argument('--db', help="Dataset to benchmark against (copied, never modified)")
+    run.add_argument('--mode', choices=['client', 'gunicorn'], default='client')
+    run.add_argument('--iterations', type=int, default=200, help="Timed requests per scenario")
+    run.add_argument('--warmup', type=int, default=10, help="Untimed requests per scenario")
+    run.add_argument('--concurrency', type=int, default=4, help="Client threads (gunicorn mode)")
+    run.add_argument('--workers', type=int, default=1, help="gunicorn workers")
+    run.add_argument('--threads', type=int, default=1, help="gunicorn threads per worker")
+    run.add_argument('--scenarios', help="Comma-separated subset of scenarios")
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--output', help="Write JSON results to this file (default: stdout)")
+
+    startup = sub.add_parser('startup', help="Time cold starts of the web app and desktop client")
+    startup.add_argument('--db', help="Dataset to start against (copied, never modified)")
+    startup.add_argument('--runs', type=int, default=10, help="Timed cold starts per target")
+    startup.add_argument('--profile', action='store_true', help="Report the slowest imports")
+    startup.add_argument('--top', type=int, default=15, help="Imports listed by --profile")
+    startup.add_argument('--seed', type=int, default=42)
+    startup.add_argument('--output', help="Write JSON results to this file (default: stdout)")
+
+    compare = sub.add_parser('compare', help="Compare results against a stored baseline")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.15, help="Allowed relative slowdown")
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if not regressions:
+            print(f"[OK] No regressions beyond {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    report = run_startup(args) if args.command == 'startup' else run_benchmark(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,5 +5,8 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Precompressed (gzip/brotli) copies of the CSS and JavaScript
+python static_assets.py
+
 # Initialize database if it doesn't exist
 python -c "from database import Database; db = Database(); print('Database initialized')"
@@ -1,5 +1,8 @@
-import serial
-import serial.tools.list_ports
+def load_serial():
+    """pyserial, imported on first use so loading this module needs no driver"""
+    import serial
+    import serial.tools.list_ports
+    return serial
 
 class CashDrawer:
     """
@@ -28,6 +31,7 @@ class CashDrawer:
     @staticmethod
     def list_available_ports():
         """List all available COM ports"""
+        serial = load_serial()
         ports = serial.tools.list_ports.comports()
         return [(port.device, port.description) for port in ports]
 
@@ -44,6 +48,7 @@ class CashDrawer:
             else:
                 raise Exception("No COM ports found. Please specify port manually.")
 
+        serial = load_serial()
         try:
             self.serial_connection = serial.Serial(
                 port=self.port,
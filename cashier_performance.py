@@ -0,0 +1,220 @@
+"""
+Cashier throughput and shift performance
+Each cashier's sales in a date range are read in time order from the
+(cashier_id, sale_epoch) index and split into shifts with window functions:
+a gap longer than shift_break seconds between two sales starts a new shift.
+One grouped query then gives, per cashier and shift, sales per hour, average
+basket value and size, items per minute and the idle time between sales, so
+staff can be compared without pulling raw sales into Python. Shifts can also
+be streamed as CSV.
+
+Times are local, using the same UTC offset as time_buckets.py.
+
+Usage:
+    python cashier_performance.py --db lastkings_pos.db --days 7
+    python cashier_performance.py --db lastkings_pos.db --start 2025-03-01 --end 2025-03-31 --csv
+"""
+
+import csv
+import io
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+from database import Database
+from archive_manager import ArchiveManager
+from time_buckets import DAY, DEFAULT_UTC_OFFSET, day_number, day_string
+
+SHIFT_BREAK = 2 * 3600      # A longer gap between two sales ends the shift
+IDLE_GAP = 5 * 60           # Gaps at least this long within a shift count as idle
+
+CSV_COLUMNS = ['cashier_id', 'username', 'full_name', 'shift_start', 'shift_end', 'duration_minutes',
+               'sales', 'revenue', 'items', 'sales_per_hour', 'avg_basket', 'items_per_basket',
+               'items_per_minute', 'idle_gaps', 'idle_minutes', 'longest_gap_minutes']
+
+def local_time(epoch: int, offset: int) -> str:
+    return datetime.fromtimestamp(epoch + offset, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def rates(sales: int, revenue: float, items: float, seconds: int) -> Dict:
+    """Throughput figures; per-time rates are None for a shift with a single sale"""
+    return {
+        'sales_per_hour': round(sales * 3600 / seconds, 2) if seconds else None,
+        'avg_basket': round(revenue / sales, 2) if sales else 0.0,
+        'items_per_basket': round(items / sales, 2) if sales else 0.0,
+        'items_per_minute': round(items * 60 / seconds, 2) if seconds else None
+    }
+
+class CashierPerformance:
+    """Per-shift and per-cashier throughput from the sales table"""
+
+    def __init__(self, db: Database, archives: ArchiveManager = None,
+                 shift_break: int = SHIFT_BREAK, idle_gap: int = IDLE_GAP):
+        if idle_gap <= 0 or shift_break < idle_gap:
+            raise ValueError("Idle gap must be positive and no longer than the shift break")
+        self.db = db
+        self.archives = archives
+        self.shift_break = shift_break
+        self.idle_gap = idle_gap
+
+    def iter_shifts(self, start_date: str, end_date: str, cashier_id: int = None,
+                    offset: int = DEFAULT_UTC_OFFSET) -> Iterator[Dict]:
+        """
+        Shifts in local days start_date..end_date, by cashier then start time.
+        The range is checked here; rows are read as the result is iterated.
+        """
+        first, last = day_number(start_date), day_number(end_date)
+        if last < first:
+            raise ValueError("End date is before start date")
+        reader = self.db
+        if self.archives is not None:
+            # A day either side covers any UTC offset
+            reader = self.archives.spanning(self.db, day_string(first - 1), day_string(last + 1))
+        # One cashier is a range search on the (cashier_id, sale_epoch) index
+        where = "s.cashier_id = :cashier" if cashier_id is not None else "s.cashier_id IS NOT NULL"
+        params = {'cashier': cashier_id, 'start': first * DAY - offset, 'end': (last + 1) * DAY - offset,
+                  'break': self.shift_break, 'idle': self.idle_gap}
+        return self._shifts(reader, where, params, offset)
+
+    def _shifts(self, reader: Database, where: str, params: Dict, offset: int) -> Iterator[Dict]:
+        conn = reader.get_connection()
+        try:
+            # Item counts are summed once for the range's sale ids. A per-sale subquery can't
+            # use the sale_id index through the UNION ALL views that span archives, literal
+            # bounds can.
+            params['low'], params['high'] = conn.execute(f"""
+                SELECT MIN(s.id), MAX(s.id) FROM sales s
+                WHERE {where} AND s.sale_epoch >= :start AND s.sale_epoch < :end
+            """, params).fetchone()
+            cursor = conn.execute(f"""
+                WITH items AS (
+                    SELECT sale_id, SUM(quantity) AS items
+                    FROM sale_items
+                    WHERE sale_id BETWEEN :low AND :high
+                    GROUP BY sale_id
+                ),
+                timed AS (
+                    SELECT s.cashier_id, s.sale_epoch, s.total_amount, COALESCE(i.items, 0) AS items,
+                           s.sale_epoch - LAG(s.sale_epoch) OVER cashier AS gap
+                    FROM sales s
+                    LEFT JOIN items i ON i.sale_id = s.id
+                    WHERE {where} AND s.sale_epoch >= :start AND s.sale_epoch < :end
+                    WINDOW cashier AS (PARTITION BY s.cashier_id ORDER BY s.sale_epoch)
+                ),
+                shifts AS (
+                    SELECT *, SUM(gap IS NULL OR gap > :break) OVER (
+                               PARTITION BY cashier_id ORDER BY sale_epoch ROWS UNBOUNDED PRECEDING) AS shift,
+                           CASE WHEN gap <= :break THEN gap END AS inner_gap
+                    FROM timed
+                )
+                SELECT t.cashier_id, u.username, u.full_name,
+                       MIN(t.sale_epoch), MAX(t.sale_epoch), COUNT(*), SUM(t.total_amount), SUM(t.items),
+                       SUM(t.inner_gap >= :idle), COALESCE(SUM(CASE WHEN t.inner_gap >= :idle THEN t.inner_gap END), 0),
+                       COALESCE(MAX(t.inner_gap), 0)
+                FROM shifts t
+                LEFT JOIN users u ON u.id = t.cashier_id
+                GROUP BY t.cashier_id, t.shift
+                ORDER BY u.username, t.cashier_id, MIN(t.sale_epoch)
+            """, params)
+            for (cashier, username, full_name, started, ended, sales, revenue, items,
+                 idle_gaps, idle_seconds, longest_gap) in cursor:
+                seconds = ended - started
+                yield {
+                    'cashier_id': cashier,
+                    'username': username,
+                    'full_name': full_name,
+                    'shift_start': local_time(started, offset),
+                    'shift_end': local_time(ended, offset),
+                    'duration_minutes': round(seconds / 60, 1),
+                    'sales': sales,
+                    'revenue': round(revenue, 2),
+                    'items': items,
+                    **rates(sales, revenue, items, seconds),
+                    'idle_gaps': idle_gaps,
+                    'idle_minutes': round(idle_seconds / 60, 1),
+                    'longest_gap_minutes': round(longest_gap / 60, 1)
+                }
+        finally:
+            conn.close()
+
+    def report(self, start_date: str, end_date: str, cashier_id: int = None,
+               offset: int = DEFAULT_UTC_OFFSET) -> Dict:
+        """Shifts plus a summary per cashier over all their shifts"""
+        shifts = list(self.iter_shifts(start_date, end_date, cashier_id, offset))
+        totals: Dict[int, Dict] = {}
+        for shift in shifts:
+            cashier = totals.setdefault(shift['cashier_id'], {
+                'cashier_id': shift['cashier_id'], 'username': shift['username'],
+                'full_name': shift['full_name'], 'shifts': 0, 'sales': 0, 'revenue': 0.0,
+                'items': 0, 'seconds': 0, 'idle_minutes': 0.0})
+            cashier['shifts'] += 1
+            cashier['sales'] += shift['sales']
+            cashier['revenue'] += shift['revenue']
+            cashier['items'] += shift['items']
+            cashier['seconds'] += round(shift['duration_minutes'] * 60)
+            cashier['idle_minutes'] += shift['idle_minutes']
+
+        cashiers: List[Dict] = []
+        for cashier in totals.values():
+            seconds = cashier.pop('seconds')
+            cashier.update(rates(cashier['sales'], cashier['revenue'], cashier['items'], seconds))
+            cashier['revenue'] = round(cashier['revenue'], 2)
+            cashier['hours'] = round(seconds / 3600, 2)
+            cashier['idle_minutes'] = round(cashier['idle_minutes'], 1)
+            # Share of time on shift spent idle
+            cashier['idle_share'] = round(cashier['idle_minutes'] * 60 / seconds, 3) if seconds else None
+            cashiers.append(cashier)
+
+        return {'utc_offset_minutes': offset // 60, 'shift_break_minutes': self.shift_break // 60,
+                'idle_gap_minutes': self.idle_gap // 60, 'cashiers': cashiers, 'shifts': shifts}
+
+    def csv_lines(self, start_date: str, end_date: str, cashier_id: int = None,
+                  offset: int = DEFAULT_UTC_OFFSET) -> Iterator[str]:
+        """CSV text of the shifts, header first, one line at a time"""
+        return self._csv(self.iter_shifts(start_date, end_date, cashier_id, offset))
+
+    @staticmethod
+    def _csv(shifts: Iterator[Dict]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, CSV_COLUMNS)
+
+        def flush() -> str:
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        writer.writeheader()
+        yield flush()
+        for shift in shifts:
+            writer.writerow(shift)
+            yield flush()
+
+def main(argv=None):
+    import argparse
+    from sales_analytics import window
+
+    parser = argparse.ArgumentParser(description="Cashier throughput per shift")
+    parser.add_argument('--db', default='lastkings_pos.db')
+    parser.add_argument('--days', type=int, default=7, help="Days ending today (ignored with --start)")
+    parser.add_argument('--start', help="First day (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last day (YYYY-MM-DD)")
+    parser.add_argument('--csv', action='store_true', help="Write the shifts as CSV")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    performance = CashierPerformance(db, ArchiveManager(db))
+    start_date, end_date = window(args.days, args.start, args.end)
+    if args.csv:
+        for line in performance.csv_lines(start_date, end_date):
+            sys.stdout.write(line)
+        return 0
+
+    report = performance.report(start_date, end_date)
+    print(f"Cashier performance {start_date} to {end_date}")
+    for cashier in report['cashiers']:
+        print(f"  {cashier['username'] or cashier['cashier_id']:<15} {cashier['shifts']:>3} shifts  "
+              f"{cashier['sales']:>5} sales  {cashier['sales_per_hour'] or 0:>6}/h  "
+              f"basket {cashier['avg_basket']:>7}  idle {cashier['idle_minutes']:>6} min")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+In-process product catalog cache for the web app
+Scan lookups, product search and the POS pages read the catalog from memory
+instead of querying every product per request. When the cache is older than
+the TTL, or a product was edited in this process, it fetches only the
+products changed since the catalog version it holds (Database.changes_since);
+stock sold through this process is patched in place.
+
+Under gunicorn with preload the master warms the cache before forking, so
+every worker starts with it loaded. Other workers' edits show up within the
+TTL (LASTKINGZ_CATALOG_TTL, seconds); checkout always re-checks stock in the
+database.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List
+import metrics
+from barcode_decoder import decode_barcode
+from database import Database
+
+DEFAULT_TTL = int(os.environ.get('LASTKINGZ_CATALOG_TTL', 5))
+
+CACHED_FIELDS = ('id', 'barcode', 'name', 'price', 'stock', 'low_stock_threshold')
+
+class CatalogCache:
+    """All products keyed by barcode, kept current from the product change feed"""
+
+    def __init__(self, db: Database, ttl: int = DEFAULT_TTL):
+        self.db = db
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._products: List[Dict] = []
+        self._by_barcode: Dict[str, Dict] = {}
+        self._by_id: Dict[int, Dict] = {}
+        self._version = None
+        self._loaded_at = None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def warm(self):
+        """Load every product now"""
+        self._apply(self.db.changes_since(0))
+
+    def refresh(self):
+        """Fetch the products changed since the last load (everything on first use)"""
+        self._apply(self.db.changes_since(self._version or 0))
+
+    def _apply(self, changes: Dict):
+        with self._lock:
+            # A concurrent refresh already applied something newer
+            if not changes['full'] and self._version is not None and changes['version'] < self._version:
+                return
+            by_id = {} if changes['full'] else dict(self._by_id)
+            for product in changes['products']:
+                by_id[product['id']] = {field: product[field] for field in CACHED_FIELDS}
+            for product_id in changes['deleted']:
+                by_id.pop(product_id, None)
+
+            if changes['full'] or changes['products'] or changes['deleted']:
+                self._products = sorted(by_id.values(), key=lambda p: p['name'])
+                self._by_barcode = {p['barcode']: p for p in self._products}
+                self._by_id = by_id
+            self._version = changes['version']
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Refresh on next use (after adding, editing or deleting products)"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _fresh(self):
+        if self.is_stale():
+            self.refresh()
+
+    def get_all_products(self) -> List[Dict]:
+        """All products sorted by name, like Database.get_all_products()"""
+        self._fresh()
+        return [dict(p) for p in self._products]
+
+    def find_scanned_product(self, code: str):
+        """Same contract as Database.find_scanned_product(), served from memory when possible"""
+        self._fresh()
+        product = self._by_barcode.get(code)
+        decoded = None
+        if product is None:
+            decoded = decode_barcode(code)
+            if decoded is not None and decoded.kind == 'case':
+                # Units per case live in case_codes, which isn't cached
+                return self.db.find_scanned_product(code)
+            if decoded is not None:
+                product = next((self._by_barcode[c] for c in decoded.lookup_codes
+                                if c != code and c in self._by_barcode), None)
+
+        metrics.record_cache('catalog', product is not None)
+        if product is not None:
+            return dict(product), decoded
+
+        # Possibly added by another worker since the last load
+        return self.db.find_scanned_product(code)
+
+    def set_stock(self, product_id: int, stock: int):
+        """Record a stock change this process just wrote"""
+        with self._lock:
+            product = self._by_id.get(product_id)
+            if product is not None:
+                product['stock'] = stock
@@ -0,0 +1,115 @@
+"""
+Dashboard statistics for the desktop client
+Keeps the last computed dashboard numbers so switching to the dashboard is
+instant. Stats are recomputed in the background on an interval and after
+each sale, using aggregate queries and only the top low stock rows.
+
+Set LASTKINGZ_DASHBOARD_REFRESH to change the refresh interval (seconds).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from database import Database
+from inventory_manager import InventoryManager
+
+DEFAULT_REFRESH_INTERVAL = int(os.environ.get('LASTKINGZ_DASHBOARD_REFRESH', 60))
+
+class DashboardStatsProvider:
+    """Cached dashboard stats with explicit invalidation"""
+
+    def __init__(self, db: Database, inventory: InventoryManager,
+                 refresh_interval: int = DEFAULT_REFRESH_INTERVAL,
+                 low_stock_limit: int = 5, recent_limit: int = 10):
+        self.db = db
+        self.inventory = inventory
+        self.refresh_interval = refresh_interval
+        self.low_stock_limit = low_stock_limit
+        self.recent_limit = recent_limit
+
+        self._lock = threading.Lock()
+        self._stats = None
+        self._loaded_at = None      # time.monotonic() of the last refresh
+        self._dirty = True
+
+    def get_stats(self) -> Optional[Dict]:
+        """Last computed stats, or None before the first refresh"""
+        with self._lock:
+            return self._stats
+
+    def is_stale(self) -> bool:
+        """True after a sale or once the refresh interval has passed"""
+        with self._lock:
+            if self._dirty or self._loaded_at is None:
+                return True
+            return time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def invalidate(self):
+        """Mark stats out of date (e.g. after a sale is committed)"""
+        with self._lock:
+            self._dirty = True
+
+    def refresh(self) -> Dict:
+        """Recompute stats and cache them - safe to call from a worker thread"""
+        with self._lock:
+            # A sale committed while loading marks the result dirty again
+            self._dirty = False
+
+        stats = self.load()
+
+        with self._lock:
+            self._stats = stats
+            self._loaded_at = time.monotonic()
+        return stats
+
+    def load(self) -> Dict:
+        """Query the dashboard numbers"""
+        today = datetime.now().date()
+        tomorrow = today + timedelta(days=1)
+        week_ago = today - timedelta(days=7)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        # Range on the raw column so the sale_date index can be used
+        cursor.execute("""
+            SELECT COUNT(*), COALESCE(SUM(total_amount), 0),
+                   COALESCE(SUM(CASE WHEN sale_date >= :today AND sale_date < :tomorrow THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN sale_date >= :today AND sale_date < :tomorrow
+                                     THEN total_amount ELSE 0 END), 0)
+            FROM sales
+            WHERE sale_date >= :week_ago
+        """, {'today': today.isoformat(), 'tomorrow': tomorrow.isoformat(), 'week_ago': week_ago.isoformat()})
+        week_trans, week_sales, today_trans, today_sales = cursor.fetchone()
+
+        # Recent sales - limit first so item counts are only taken for the rows shown
+        cursor.execute("""
+            SELECT recent.id, recent.sale_date, recent.total_amount,
+                   (SELECT COUNT(*) FROM sale_items WHERE sale_id = recent.id) as items_count
+            FROM (SELECT id, sale_date, total_amount
+                  FROM sales
+                  ORDER BY sale_date DESC
+                  LIMIT ?) recent
+            ORDER BY recent.sale_date DESC
+        """, (self.recent_limit,))
+        recent_sales = [{'id': r[0], 'date': r[1], 'total': r[2], 'items_count': r[3]}
+                        for r in cursor.fetchall()]
+        conn.close()
+
+        # Inventory counters and top low stock rows
+        summary = self.inventory.get_inventory_summary(self.low_stock_limit)
+
+        return {
+            'today_sales': today_sales,
+            'today_transactions': today_trans,
+            'week_sales': week_sales,
+            'week_transactions': week_trans,
+            'total_products': summary['total_products'],
+            'low_stock_count': summary['low_stock_count'],
+            'inventory_value': summary['total_inventory_value'],
+            'low_stock_items': summary['low_stock_items'],
+            'recent_sales': recent_sales,
+            'updated_at': datetime.now()
+        }
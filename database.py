@@ -1,79 +1,56 @@
 import sqlite3
+import time
+import metrics
+import migrations
+import sql_profiler
+from barcode_decoder import decode_barcode, DecodedBarcode
 from datetime import datetime
 from typing import List, Dict, Optional
 
+class BackupBusy(Exception):
+    """A stepped backup kept restarting because other connections kept writing"""
+
 class Database:
+    BACKUP_RESTARTS = 3     # Restarts of a stepped backup before giving up this run
+
     def __init__(self, db_name: str = "lastkings_pos.db"):
         self.db_name = db_name
-        self.init_database()
+        migrations.migrate(db_name)
 
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
-
-    def init_database(self):
-        """Initialize database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Products table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                barcode TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                price REAL NOT NULL,
-                stock INTEGER NOT NULL,
-                low_stock_threshold INTEGER DEFAULT 10,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        return sql_profiler.connect(self.db_name)
 
-        # Sales table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sales (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                total_amount REAL NOT NULL,
-                cash_received REAL NOT NULL,
-                change_given REAL NOT NULL,
-                sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                cashier_id INTEGER,
-                payment_method TEXT DEFAULT 'cash',
-                FOREIGN KEY (cashier_id) REFERENCES users(id)
-            )
-        ''')
+    def backup_to(self, path: str, pages: int = 256, pause: float = 0.0):
+        """
+        Copy the database to path with SQLite's online backup API.
+        Copies pages at a time and sleeps pause seconds between steps so
+        checkout writes can take the lock while a large copy is running.
+        A write from another connection restarts a stepped copy; after
+        BACKUP_RESTARTS restarts it raises BackupBusy and the caller tries
+        again later. A single-step copy would hold the read lock for the
+        whole pass and keep checkout from committing.
+        """
+        restarts = 0
+        last_remaining = None
 
-        # Add cashier_id column if it doesn't exist (migration)
-        try:
-            cursor.execute('ALTER TABLE sales ADD COLUMN cashier_id INTEGER')
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Column already exists
+        def progress(status, remaining, total):
+            nonlocal restarts, last_remaining
+            # Pages left going back up means SQLite started the copy over
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts >= self.BACKUP_RESTARTS:
+                    raise BackupBusy(f"Backup restarted {restarts} times by database writes")
+            last_remaining = remaining
+            if pause:
+                time.sleep(pause)
 
-        # Add payment_method column if it doesn't exist (migration)
+        source = self.get_connection()
+        target = sqlite3.connect(path)
         try:
-            cursor.execute('ALTER TABLE sales ADD COLUMN payment_method TEXT DEFAULT "cash"')
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-
-        # Sale items table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sale_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sale_id INTEGER NOT NULL,
-                product_id INTEGER NOT NULL,
-                barcode TEXT NOT NULL,
-                product_name TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                unit_price REAL NOT NULL,
-                subtotal REAL NOT NULL,
-                FOREIGN KEY (sale_id) REFERENCES sales(id),
-                FOREIGN KEY (product_id) REFERENCES products(id)
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
+            source.backup(target, pages=pages, progress=progress)
+        finally:
+            target.close()
+            source.close()
 
     def add_product(self, barcode: str, name: str, price: float, stock: int, low_stock_threshold: int = 10):
         """Add a new product to inventory"""
@@ -110,6 +87,110 @@ class Database:
             }
         return None
 
+    def find_scanned_product(self, code: str):
+        """
+        Product for a scanned code, plus the decoded barcode (case size, embedded price).
+        Exact barcode matches win, then registered case codes; otherwise variable
+        measure and UPC/EAN forms of the code are tried. A case code that isn't
+        registered finds its unit product with quantity None (unknown case size).
+        Returns (product or None, DecodedBarcode or None).
+        """
+        product = self.get_product_by_barcode(code)
+        if product:
+            return product, None
+
+        case = self.get_case_code(code)
+        if case:
+            decoded = decode_barcode(code)
+            return case['product'], DecodedBarcode(code, decoded.symbology if decoded else None,
+                                                   [case['product']['barcode']], quantity=case['units'],
+                                                   kind='case')
+
+        decoded = decode_barcode(code)
+        if decoded is None:
+            return None, None
+        for candidate in decoded.lookup_codes:
+            if candidate != code:
+                product = self.get_product_by_barcode(candidate)
+                if product:
+                    return product, decoded
+        return None, decoded
+
+    def add_case_code(self, case_code: str, product_id: int, units: int):
+        """Register (or change) the barcode of a case holding units of a product"""
+        if units < 1:
+            raise ValueError("A case holds at least one unit")
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT INTO case_codes (case_code, product_id, units) VALUES (?, ?, ?)
+                ON CONFLICT(case_code) DO UPDATE SET product_id = excluded.product_id, units = excluded.units
+            ''', (case_code, product_id, units))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete_case_code(self, case_code: str) -> bool:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM case_codes WHERE case_code = ?', (case_code,))
+        deleted = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return deleted
+
+    def get_case_code(self, case_code: str) -> Optional[Dict]:
+        """Product and units for a registered case code"""
+        conn = self.get_connection()
+        row = conn.execute('''
+            SELECT c.units, p.id, p.barcode, p.name, p.price, p.stock, p.low_stock_threshold
+            FROM case_codes c JOIN products p ON p.id = c.product_id
+            WHERE c.case_code = ?
+        ''', (case_code,)).fetchone()
+        conn.close()
+
+        if row:
+            return {
+                'units': row[0],
+                'product': {
+                    'id': row[1],
+                    'barcode': row[2],
+                    'name': row[3],
+                    'price': row[4],
+                    'stock': row[5],
+                    'low_stock_threshold': row[6]
+                }
+            }
+        return None
+
+    def get_case_codes(self, product_id: int) -> List[Dict]:
+        """Case codes registered for a product"""
+        conn = self.get_connection()
+        rows = conn.execute('''
+            SELECT case_code, units FROM case_codes WHERE product_id = ? ORDER BY units, case_code
+        ''', (product_id,)).fetchall()
+        conn.close()
+        return [{'case_code': row[0], 'units': row[1]} for row in rows]
+
+    def get_product_by_id(self, product_id: int) -> Optional[Dict]:
+        """Get product details by id"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return {
+                'id': row[0],
+                'barcode': row[1],
+                'name': row[2],
+                'price': row[3],
+                'stock': row[4],
+                'low_stock_threshold': row[5]
+            }
+        return None
+
     def update_stock(self, product_id: int, quantity_sold: int) -> bool:
         """Reduce stock after a sale"""
         conn = self.get_connection()
@@ -124,6 +205,18 @@ class Database:
         conn.close()
         return success
 
+    @staticmethod
+    def adjust_stock(cursor, product_id: int, quantity_sold: int) -> Optional[int]:
+        """Reduce stock unconditionally in the cursor's transaction and return the new level (may go negative)"""
+        cursor.execute('''
+            UPDATE products
+            SET stock = stock - ?
+            WHERE id = ?
+        ''', (quantity_sold, product_id))
+        cursor.execute('SELECT stock FROM products WHERE id = ?', (product_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
     def check_low_stock(self, product_id: int) -> bool:
         """Check if product stock is below threshold"""
         conn = self.get_connection()
@@ -160,16 +253,32 @@ class Database:
             'low_stock_threshold': row[4]
         } for row in rows]
 
-    def save_sale(self, items: List[Dict], total_amount: float, cash_received: float, change_given: float, cashier_id: int = None, payment_method: str = 'cash') -> int:
-        """Save sale transaction"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    @staticmethod
+    def begin_write(cursor):
+        """Start a write transaction, taking the lock up front so time spent waiting for it is measured on its own"""
+        started = time.perf_counter()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+        except sqlite3.OperationalError:
+            metrics.DB_LOCK_TIMEOUTS.inc()
+            raise
+        metrics.DB_LOCK_WAIT.observe(time.perf_counter() - started)
 
+    @staticmethod
+    def insert_sale(cursor, items: List[Dict], total_amount: float, cash_received: float, change_given: float,
+                    cashier_id: int = None, payment_method: str = 'cash', sale_date: str = None) -> int:
+        """Insert a sale and its items in the cursor's transaction"""
         # Insert sale
-        cursor.execute('''
-            INSERT INTO sales (total_amount, cash_received, change_given, cashier_id, payment_method)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (total_amount, cash_received, change_given, cashier_id, payment_method))
+        if sale_date:
+            cursor.execute('''
+                INSERT INTO sales (total_amount, cash_received, change_given, cashier_id, payment_method, sale_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (total_amount, cash_received, change_given, cashier_id, payment_method, sale_date))
+        else:
+            cursor.execute('''
+                INSERT INTO sales (total_amount, cash_received, change_given, cashier_id, payment_method)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (total_amount, cash_received, change_given, cashier_id, payment_method))
         sale_id = cursor.lastrowid
 
         # Insert sale items
@@ -179,9 +288,19 @@ class Database:
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (sale_id, item['product_id'], item['barcode'], item['name'],
                   item['quantity'], item['price'], item['subtotal']))
+        return sale_id
 
-        conn.commit()
-        conn.close()
+    def save_sale(self, items: List[Dict], total_amount: float, cash_received: float, change_given: float, cashier_id: int = None, payment_method: str = 'cash', sale_date: str = None) -> int:
+        """Save sale transaction (sale_date defaults to now, offline sales pass their own)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            self.begin_write(cursor)
+            sale_id = self.insert_sale(cursor, items, total_amount, cash_received, change_given,
+                                       cashier_id, payment_method, sale_date)
+            conn.commit()
+        finally:
+            conn.close()
         return sale_id
 
     def get_all_products(self) -> List[Dict]:
@@ -201,6 +320,57 @@ class Database:
             'low_stock_threshold': row[5]
         } for row in rows]
 
+    def get_catalog_version(self) -> int:
+        """Version of the newest product insert, edit or delete"""
+        conn = self.get_connection()
+        row = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+        conn.close()
+        return row[0]
+
+    def changes_since(self, version: int = 0) -> Dict:
+        """
+        Products added or changed after version and ids of products deleted
+        since then, with the current version to pass next time. With version 0,
+        or a version this database never reached (e.g. restored from a backup),
+        the whole catalog is returned and 'full' is set.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # One read transaction, so the version matches the rows returned
+        cursor.execute('BEGIN')
+        current = cursor.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()[0]
+        full = version <= 0 or version > current
+        if full:
+            version = 0
+        cursor.execute('''
+            SELECT id, barcode, name, price, stock, low_stock_threshold, updated_at, row_version
+            FROM products
+            WHERE row_version > ?
+            ORDER BY row_version
+        ''', (version,))
+        rows = cursor.fetchall()
+        deleted = [] if full else cursor.execute('''
+            SELECT product_id FROM product_tombstones WHERE row_version > ? ORDER BY row_version
+        ''', (version,)).fetchall()
+        conn.commit()
+        conn.close()
+
+        return {
+            'version': current,
+            'full': full,
+            'products': [{
+                'id': row[0],
+                'barcode': row[1],
+                'name': row[2],
+                'price': row[3],
+                'stock': row[4],
+                'low_stock_threshold': row[5],
+                'updated_at': row[6],
+                'row_version': row[7]
+            } for row in rows],
+            'deleted': [row[0] for row in deleted]
+        }
+
     def update_product_stock(self, product_id: int, new_stock: int):
         """Update product stock to a specific value"""
         conn = self.get_connection()
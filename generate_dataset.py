@@ -0,0 +1,270 @@
+"""
+Synthetic dataset generator for load and scale testing
+Builds a LastKingz POS database with a realistic catalog and sales history.
+The same seed and end date always produce the same data, so performance
+changes can be measured against identical datasets.
+
+Usage:
+    python generate_dataset.py --scale large --db loadtest_pos.db --seed 42
+    python generate_dataset.py --products 5000 --sales 100000 --end-date 2025-06-30
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, date, timedelta
+from database import Database
+from barcode_decoder import with_check_digit
+from user_auth import UserAuth
+from quick_sale import QuickSaleManager
+
+# Preset sizes: (products, sales, days of history, cashiers)
+SCALES = {
+    'small': (1000, 20000, 90, 4),
+    'medium': (10000, 300000, 365, 6),
+    'large': (50000, 2000000, 730, 10),
+}
+
+CATEGORIES = [
+    # (kind, brands, sizes, base price)
+    ("Whiskey", ["Jack Daniels", "Jameson", "Jim Beam", "Johnnie Walker", "Bell's", "Grant's"],
+     ["375ml", "750ml", "1L"], 24.00),
+    ("Vodka", ["Smirnoff", "Absolut", "Skyy", "Russian Bear", "Grey Goose"],
+     ["375ml", "750ml", "1L"], 18.00),
+    ("Gin", ["Gilbey's", "Tanqueray", "Bombay Sapphire", "Gordon's", "Stretton's"],
+     ["750ml", "1L"], 16.00),
+    ("Rum", ["Bacardi", "Captain Morgan", "Red Heart", "Malibu"],
+     ["750ml", "1L"], 15.00),
+    ("Beer", ["Castle", "Zambezi", "Golden Pilsener", "Black Label", "Lion", "Heineken"],
+     ["340ml", "440ml", "6pk", "12pk", "24pk"], 2.00),
+    ("Cider", ["Savanna", "Hunter's Gold", "Redds", "Brutal Fruit"],
+     ["330ml", "6pk"], 2.50),
+    ("Wine", ["Four Cousins", "Nederburg", "Drostdy-Hof", "Robertson", "Cellar Cask"],
+     ["750ml", "1.5L", "5L box"], 9.00),
+    ("Soft Drink", ["Coca-Cola", "Fanta", "Sprite", "Schweppes", "Mazoe"],
+     ["330ml", "500ml", "2L"], 1.00),
+    ("Snacks", ["Simba", "Doritos", "Nik Naks", "Willards"],
+     ["36g", "125g"], 1.20),
+]
+
+# Three-digit GS1 prefixes used for generated EAN-13 barcodes
+BARCODE_PREFIXES = ["600", "601", "500", "400", "890", "690"]
+
+# Relative sales volume per weekday (Monday first) and per hour of day
+WEEKDAY_WEIGHTS = [0.8, 0.8, 0.9, 1.0, 1.5, 1.8, 1.2]
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 0, 0, 2, 3, 4, 5, 6, 6, 5, 5, 7, 9, 10, 9, 7, 5, 3, 0]
+
+ITEMS_PER_SALE = [1, 2, 3, 4, 5, 6, 8, 10]
+ITEMS_PER_SALE_WEIGHTS = [30, 25, 18, 10, 7, 5, 3, 2]
+QUANTITY_WEIGHTS = [80, 14, 4, 2]
+
+ECOCASH_SHARE = 0.30
+ZIPF_EXPONENT = 1.1
+BATCH_SIZE = 50000
+
+def make_barcode(index: int, rng: random.Random) -> str:
+    """Unique, valid EAN-13 for a generated product"""
+    digits = f"{rng.choice(BARCODE_PREFIXES)}{index:09d}"
+    return with_check_digit(digits)
+
+def round_price(value: float) -> float:
+    """Round to shelf prices ending in .49 or .99"""
+    whole = int(value)
+    return whole + (0.49 if value - whole < 0.5 else 0.99)
+
+def generate_products(count: int, rng: random.Random):
+    """Yield product rows (barcode, name, price, stock, low_stock_threshold)"""
+    for i in range(1, count + 1):
+        kind, brands, sizes, base_price = rng.choice(CATEGORIES)
+        size = rng.choice(sizes)
+        name = f"{rng.choice(brands)} {kind} {size}"
+        price = round_price(base_price * rng.lognormvariate(0, 0.45))
+        stock = rng.randint(0, 400)
+        threshold = rng.choice([5, 10, 10, 15, 20])
+        yield (make_barcode(i, rng), name, price, stock, threshold)
+
+def zipf_cum_weights(count: int):
+    """Cumulative Zipf weights for popularity ranks 1..count"""
+    return list(itertools.accumulate(1.0 / (rank ** ZIPF_EXPONENT) for rank in range(1, count + 1)))
+
+def generate_sale_times(count: int, start: date, days: int, rng: random.Random):
+    """Sorted sale timestamps with weekday and business-hour peaks"""
+    day_list = [start + timedelta(days=d) for d in range(days)]
+    day_weights = [WEEKDAY_WEIGHTS[d.weekday()] for d in day_list]
+    chosen_days = rng.choices(day_list, weights=day_weights, k=count)
+    chosen_hours = rng.choices(range(24), weights=HOUR_WEIGHTS, k=count)
+
+    times = [datetime(d.year, d.month, d.day, h, rng.randrange(60), rng.randrange(60))
+             for d, h in zip(chosen_days, chosen_hours)]
+    times.sort()
+    return times
+
+def cash_tendered(total: float, rng: random.Random) -> float:
+    """Cash handed over - exact, or rounded up to the next note"""
+    note = rng.choice([0, 1, 5, 10, 20])
+    if note == 0:
+        return total
+    return float(int(total // note + 1) * note)
+
+def create_cashiers(db_name: str, count: int):
+    """Create cashier accounts and return their user ids"""
+    auth = UserAuth(db_name)
+    conn = Database(db_name).get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT OR IGNORE INTO users (username, password_hash, full_name, role)
+        VALUES (?, ?, ?, ?)
+    """, [(f"cashier{n:02d}", auth.hash_password('cashier123'), f"Cashier {n:02d}", UserAuth.ROLE_CASHIER)
+          for n in range(1, count + 1)])
+    conn.commit()
+    cursor.execute("SELECT id FROM users WHERE role = ? ORDER BY id", (UserAuth.ROLE_CASHIER,))
+    ids = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return ids
+
+def generate_dataset(db_name: str, products: int, sales: int, days: int, cashiers: int,
+                     seed: int = 42, end_date: date = None):
+    """Build the dataset, returns row counts"""
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+
+    # Create schema through the normal application code paths
+    db = Database(db_name)
+    QuickSaleManager(db_name)
+    cashier_ids = create_cashiers(db_name, cashiers)
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA journal_mode = MEMORY")
+
+    # Products
+    cursor.executemany("""
+        INSERT INTO products (barcode, name, price, stock, low_stock_threshold)
+        VALUES (?, ?, ?, ?, ?)
+    """, generate_products(products, rng))
+    conn.commit()
+
+    cursor.execute("SELECT id, barcode, name, price FROM products WHERE barcode NOT LIKE 'QUICK%' ORDER BY id")
+    catalog = cursor.fetchall()
+
+    # Popularity rank is independent of insertion order
+    popularity = catalog[:]
+    rng.shuffle(popularity)
+    cum_weights = zipf_cum_weights(len(popularity))
+
+    # Morning and evening shifts
+    half = max(1, len(cashier_ids) // 2)
+    morning, evening = cashier_ids[:half], cashier_ids[half:] or cashier_ids
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sales")
+    sale_id = cursor.fetchone()[0]
+
+    times = generate_sale_times(sales, start_date, days, rng)
+    item_total = 0
+
+    for offset in range(0, len(times), BATCH_SIZE):
+        sale_rows = []
+        item_rows = []
+
+        for sale_time in times[offset:offset + BATCH_SIZE]:
+            sale_id += 1
+            line_count = rng.choices(ITEMS_PER_SALE, weights=ITEMS_PER_SALE_WEIGHTS)[0]
+            lines = {}
+            for product in rng.choices(popularity, cum_weights=cum_weights, k=line_count):
+                quantity = rng.choices((1, 2, 3, 6), weights=QUANTITY_WEIGHTS)[0]
+                lines[product[0]] = (product, lines.get(product[0], (product, 0))[1] + quantity)
+
+            total = 0.0
+            for product, quantity in lines.values():
+                subtotal = round(product[3] * quantity, 2)
+                total += subtotal
+                item_rows.append((sale_id, product[0], product[1], product[2], quantity, product[3], subtotal))
+            total = round(total, 2)
+
+            if rng.random() < ECOCASH_SHARE:
+                payment_method, cash_received = 'ecocash', total
+            else:
+                payment_method, cash_received = 'cash', cash_tendered(total, rng)
+
+            cashier_id = rng.choice(morning if sale_time.hour < 15 else evening)
+            sale_rows.append((sale_id, total, cash_received, round(cash_received - total, 2),
+                              sale_time.strftime('%Y-%m-%d %H:%M:%S'), cashier_id, payment_method))
+
+        # One transaction per batch
+        cursor.executemany("""
+            INSERT INTO sales (id, total_amount, cash_received, change_given, sale_date, cashier_id, payment_method)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, sale_rows)
+        cursor.executemany("""
+            INSERT INTO sale_items (sale_id, product_id, barcode, product_name, quantity, unit_price, subtotal)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, item_rows)
+        conn.commit()
+
+        item_total += len(item_rows)
+        print(f"  {min(offset + BATCH_SIZE, len(times)):,} / {len(times):,} sales")
+
+    cursor.execute("PRAGMA journal_mode = DELETE")
+    cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    return {
+        'products': len(catalog),
+        'sales': len(times),
+        'sale_items': item_total,
+        'cashiers': len(cashier_ids),
+        'start_date': str(start_date),
+        'end_date': str(end_date)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic LastKingz POS database")
+    parser.add_argument('--db', default='lastkings_pos.db', help="Output database file")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help="Preset dataset size")
+    parser.add_argument('--products', type=int, help="Number of products (overrides scale)")
+    parser.add_argument('--sales', type=int, help="Number of sales (overrides scale)")
+    parser.add_argument('--days', type=int, help="Days of sales history (overrides scale)")
+    parser.add_argument('--cashiers', type=int, help="Number of cashier accounts (overrides scale)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--end-date', help="Last day of history, YYYY-MM-DD (default: today)")
+    parser.add_argument('--force', action='store_true', help="Replace the output file if it exists")
+    args = parser.parse_args()
+
+    products, sales, days, cashiers = SCALES[args.scale]
+    products = args.products or products
+    sales = args.sales or sales
+    days = args.days or days
+    cashiers = args.cashiers or cashiers
+    end_date = datetime.strptime(args.end_date, '%Y-%m-%d').date() if args.end_date else None
+
+    if os.path.exists(args.db):
+        if not args.force:
+            print(f"ERROR: {args.db} already exists. Use --force to replace it.")
+            return 1
+        os.remove(args.db)
+
+    print("=" * 60)
+    print("LastKingz POS - Synthetic Dataset Generator")
+    print("=" * 60)
+    print(f"  Database: {args.db}")
+    print(f"  Products: {products:,}  Sales: {sales:,}  Days: {days}  Cashiers: {cashiers}  Seed: {args.seed}")
+    print()
+
+    started = time.perf_counter()
+    counts = generate_dataset(args.db, products, sales, days, cashiers, args.seed, end_date)
+    elapsed = time.perf_counter() - started
+
+    print()
+    print(f"[OK] {counts['products']:,} products, {counts['sales']:,} sales, "
+          f"{counts['sale_items']:,} sale items ({counts['start_date']} to {counts['end_date']})")
+    print(f"     Generated in {elapsed:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
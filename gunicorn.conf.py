@@ -0,0 +1,74 @@
+"""
+gunicorn settings for the LastKingz web app (used by serve.py)
+Workers and threads are sized from the CPU count. The default gthread worker
+keeps other terminals served while one request waits on the receipt printer;
+set LASTKINGZ_WORKER_CLASS=sync for one request per worker.
+
+    LASTKINGZ_WORKERS       worker processes (default: 2 x CPUs + 1, at most MAX_WORKERS)
+    LASTKINGZ_THREADS       threads per gthread worker (default: 4)
+    LASTKINGZ_WORKER_CLASS  gthread or sync (default: gthread)
+    LASTKINGZ_METRICS_DIR   where workers write their metrics (default: a temporary directory)
+    LASTKINGZ_METRICS_INTERVAL  seconds between a worker's metrics writes (default: 5)
+    PORT                    port to listen on (default: 5000)
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Each worker holds its own catalog cache and Flask app; keep memory bounded on small hosts
+MAX_WORKERS = 4
+DEFAULT_THREADS = 4
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = os.environ.get('LASTKINGZ_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('LASTKINGZ_WORKERS', 0)) or min(multiprocessing.cpu_count() * 2 + 1, MAX_WORKERS)
+threads = int(os.environ.get('LASTKINGZ_THREADS', 0)) or (DEFAULT_THREADS if worker_class == 'gthread' else 1)
+
+# Workers write their metrics here so /metrics adds up all of them (see metrics.py).
+# Set before the app is imported, so every worker reads it.
+CREATED_METRICS_DIR = 'LASTKINGZ_METRICS_DIR' not in os.environ
+if CREATED_METRICS_DIR:
+    os.environ['LASTKINGZ_METRICS_DIR'] = tempfile.mkdtemp(prefix='lastkingz-metrics-')
+
+# Import the app once in the master; workers fork with it (and the warm catalog) already loaded
+preload_app = True
+
+# Receipt printing can take several seconds on a cold printer
+timeout = 60
+graceful_timeout = 30
+accesslog = '-'
+
+def when_ready(server):
+    """Load the catalog in the master so every worker starts with it"""
+    from app import catalog
+    catalog.warm()
+    server.log.info(f"Catalog warmed; starting {workers} {worker_class} workers x {threads} threads")
+
+def post_fork(server, worker):
+    """Reset per-process state inherited from the master"""
+    from app import init_worker
+    init_worker()
+
+def on_starting(server):
+    """Don't add up metrics left by an earlier run"""
+    from metrics import SharedMetrics
+    SharedMetrics(os.environ['LASTKINGZ_METRICS_DIR']).clear()
+
+def worker_exit(server, worker):
+    """Write the worker's latest metrics before child_exit folds them into the totals"""
+    from app import app
+    shared = app.extensions.get('shared_metrics')
+    if shared is not None:
+        shared.stop()
+
+def child_exit(server, worker):
+    """Keep an exited worker's counts in the totals"""
+    from metrics import SharedMetrics
+    SharedMetrics(os.environ['LASTKINGZ_METRICS_DIR']).retire(worker.pid)
+
+def on_exit(server):
+    """Remove the metrics directory made for this run"""
+    if CREATED_METRICS_DIR:
+        shutil.rmtree(os.environ['LASTKINGZ_METRICS_DIR'], ignore_errors=True)
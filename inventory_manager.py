@@ -60,6 +60,48 @@ class InventoryManager:
             return row[0] >= quantity
         return False
 
+    def get_inventory_summary(self, low_stock_limit: int = 5) -> Dict:
+        """
+        Inventory counters plus the most urgent low stock rows.
+        Aggregates in SQL instead of loading the catalog like get_inventory_report.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(stock <= low_stock_threshold), 0),
+                   COALESCE(SUM(stock = 0), 0),
+                   COALESCE(SUM(stock * price), 0)
+            FROM products
+        ''')
+        total_products, low_stock_count, out_of_stock, total_value = cursor.fetchone()
+
+        cursor.execute('''
+            SELECT id, barcode, name, stock, low_stock_threshold
+            FROM products
+            WHERE stock <= low_stock_threshold
+            ORDER BY stock, name
+            LIMIT ?
+        ''', (low_stock_limit,))
+        low_stock = [{
+            'id': row[0],
+            'barcode': row[1],
+            'name': row[2],
+            'stock': row[3],
+            'low_stock_threshold': row[4]
+        } for row in cursor.fetchall()]
+
+        conn.close()
+
+        return {
+            'total_products': total_products,
+            'low_stock_count': low_stock_count,
+            'out_of_stock_count': out_of_stock,
+            'total_inventory_value': total_value,
+            'low_stock_items': low_stock
+        }
+
     def get_inventory_report(self) -> Dict:
         """Generate inventory status report"""
         conn = self.db.get_connection()
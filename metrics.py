@@ -0,0 +1,402 @@
+"""
+Metrics for the LastKingz POS web app
+Counters, gauges and latency histograms for routes, checkout stages, scans,
+caches, database lock waits and the receipt printer. Exposed in Prometheus
+text format at /metrics and per request as a Server-Timing header.
+
+Recording is a dict lookup plus a bisect under a per-metric lock, so it is
+cheap enough for the checkout path.
+
+Each gunicorn worker keeps its own numbers. With LASTKINGZ_METRICS_DIR set
+(gunicorn.conf.py sets it) every worker writes a snapshot file there from a
+background thread every LASTKINGZ_METRICS_INTERVAL seconds (default 5) and
+once more as it exits, and /metrics adds up all the files, so a scrape sees
+the whole server whichever worker answers it. /metrics needs the Bearer token in
+LASTKINGZ_METRICS_TOKEN and is refused while that is unset.
+"""
+
+import bisect
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+
+# Seconds - covers sub-millisecond scans up to slow printer jobs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between a worker's snapshot writes - requests never touch the file
+WRITE_INTERVAL = float(os.environ.get('LASTKINGZ_METRICS_INTERVAL', 5))
+
+_local = threading.local()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+class Metric:
+    """Base class - one metric family with optional labels"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self, values=None):
+        """Exposition lines from this process's values, or from values merged from snapshots"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples(values))
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    metric_type = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def combine(values, key, value):
+        values[key] = values.get(key, 0) + value
+
+    def _samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        items = sorted(values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), list(series)] for key, series in self._series.items()]
+
+    @staticmethod
+    def combine(values, key, series):
+        total = values.get(key)
+        values[key] = [a + b for a, b in zip(total, series)] if total else list(series)
+
+    def _samples(self, values=None):
+        if values is None:
+            with self._lock:
+                values = {key: list(series) for key, series in self._series.items()}
+        items = sorted(values.items())
+
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metric families rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def snapshot(self):
+        """{metric name: [[label values, value], ...]} for writing to a shared file"""
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def merge(self, snapshots, skip_types=()):
+        """Snapshots added up into one, leaving out metrics of skip_types"""
+        merged = {}
+        for metric in self._metrics:
+            if metric.metric_type in skip_types:
+                continue
+            values = {}
+            for snapshot in snapshots:
+                for key, value in snapshot.get(metric.name, ()):
+                    metric.combine(values, tuple(key), value)
+            merged[metric.name] = [[list(key), value] for key, value in values.items()]
+        return merged
+
+    def render(self, snapshots=None):
+        """Prometheus text exposition format, of this process or of the sum of snapshots"""
+        merged = self.merge(snapshots) if snapshots is not None else None
+        lines = []
+        for metric in self._metrics:
+            values = None
+            if merged is not None:
+                values = {tuple(key): value for key, value in merged[metric.name]}
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+class SharedMetrics:
+    """
+    One snapshot file per worker process in a shared directory.
+    Files of exited workers are folded into retired.json (their gauges dropped)
+    by the gunicorn master, so counts survive worker restarts.
+    """
+
+    RETIRED = 'retired.json'
+
+    def __init__(self, directory, registry=None, interval=WRITE_INTERVAL):
+        self.directory = directory
+        self.registry = registry or REGISTRY
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _write(self, path, snapshot):
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, path)
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write(self):
+        """Replace this process's file with its current values"""
+        with self._lock:
+            self._write(self._path(os.getpid()), self.registry.snapshot())
+
+    def start(self):
+        """Write this process's file every interval seconds on a daemon thread"""
+        # Threads don't survive a fork - each worker starts its own writer
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the writer and write the final values"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join()
+        self._thread = None
+        self._pid = None
+        self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                # Directory removed or disk full - keep counting, try again next interval
+                print(f"Metrics write failed: {e}")
+
+    def read_all(self):
+        return [self._read(path) for path in glob.glob(os.path.join(self.directory, '*.json'))]
+
+    def render(self):
+        """Metrics of every worker added up"""
+        self.write()
+        return self.registry.render(self.read_all())
+
+    def retire(self, pid):
+        """Fold an exited worker's counts into retired.json (call from one process only)"""
+        path = self._path(pid)
+        snapshot = self._read(path)
+        if not snapshot:
+            return
+        retired_path = os.path.join(self.directory, self.RETIRED)
+        # A gauge is the worker's current state (jobs in progress) - gone with the worker
+        retired = self.registry.merge([self._read(retired_path), snapshot], skip_types=('gauge',))
+        self._write(retired_path, retired)
+        os.remove(path)
+
+    def clear(self):
+        """Drop files left by an earlier run"""
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            os.remove(path)
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'lastkingz_http_requests_total', 'HTTP requests by route and status', ('method', 'endpoint', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'lastkingz_http_request_duration_seconds', 'HTTP request latency by route', ('endpoint',))
+CHECKOUT_STAGE = REGISTRY.histogram(
+    'lastkingz_checkout_stage_duration_seconds', 'Time spent in each checkout stage', ('stage',))
+SCAN_LOOKUP = REGISTRY.histogram(
+    'lastkingz_scan_lookup_duration_seconds', 'Product lookup latency by how the product was found', ('match',))
+CACHE_REQUESTS = REGISTRY.counter(
+    'lastkingz_cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+DB_LOCK_WAIT = REGISTRY.histogram(
+    'lastkingz_db_lock_wait_seconds', 'Time waiting for the SQLite write lock')
+DB_LOCK_TIMEOUTS = REGISTRY.counter(
+    'lastkingz_db_lock_timeouts_total', 'Write transactions that gave up waiting for the lock')
+PRINT_QUEUE_DEPTH = REGISTRY.gauge(
+    'lastkingz_print_queue_depth', 'Receipt print jobs in progress')
+RECEIPTS_PRINTED = REGISTRY.counter(
+    'lastkingz_receipts_printed_total', 'Receipt print jobs by result', ('result',))
+
+def record_cache(cache, hit):
+    """Count a cache hit or miss"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+class stage:
+    """
+    Time a block into a histogram and the current request's Server-Timing.
+
+        with metrics.stage('save_sale'):
+            db.save_sale(...)
+    """
+
+    def __init__(self, name, histogram=CHECKOUT_STAGE, **labels):
+        self.name = name
+        self.histogram = histogram
+        self.labels = labels or {'stage': name}
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed, **self.labels)
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+def server_timing_header(timings, total):
+    """Server-Timing header value from (name, seconds) pairs"""
+    parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in timings]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+def init_app(app, path='/metrics'):
+    """Record per-route metrics and Server-Timing, and serve the metrics endpoint"""
+    from flask import Response, request
+
+    token = os.environ.get('LASTKINGZ_METRICS_TOKEN')
+    directory = os.environ.get('LASTKINGZ_METRICS_DIR')
+    shared = SharedMetrics(directory) if directory else None
+    app.extensions['shared_metrics'] = shared
+
+    @app.before_request
+    def _start_request_metrics():
+        if shared is not None:
+            shared.start()
+        _local.started = time.perf_counter()
+        _local.timings = []
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = getattr(_local, 'started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+
+        HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        HTTP_LATENCY.observe(elapsed, endpoint=endpoint)
+        response.headers['Server-Timing'] = server_timing_header(_local.timings, elapsed)
+
+        _local.started = None
+        _local.timings = None
+        return response
+
+    @app.route(path)
+    def metrics():
+        if not token:
+            return Response("Set LASTKINGZ_METRICS_TOKEN to enable metrics\n", status=403, mimetype='text/plain')
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return Response("Unauthorized\n", status=401, mimetype='text/plain')
+        body = shared.render() if shared is not None else REGISTRY.render()
+        return Response(body, mimetype='text/plain; version=0.0.4')
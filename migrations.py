@@ -0,0 +1,591 @@
+"""
+Versioned schema migrations
+The schema version lives in PRAGMA user_version. Each migration below runs
+once, in order, in its own transaction that also bumps the version, and
+migrate() remembers databases it has brought up to date so every class that
+opens the same file in this process skips the check. A current database
+costs a single pragma read at startup.
+
+To change the schema, append a migration - never edit one that has shipped.
+Migrations 1-3 use IF NOT EXISTS and column checks because databases created
+before versioning already have some of these tables.
+
+Usage:
+    python migrations.py --db lastkings_pos.db
+"""
+
+import os
+import sys
+import threading
+from typing import Callable, List, Tuple
+from sql_profiler import connect
+
+def _columns(cursor, table: str) -> List[str]:
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+
+def _add_column(cursor, table: str, column: str, definition: str):
+    """Add a column unless the table already has it"""
+    if column not in _columns(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def create_base_tables(cursor):
+    # Products table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            barcode TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            stock INTEGER NOT NULL,
+            low_stock_threshold INTEGER DEFAULT 10,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Sales table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            total_amount REAL NOT NULL,
+            cash_received REAL NOT NULL,
+            change_given REAL NOT NULL,
+            sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            cashier_id INTEGER,
+            payment_method TEXT DEFAULT 'cash',
+            FOREIGN KEY (cashier_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Columns added after the first release
+    _add_column(cursor, 'sales', 'cashier_id', 'INTEGER')
+    _add_column(cursor, 'sales', 'payment_method', "TEXT DEFAULT 'cash'")
+
+    # Sale items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sale_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sale_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            barcode TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            FOREIGN KEY (sale_id) REFERENCES sales(id),
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+    ''')
+
+    # Users and login history
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS login_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            login_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    # Quick sale items (non-barcode items)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS quick_sale_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            category TEXT,
+            icon TEXT,
+            display_order INTEGER DEFAULT 0,
+            is_active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Terminal sales applied through /api/sync-sales
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS synced_sales (
+            client_sale_id TEXT PRIMARY KEY,
+            sale_id INTEGER,
+            status TEXT NOT NULL,
+            message TEXT,
+            conflicts TEXT,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (sale_id) REFERENCES sales(id)
+        )
+    """)
+
+def create_default_rows(cursor):
+    from user_auth import UserAuth
+
+    if cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+        cursor.executemany("""
+            INSERT INTO users (username, password_hash, full_name, role)
+            VALUES (?, ?, ?, ?)
+        """, [
+            ('manager', UserAuth.hash_password('manager123'), 'Store Manager', UserAuth.ROLE_MANAGER),
+            ('cashier', UserAuth.hash_password('cashier123'), 'Cashier', UserAuth.ROLE_CASHIER),
+        ])
+
+    if cursor.execute("SELECT COUNT(*) FROM quick_sale_items").fetchone()[0] == 0:
+        cursor.executemany("""
+            INSERT INTO quick_sale_items (name, price, category, icon, display_order)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            ('Ice Bag', 2.00, 'Supplies', '❄️', 1),
+            ('Plastic Cups', 0.50, 'Supplies', '🥤', 2),
+            ('Cigarettes', 8.00, 'Tobacco', '🚬', 3),
+            ('Lighter', 1.50, 'Tobacco', '🔥', 4),
+            ('Rolling Papers', 1.00, 'Tobacco', '📄', 5),
+            ('Plastic Bag', 0.25, 'Supplies', '🛍️', 6),
+            ('Energy Drink', 2.50, 'Drinks', '⚡', 7),
+            ('Water Bottle', 1.00, 'Drinks', '💧', 8),
+        ])
+
+def create_replication_and_archive_tables(cursor):
+    # Branch side: change log (see replication.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS replication_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            payload TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Central side: highest sequence applied per branch
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS replication_sources (
+            node_id TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0,
+            last_sync TIMESTAMP
+        )
+    """)
+
+    # Central side: branch row id -> local row id
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS replicated_rows (
+            node_id TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            source_id INTEGER NOT NULL,
+            local_id INTEGER NOT NULL,
+            PRIMARY KEY (node_id, table_name, source_id)
+        )
+    """)
+
+    # Central side: stock is per branch, the catalog is shared
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS branch_stock (
+            node_id TEXT NOT NULL,
+            barcode TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (node_id, barcode)
+        )
+    """)
+
+    # Which dates each yearly archive holds (see archive_manager.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sale_archives (
+            year TEXT PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            first_sale_date TEXT NOT NULL,
+            last_sale_date TEXT NOT NULL,
+            sales INTEGER NOT NULL DEFAULT 0,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def create_report_indexes(cursor):
+    # Sale details, item counts per sale and report joins
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON sale_items (sale_id)")
+    # Date range filters and "recent sales" ordering
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales (sale_date)")
+
+def create_sessions_table(cursor):
+    # Server-side web sessions shared by every worker (see session_store.py)
+    cursor.execute("""
+        CREATE TABLE sessions (
+            sid TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    # Expiry sweeps delete from the oldest end
+    cursor.execute("CREATE INDEX idx_sessions_expires_at ON sessions (expires_at)")
+
+def create_product_versions(cursor):
+    from replication import ReplicationManager, REPLICATED_COLUMNS
+
+    # Replication update triggers from before this version fire on any column, so
+    # would log the version bookkeeping below - recreate them limited to data columns
+    if cursor.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'replicate_products_update'
+    """).fetchone() is not None:
+        for table in REPLICATED_COLUMNS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS replicate_{table}_update")
+        ReplicationManager.create_triggers(cursor)
+
+    # Every product insert, edit and delete takes the next catalog version, so
+    # caches and terminals can ask for just what changed (Database.changes_since)
+    _add_column(cursor, 'products', 'updated_at', 'TIMESTAMP')
+    _add_column(cursor, 'products', 'row_version', 'INTEGER NOT NULL DEFAULT 0')
+    cursor.execute("""
+        CREATE TABLE catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT INTO catalog_version (id, version) VALUES (1, 1)")
+    cursor.execute("UPDATE products SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP), row_version = 1")
+    cursor.execute("CREATE INDEX idx_products_row_version ON products (row_version)")
+
+    # Deleted products, so incremental readers can drop them too
+    cursor.execute("""
+        CREATE TABLE product_tombstones (
+            product_id INTEGER PRIMARY KEY,
+            barcode TEXT NOT NULL,
+            row_version INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_product_tombstones_row_version ON product_tombstones (row_version)")
+
+    cursor.execute("""
+        CREATE TRIGGER products_version_insert AFTER INSERT ON products
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            UPDATE products SET updated_at = CURRENT_TIMESTAMP,
+                row_version = (SELECT version FROM catalog_version WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+    """)
+    # Only the catalog columns - the trigger's own update must not fire it again
+    cursor.execute("""
+        CREATE TRIGGER products_version_update
+        AFTER UPDATE OF barcode, name, price, stock, low_stock_threshold ON products
+        WHEN OLD.barcode IS NOT NEW.barcode OR OLD.name IS NOT NEW.name OR OLD.price IS NOT NEW.price
+            OR OLD.stock IS NOT NEW.stock OR OLD.low_stock_threshold IS NOT NEW.low_stock_threshold
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            UPDATE products SET updated_at = CURRENT_TIMESTAMP,
+                row_version = (SELECT version FROM catalog_version WHERE id = 1)
+            WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER products_version_delete AFTER DELETE ON products
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO product_tombstones (product_id, barcode, row_version)
+            VALUES (OLD.id, OLD.barcode, (SELECT version FROM catalog_version WHERE id = 1));
+        END
+    """)
+
+def create_product_daily_sales(cursor):
+    # Units and revenue per product per day (see sales_analytics.py)
+    cursor.execute("""
+        CREATE TABLE product_daily_sales (
+            barcode TEXT NOT NULL,
+            sale_day TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (barcode, sale_day)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX idx_product_daily_sales_day ON product_daily_sales (sale_day)")
+
+    # Kept current in the sale's own transaction - the sale row is inserted before its items
+    cursor.execute("""
+        CREATE TRIGGER sale_items_daily_sales_insert AFTER INSERT ON sale_items
+        BEGIN
+            INSERT INTO product_daily_sales (barcode, sale_day, product_name, quantity, revenue, sale_count)
+            SELECT NEW.barcode, date(sale_date), NEW.product_name, NEW.quantity, NEW.subtotal, 1
+            FROM sales WHERE id = NEW.sale_id
+            ON CONFLICT(barcode, sale_day) DO UPDATE SET
+                product_name = excluded.product_name,
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue,
+                sale_count = sale_count + 1;
+        END
+    """)
+    # Archiving moves sales out of this file, it doesn't unsell them
+    cursor.execute("""
+        CREATE TRIGGER sale_items_daily_sales_delete AFTER DELETE ON sale_items
+        WHEN (SELECT value FROM replication_state WHERE key = 'paused') IS NOT 'archive'
+        BEGIN
+            UPDATE product_daily_sales
+            SET quantity = quantity - OLD.quantity, revenue = revenue - OLD.subtotal,
+                sale_count = sale_count - 1
+            WHERE barcode = OLD.barcode
+              AND sale_day = (SELECT date(sale_date) FROM sales WHERE id = OLD.sale_id);
+        END
+    """)
+    # Filled from existing sales by key_daily_sales_by_product, in the layout it creates
+
+def create_reorder_tables(cursor):
+    # Latest suggestion per product (see reorder_planner.py)
+    cursor.execute("""
+        CREATE TABLE reorder_suggestions (
+            product_id INTEGER PRIMARY KEY,
+            barcode TEXT NOT NULL,
+            name TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            daily_demand REAL NOT NULL,
+            demand_std REAL NOT NULL,
+            safety_stock REAL NOT NULL,
+            reorder_point INTEGER NOT NULL,
+            order_quantity INTEGER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # The purchase order draft only reads lines to order
+    cursor.execute("""
+        CREATE INDEX idx_reorder_suggestions_to_order ON reorder_suggestions (name)
+        WHERE order_quantity > 0
+    """)
+
+    cursor.execute("""
+        CREATE TABLE reorder_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            products INTEGER NOT NULL,
+            to_order INTEGER NOT NULL,
+            window_start TEXT NOT NULL,
+            window_end TEXT NOT NULL,
+            lead_time_days REAL NOT NULL,
+            review_days REAL NOT NULL,
+            service_z REAL NOT NULL,
+            duration_seconds REAL
+        )
+    """)
+
+def create_sale_epoch(cursor):
+    # sale_date as integer seconds since 1970 (UTC), so time-bucket reports
+    # group with integer arithmetic over an index (see time_buckets.py)
+    _add_column(cursor, 'sales', 'sale_epoch', 'INTEGER')
+    cursor.execute("UPDATE sales SET sale_epoch = CAST(strftime('%s', sale_date) AS INTEGER)")
+    cursor.execute("CREATE INDEX idx_sales_sale_epoch ON sales (sale_epoch, total_amount)")
+
+    cursor.execute("""
+        CREATE TRIGGER sales_epoch_insert AFTER INSERT ON sales
+        WHEN NEW.sale_epoch IS NULL
+        BEGIN
+            UPDATE sales SET sale_epoch = CAST(strftime('%s', NEW.sale_date) AS INTEGER) WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER sales_epoch_update AFTER UPDATE OF sale_date ON sales
+        BEGIN
+            UPDATE sales SET sale_epoch = CAST(strftime('%s', NEW.sale_date) AS INTEGER) WHERE id = NEW.id;
+        END
+    """)
+
+def create_cashier_index(cursor):
+    # Each cashier's sales in time order for the shift report (see cashier_performance.py)
+    cursor.execute("CREATE INDEX idx_sales_cashier_epoch ON sales (cashier_id, sale_epoch, total_amount)")
+
+def create_case_codes(cursor):
+    # Barcodes printed on outer cases and how many units of which product each
+    # holds - the GTIN-14 indicator digit says nothing about pack size
+    cursor.execute("""
+        CREATE TABLE case_codes (
+            case_code TEXT PRIMARY KEY,
+            product_id INTEGER NOT NULL,
+            units INTEGER NOT NULL CHECK (units > 0),
+            FOREIGN KEY (product_id) REFERENCES products(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_case_codes_product_id ON case_codes (product_id)")
+    cursor.execute("""
+        CREATE TRIGGER products_delete_case_codes AFTER DELETE ON products
+        BEGIN
+            DELETE FROM case_codes WHERE product_id = OLD.id;
+        END
+    """)
+
+def key_daily_sales_by_product(cursor):
+    from barcode_decoder import decode_barcode
+    from sales_analytics import backfill_daily_sales
+
+    # product_daily_sales was keyed by the line's barcode, so every
+    # price-embedded label and case code counted as a product of its own
+    cursor.execute("DROP TRIGGER sale_items_daily_sales_insert")
+    cursor.execute("DROP TRIGGER sale_items_daily_sales_delete")
+    cursor.execute("DROP INDEX idx_product_daily_sales_day")
+    cursor.execute("ALTER TABLE product_daily_sales RENAME TO product_daily_sales_by_barcode")
+    cursor.execute("""
+        CREATE TABLE product_daily_sales (
+            product_id INTEGER NOT NULL,
+            sale_day TEXT NOT NULL,
+            barcode TEXT NOT NULL,
+            product_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (product_id, sale_day)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX idx_product_daily_sales_day ON product_daily_sales (sale_day)")
+
+    # Archived days can't be recounted - map their barcodes to products. Codes
+    # of products deleted since get a negative stand-in id each.
+    products = dict(cursor.execute("SELECT barcode, id FROM products").fetchall())
+    mapping = []
+    for (barcode,) in cursor.execute("""
+        SELECT DISTINCT barcode FROM product_daily_sales_by_barcode
+        WHERE sale_day <= (SELECT date(MAX(last_sale_date)) FROM sale_archives)
+    """).fetchall():
+        decoded = decode_barcode(barcode)
+        candidates = [barcode] + (decoded.lookup_codes if decoded else [])
+        product_id = next((products[c] for c in candidates if c in products), -(len(mapping) + 1))
+        mapping.append((barcode, product_id))
+    cursor.execute("CREATE TEMP TABLE daily_sales_products (barcode TEXT PRIMARY KEY, product_id INTEGER)")
+    cursor.executemany("INSERT INTO temp.daily_sales_products VALUES (?, ?)", mapping)
+    cursor.execute("""
+        INSERT INTO product_daily_sales (product_id, sale_day, barcode, product_name, quantity, revenue, sale_count)
+        SELECT m.product_id, d.sale_day, COALESCE(p.barcode, MAX(d.barcode)), MAX(d.product_name),
+               SUM(d.quantity), SUM(d.revenue), SUM(d.sale_count)
+        FROM product_daily_sales_by_barcode d
+        JOIN temp.daily_sales_products m ON m.barcode = d.barcode
+        LEFT JOIN products p ON p.id = m.product_id
+        GROUP BY m.product_id, d.sale_day
+    """)
+    cursor.execute("DROP TABLE temp.daily_sales_products")
+    cursor.execute("DROP TABLE product_daily_sales_by_barcode")
+
+    cursor.execute("""
+        CREATE TRIGGER sale_items_daily_sales_insert AFTER INSERT ON sale_items
+        BEGIN
+            INSERT INTO product_daily_sales (product_id, sale_day, barcode, product_name, quantity, revenue, sale_count)
+            SELECT NEW.product_id, date(sale_date),
+                   COALESCE((SELECT barcode FROM products WHERE id = NEW.product_id), NEW.barcode),
+                   NEW.product_name, NEW.quantity, NEW.subtotal, 1
+            FROM sales WHERE id = NEW.sale_id
+            ON CONFLICT(product_id, sale_day) DO UPDATE SET
+                barcode = excluded.barcode,
+                product_name = excluded.product_name,
+                quantity = quantity + excluded.quantity,
+                revenue = revenue + excluded.revenue,
+                sale_count = sale_count + 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER sale_items_daily_sales_delete AFTER DELETE ON sale_items
+        WHEN (SELECT value FROM replication_state WHERE key = 'paused') IS NOT 'archive'
+        BEGIN
+            UPDATE product_daily_sales
+            SET quantity = quantity - OLD.quantity, revenue = revenue - OLD.subtotal,
+                sale_count = sale_count - 1
+            WHERE product_id = OLD.product_id
+              AND sale_day = (SELECT date(sale_date) FROM sales WHERE id = OLD.sale_id);
+        END
+    """)
+
+    # Days still in this file are recounted from their sale items
+    backfill_daily_sales(cursor)
+
+# (version, description, step) - version n is the schema after step n has run
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Base tables", create_base_tables),
+    (2, "Default users and quick sale items", create_default_rows),
+    (3, "Replication and archive tables", create_replication_and_archive_tables),
+    (4, "Report indexes", create_report_indexes),
+    (5, "Web sessions", create_sessions_table),
+    (6, "Product change tracking", create_product_versions),
+    (7, "Product daily sales", create_product_daily_sales),
+    (8, "Reorder suggestions", create_reorder_tables),
+    (9, "Sale epoch seconds", create_sale_epoch),
+    (10, "Cashier sales index", create_cashier_index),
+    (11, "Case codes", create_case_codes),
+    (12, "Daily sales by product id", key_daily_sales_by_product),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_lock = threading.Lock()
+_current = {}   # abspath -> (st_dev, st_ino) of files already migrated in this process
+
+def _file_id(path: str):
+    try:
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino
+    except OSError:
+        return None
+
+def get_version(db_name: str) -> int:
+    conn = connect(db_name)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    return version
+
+def migrate(db_name: str) -> int:
+    """Bring db_name up to LATEST_VERSION. Returns the number of migrations applied."""
+    path = os.path.abspath(db_name)
+    # A file deleted and recreated under the same name needs migrating again
+    if _current.get(path) is not None and _current.get(path) == _file_id(path):
+        return 0
+
+    with _lock:
+        conn = connect(db_name)
+        cursor = conn.cursor()
+        applied = 0
+        try:
+            if cursor.execute("PRAGMA user_version").fetchone()[0] < LATEST_VERSION:
+                for version, description, step in MIGRATIONS:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    # Another process may have migrated while we waited for the lock
+                    if cursor.execute("PRAGMA user_version").fetchone()[0] >= version:
+                        conn.rollback()
+                        continue
+                    try:
+                        step(cursor)
+                        cursor.execute(f"PRAGMA user_version = {version}")
+                        conn.commit()
+                        applied += 1
+                    except Exception:
+                        conn.rollback()
+                        raise
+        finally:
+            conn.close()
+
+        _current[path] = _file_id(path)
+        return applied
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument('--db', default='lastkings_pos.db')
+    args = parser.parse_args(argv)
+
+    before = get_version(args.db)
+    applied = migrate(args.db)
+    print(f"{args.db}: schema version {before} -> {get_version(args.db)} ({applied} migrations applied)")
+    for version, description, _ in MIGRATIONS:
+        print(f"  {version}. {description}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,18 +2,22 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, font
 from datetime import datetime
 from database import Database
-from barcode_scanner import BarcodeScanner
+from barcode_scanner import BarcodeScanner, ScanResult
 from shopping_cart import ShoppingCart
 from receipt_printer import ReceiptPrinter
 from inventory_manager import InventoryManager
-from product_manager_ui import ProductManagerWindow
-from sales_report_ui import SalesReportWindow
 from user_auth import UserAuth
 from quick_sale import QuickSaleManager
+from task_executor import TaskExecutor
+from dashboard_stats import DashboardStatsProvider
+from reporting_snapshot import ReportingSnapshot
+from backup_service import BackupService
 
 class POSSystem:
     """Main POS System GUI for LastKings Liquor Store"""
 
+    BACKGROUND_START_DELAY_MS = 5000
+
     def __init__(self, root):
         self.root = root
         self.root.title("LastKings Liquor Store - POS System")
@@ -55,11 +59,26 @@ class POSSystem:
         self.auth = UserAuth()
         self.scanner = BarcodeScanner()
         self.cart = ShoppingCart()
+        self.cart.add_listener(self.on_cart_changed)
+        self.cart_tree = None
+        self.barcode_entry = None
         self.printer = None  # Will be initialized after UI setup
         self.inventory = InventoryManager(self.db)
         self.quick_sale = QuickSaleManager()
+        self.dashboard_stats = DashboardStatsProvider(self.db, self.inventory)
+        self.report_snapshot = ReportingSnapshot(self.db)
+        self.backup_service = BackupService(self.db)
         self.selected_printer = tk.StringVar()
 
+        # Database and printer work runs off the Tk thread
+        self.tasks = TaskExecutor(self.root, on_busy_change=self.update_busy_indicator)
+        self.busy_indicator = None
+        self.sale_in_progress = False
+        self.sale_failed = False        # The cart of a sale that failed to save is still showing
+        self.scan_lookup_active = False
+        self.dashboard_refresh_task = None
+        self.dashboard_refresh_id = None
+
         # User session
         self.current_user = None
 
@@ -76,6 +95,14 @@ class POSSystem:
         # Show login first
         self.show_login()
 
+        # Backups and report snapshots wait until the login screen is up
+        self.root.after(self.BACKGROUND_START_DELAY_MS, self.start_background_services)
+
+    def start_background_services(self):
+        """Start the backup and report snapshot threads"""
+        self.report_snapshot.start()
+        self.backup_service.start()
+
     def show_login(self):
         """Show login screen - Modern UI inspired by PyQt6 design"""
         # Create login window
@@ -338,11 +365,15 @@ class POSSystem:
         self.setup_menu()
         self.setup_main_container()
         self.show_dashboard()
+        self.schedule_dashboard_refresh()
 
         # Initialize printer with selected or default printer
         self.initialize_printer()
 
-        # Bind barcode scanner
+        # Bind barcode scanner - every key is timed so scanner bursts can be told from typing.
+        # Bound on the window so a scan lands even when the cart or a button has focus;
+        # keys typed into other fields are left alone (see typing_elsewhere).
+        self.root.bind('<Key>', self.on_key_input)
         self.root.bind('<Return>', self.on_barcode_scan)
 
     def setup_styles(self):
@@ -520,6 +551,15 @@ class POSSystem:
                                       anchor=tk.E)
         self.printer_status.pack(side=tk.RIGHT, padx=16)
 
+        # Background work indicator
+        self.busy_indicator = tk.Label(status_frame,
+                                       text="",
+                                       bg=self.colors['white'],
+                                       fg=self.colors['info'],
+                                       font=("Inter", 9),
+                                       anchor=tk.E)
+        self.busy_indicator.pack(side=tk.RIGHT, padx=8)
+
     def show_dashboard(self):
         """Show dashboard view"""
         self.current_view = "dashboard"
@@ -554,9 +594,21 @@ class POSSystem:
         main_frame = tk.Frame(self.content_frame, bg=self.colors['light'])
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
-        # Get statistics
-        stats = self.get_dashboard_stats()
+        # Show the cached stats straight away, fresher ones re-render when loaded
+        stats = self.dashboard_stats.get_stats()
+        if stats:
+            self.render_dashboard(main_frame, stats)
+        else:
+            tk.Label(main_frame, text="Loading dashboard...",
+                    font=("Segoe UI", 12),
+                    bg=self.colors['light'],
+                    fg=self.colors['text_light']).pack(pady=40)
+
+        if self.dashboard_stats.is_stale():
+            self.refresh_dashboard_stats()
 
+    def render_dashboard(self, main_frame, stats):
+        """Build dashboard cards and lists from loaded statistics"""
         # Top row - Statistics cards
         stats_frame = tk.Frame(main_frame, bg=self.colors['light'])
         stats_frame.pack(fill=tk.X, pady=(0, 20))
@@ -713,58 +765,30 @@ class POSSystem:
                 bg=color,
                 fg=self.colors['white']).pack(pady=(0, 20), padx=20, anchor=tk.W)
 
-    def get_dashboard_stats(self):
-        """Get statistics for dashboard"""
-        from datetime import datetime, timedelta
-
-        today = datetime.now().date()
-        week_ago = today - timedelta(days=7)
-
-        # Get sales data
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-
-        # Today's sales
-        cursor.execute("""
-            SELECT COUNT(*), COALESCE(SUM(total_amount), 0)
-            FROM sales
-            WHERE DATE(sale_date) = ?
-        """, (today,))
-        today_trans, today_sales = cursor.fetchone()
-
-        # Week's sales
-        cursor.execute("""
-            SELECT COUNT(*), COALESCE(SUM(total_amount), 0)
-            FROM sales
-            WHERE DATE(sale_date) >= ?
-        """, (week_ago,))
-        week_trans, week_sales = cursor.fetchone()
-
-        # Recent sales
-        cursor.execute("""
-            SELECT id, sale_date, total_amount,
-                   (SELECT COUNT(*) FROM sale_items WHERE sale_id = sales.id) as items_count
-            FROM sales
-            ORDER BY sale_date DESC
-            LIMIT 10
-        """)
-        recent_sales = [{'id': r[0], 'date': r[1], 'total': r[2], 'items_count': r[3]}
-                       for r in cursor.fetchall()]
-
-        # Inventory stats
-        report = self.inventory.get_inventory_report()
+    def refresh_dashboard_stats(self):
+        """Recompute dashboard stats in the background"""
+        if self.dashboard_refresh_task and not self.dashboard_refresh_task.done():
+            return
+        self.dashboard_refresh_task = self.tasks.submit(self.dashboard_stats.refresh,
+                                                        on_success=self.on_dashboard_stats)
 
-        return {
-            'today_sales': today_sales or 0,
-            'today_transactions': today_trans or 0,
-            'week_sales': week_sales or 0,
-            'week_transactions': week_trans or 0,
-            'total_products': report['total_products'],
-            'low_stock_count': report['low_stock_count'],
-            'inventory_value': report['total_inventory_value'],
-            'low_stock_items': report['low_stock_items'],
-            'recent_sales': recent_sales
-        }
+    def on_dashboard_stats(self, stats):
+        """Redraw the dashboard if it is showing when new stats arrive"""
+        if self.current_user and self.current_view == "dashboard" and self.content_frame.winfo_exists():
+            for widget in self.content_frame.winfo_children():
+                widget.destroy()
+            self.setup_dashboard()
+
+    def schedule_dashboard_refresh(self):
+        """Refresh dashboard stats every refresh_interval seconds while logged in"""
+        def tick():
+            self.dashboard_refresh_id = None
+            if self.current_user:
+                if self.dashboard_stats.is_stale():
+                    self.refresh_dashboard_stats()
+                self.schedule_dashboard_refresh()
+
+        self.dashboard_refresh_id = self.root.after(self.dashboard_stats.refresh_interval * 1000, tick)
 
     def setup_pos_ui(self):
         """Setup modern POS terminal interface with dashboard-style layout"""
@@ -813,6 +837,7 @@ class POSSystem:
         scrollbar = ttk.Scrollbar(cart_frame, orient=tk.VERTICAL, command=self.cart_tree.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.cart_tree.config(yscrollcommand=scrollbar.set)
+        self.update_cart_display()
 
         # Cart Buttons (Modern outlined style)
         button_frame = tk.Frame(cart_card, bg=self.colors['card'])
@@ -976,6 +1001,7 @@ class POSSystem:
                                 highlightcolor=self.colors['primary'])
         barcode_entry.pack(padx=16, pady=(0, 12), ipady=8)
         barcode_entry.focus()
+        self.barcode_entry = barcode_entry
 
         # Modern Add to Cart button with icon
         add_btn = tk.Button(scanner_card, text="🛒  Add to Cart",
@@ -1221,77 +1247,195 @@ class POSSystem:
         darkened = tuple(int(c * factor) for c in rgb)
         return '#%02x%02x%02x' % darkened
 
+    def typing_elsewhere(self, event):
+        """True for keys typed into an entry other than the barcode field (cash received, dialogs)"""
+        return isinstance(event.widget, tk.Entry) and event.widget is not self.barcode_entry
+
+    def on_key_input(self, event):
+        """Feed keystrokes to the scanner engine with their event times"""
+        if self.typing_elsewhere(event):
+            return
+        if self.current_user and event.char and event.char != '\r':
+            self.scanner.process_input(event.char, event.time / 1000.0)
+
     def on_barcode_scan(self, event):
         """Handle barcode scan (Enter key press)"""
-        self.add_to_cart()
+        if not self.current_user or self.typing_elsewhere(event):
+            return
+
+        self.scanner.process_input('\r', event.time / 1000.0)
+        last = self.scanner.scans[-1] if self.scanner.scans else None
+        if last is not None and not last.from_scanner:
+            # Typed by hand - the barcode field holds what was meant, not every key pressed
+            self.scanner.scans.pop()
+            typed = self.barcode_var.get().strip()
+            if typed:
+                self.scanner.scans.append(ScanResult(typed, False, last.started, last.finished))
+        elif last is not None and self.barcode_var.get().strip().endswith(last.code):
+            self.barcode_var.set("")
+
+        self.process_next_scan()
+
+    def process_next_scan(self):
+        """Look up queued scans one at a time so they reach the cart in scan order.
+        Scans made while a sale is saving wait in the queue until it is saved, or until
+        the cart of a failed sale has been saved on retry or cleared."""
+        if self.scan_lookup_active or self.sale_in_progress:
+            return
+        if self.sale_failed:
+            if self.scanner.scans:
+                self.status_bar.config(text="Scans held - complete or clear the failed sale first")
+            return
+
+        scan = self.scanner.get_next_scan()
+        while scan is not None:
+            if self.add_to_cart(scan.code, on_done=self.on_scan_lookup_done, strict=scan.from_scanner):
+                self.scan_lookup_active = True
+                return
+            scan = self.scanner.get_next_scan()
+
+    def on_scan_lookup_done(self):
+        self.scan_lookup_active = False
+        self.process_next_scan()
 
     def quick_add_item(self, item):
         """Add quick sale item to cart"""
         # Create a product-like dictionary for cart
         quick_product = {
-            'product_id': f"quick_{item['id']}",
+            'id': f"quick_{item['id']}",
             'name': item['name'],
             'price': item['price'],
             'stock': 999,  # Quick sale items don't track stock
             'barcode': f"QUICK{item['id']}"
         }
 
+        if self.sale_in_progress:
+            self.status_bar.config(text="Saving previous sale - try again in a moment")
+            return
+
         # Add to cart
         self.cart.add_item(quick_product)
-        self.update_cart_display()
         self.status_bar.config(text=f"Added: {item['name']} - ${item['price']:.2f}")
 
-    def add_to_cart(self):
-        """Add scanned product to cart"""
-        barcode = self.barcode_var.get().strip()
+    def add_to_cart(self, barcode=None, on_done=None, strict=False):
+        """
+        Add scanned product to cart (barcode defaults to the barcode field).
+        Scanner reads are checked strictly (check digit); typed codes only for shape.
+        Returns True if a product lookup was started; on_done runs when it finishes.
+        """
+        if barcode is None:
+            barcode = self.barcode_var.get().strip()
 
         if not barcode:
-            return
+            return False
 
-        # Validate barcode
-        if not self.scanner.validate_barcode(barcode):
+        # Validate barcode - bad reads never reach the database
+        if not self.scanner.validate_barcode(barcode, strict=strict):
             messagebox.showerror("Invalid Barcode", "Please scan a valid barcode")
             self.barcode_var.set("")
-            return
+            return False
 
-        # Get product from database
-        product = self.db.get_product_by_barcode(barcode)
+        if self.sale_in_progress:
+            self.status_bar.config(text="Saving previous sale - scan again in a moment")
+            return False
 
+        # Look up product off the Tk thread so the scanner field stays live
+        self.barcode_var.set("")
+
+        def on_success(found):
+            try:
+                self.on_product_found(barcode, *found)
+            finally:
+                if on_done:
+                    on_done()
+
+        def on_error(error):
+            if on_done:
+                on_done()
+            self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+        self.tasks.submit(self.db.find_scanned_product, barcode,
+                          on_success=on_success, on_error=on_error)
+        return True
+
+    def on_product_found(self, barcode, product, decoded=None):
+        """Add a looked-up product to the cart (decoded carries case size or embedded price)"""
         if not product:
             messagebox.showerror("Product Not Found", f"No product found with barcode: {barcode}")
-            self.barcode_var.set("")
             return
 
+        quantity = 1
+        if decoded is not None:
+            if decoded.quantity is None:
+                messagebox.showerror("Unknown Case Size",
+                                     f"No units-per-case set for case code {barcode}")
+                return
+            quantity = decoded.quantity
+            if decoded.price is not None:
+                # Each price-embedded label is its own line at its own price
+                product = dict(product, price=decoded.price, line_id=f"{product['id']}:{barcode}")
+
         # Check stock
         if product['stock'] <= 0:
             messagebox.showerror("Out of Stock", f"{product['name']} is out of stock!")
-            self.barcode_var.set("")
             return
 
-        # Add to cart
-        self.cart.add_item(product)
-        self.update_cart_display()
-        self.barcode_var.set("")
-        self.status_bar.config(text=f"Added: {product['name']}")
+        # Add to cart - a case scan adds all its units in one step
+        self.cart.add_item(product, quantity)
+        if quantity > 1:
+            self.status_bar.config(text=f"Added: {product['name']} x{quantity}")
+        else:
+            self.status_bar.config(text=f"Added: {product['name']}")
+
+    def cart_row_values(self, item):
+        """Column values for one cart line"""
+        return (
+            item['name'],
+            item['quantity'],
+            f"${item['price']:.2f}",
+            f"${item['subtotal']:.2f}"
+        )
 
     def update_cart_display(self):
-        """Update cart tree view"""
+        """Rebuild cart tree view from the cart (used when the view is created)"""
         # Clear tree
         for item in self.cart_tree.get_children():
             self.cart_tree.delete(item)
 
         # Add items
-        for item in self.cart.get_items():
-            self.cart_tree.insert("", tk.END, values=(
-                item['name'],
-                item['quantity'],
-                f"${item['price']:.2f}",
-                f"${item['subtotal']:.2f}"
-            ), tags=(item['product_id'],))
+        for item in self.cart.items:
+            self.cart_tree.insert("", tk.END, iid=str(item['line_id']),
+                                  values=self.cart_row_values(item), tags=(item['line_id'],))
 
         # Update total
-        total = self.cart.get_total()
-        self.total_var.set(f"${total:.2f}")
+        self.total_var.set(f"${self.cart.get_total():.2f}")
+
+    def on_cart_changed(self, event, item):
+        """Apply a single cart line change to the tree view"""
+        # The failed sale's cart is gone - let the scans held behind it through
+        if self.sale_failed and self.cart.is_empty():
+            self.sale_failed = False
+            self.process_next_scan()
+
+        if self.cart_tree is None or not self.cart_tree.winfo_exists():
+            return
+
+        if event == ShoppingCart.CLEARED:
+            self.cart_tree.delete(*self.cart_tree.get_children())
+        else:
+            row_id = str(item['line_id'])
+            if event == ShoppingCart.ITEM_ADDED:
+                self.cart_tree.insert("", tk.END, iid=row_id,
+                                      values=self.cart_row_values(item), tags=(item['line_id'],))
+                self.cart_tree.see(row_id)
+            elif event == ShoppingCart.ITEM_UPDATED:
+                self.cart_tree.item(row_id, values=self.cart_row_values(item))
+                self.cart_tree.see(row_id)
+            elif event == ShoppingCart.ITEM_REMOVED:
+                self.cart_tree.delete(row_id)
+
+        # Update total from the cart's running value
+        self.total_var.set(f"${self.cart.get_total():.2f}")
 
     def remove_item(self):
         """Remove selected item from cart"""
@@ -1301,9 +1445,8 @@ class POSSystem:
             return
 
         item = self.cart_tree.item(selection[0])
-        product_id = item['tags'][0]
-        self.cart.remove_item(product_id)
-        self.update_cart_display()
+        line_id = item['tags'][0]
+        self.cart.remove_item(line_id)
         self.status_bar.config(text="Item removed")
 
     def clear_cart(self):
@@ -1313,7 +1456,6 @@ class POSSystem:
 
         if messagebox.askyesno("Clear Cart", "Are you sure you want to clear the cart?"):
             self.cart.clear()
-            self.update_cart_display()
             self.cash_var.set("")
             self.change_var.set("$0.00")
             self.status_bar.config(text="Cart cleared")
@@ -1330,6 +1472,9 @@ class POSSystem:
 
     def complete_sale(self):
         """Complete the sale transaction"""
+        if self.sale_in_progress:
+            return
+
         if self.cart.is_empty():
             messagebox.showwarning("Empty Cart", "Please add items to cart")
             return
@@ -1348,14 +1493,8 @@ class POSSystem:
 
         change = cash_received - total
 
-        # Process inventory updates
-        result = self.inventory.process_sale(self.cart.get_items())
-
-        if not result['success']:
-            messagebox.showerror("Sale Failed", f"Failed to update stock for: {', '.join(result['failed_items'])}")
-            return
-
-        # Save sale to database
+        # Snapshot the lines so later scans can't change what is being saved
+        items = [dict(item) for item in self.cart.get_items()]
         sale_data = {
             'total': total,
             'cash_received': cash_received,
@@ -1363,29 +1502,81 @@ class POSSystem:
             'date': datetime.now()
         }
 
-        sale_id = self.db.save_sale(self.cart.get_items(), total, cash_received, change)
+        self.sale_in_progress = True
+        self.status_bar.config(text="Saving sale...")
+        self.tasks.submit(self.save_sale, items, total, cash_received, change, serial=True,
+                          on_success=lambda outcome: self.on_sale_saved(outcome, sale_data, items),
+                          on_error=self.on_sale_error)
+
+    def save_sale(self, items, total, cash_received, change):
+        """Worker: update stock and record the sale"""
+        # Process inventory updates
+        result = self.inventory.process_sale(items)
+        if not result['success']:
+            return result, None
 
-        # Print receipt
-        print_success = self.printer.print_receipt(sale_data, self.cart.get_items())
+        # Save sale to database
+        sale_id = self.db.save_sale(items, total, cash_received, change)
+        return result, sale_id
+
+    def on_sale_saved(self, outcome, sale_data, items):
+        """Finish the checkout on the Tk thread and print in the background"""
+        self.sale_in_progress = False
+        result, sale_id = outcome
+
+        if not result['success']:
+            self.sale_failed = True
+            messagebox.showerror("Sale Failed", f"Failed to update stock for: {', '.join(result['failed_items'])}")
+            self.status_bar.config(text="Sale failed")
+            return
+
+        # Print receipt - queued behind any earlier receipts, the next sale can start meanwhile
+        self.status_bar.config(text=f"Sale #{sale_id} completed - Printing receipt...")
+        self.tasks.submit(self.printer.print_receipt, sale_data, items, serial=True,
+                          on_success=lambda printed: self.on_receipt_printed(sale_id, printed),
+                          on_error=lambda e: self.on_receipt_printed(sale_id, False))
+
+        # Sales and stock changed - update dashboard numbers in the background
+        self.dashboard_stats.invalidate()
+        self.refresh_dashboard_stats()
 
         # Display alerts
         if result['low_stock_alerts']:
             self.display_alerts(result['low_stock_alerts'])
 
-        # Clear cart
+        # Clear cart, then start the next one with anything scanned while saving
+        self.sale_failed = False
         self.cart.clear()
-        self.update_cart_display()
         self.cash_var.set("")
         self.change_var.set("$0.00")
+        self.process_next_scan()
 
         # Show completion message
-        receipt_msg = "\nReceipt printed successfully!" if print_success else "\nReceipt saved to file (printer unavailable)"
         messagebox.showinfo("Sale Complete",
                           f"Sale #{sale_id} completed successfully!\n\n"
-                          f"Change: ${change:.2f}"
-                          f"{receipt_msg}\n\n"
+                          f"Change: ${sale_data['change']:.2f}\n\n"
+                          f"Receipt is printing.\n"
                           f"Cash drawer opened.")
-        self.status_bar.config(text=f"Sale #{sale_id} completed - Receipt printed")
+
+    def on_sale_error(self, error):
+        """Report a sale that could not be saved - the cart is kept for a retry"""
+        self.sale_in_progress = False
+        self.sale_failed = True
+        messagebox.showerror("Sale Failed", f"Could not save sale:\n{error}")
+        self.status_bar.config(text="Sale failed - cart kept")
+
+    def on_receipt_printed(self, sale_id, printed):
+        """Show the receipt outcome once the printer job finishes"""
+        if printed:
+            self.status_bar.config(text=f"Sale #{sale_id} completed - Receipt printed")
+        else:
+            self.status_bar.config(text=f"Sale #{sale_id} completed - Receipt saved to file (printer unavailable)")
+
+    def update_busy_indicator(self, pending):
+        """Show how many background tasks are still running"""
+        if self.busy_indicator is None or not self.busy_indicator.winfo_exists():
+            return
+        self.busy_indicator.config(text=f"⏳ Working ({pending})" if pending else "")
 
     def display_alerts(self, alerts):
         """Display low stock alerts"""
@@ -1401,11 +1592,13 @@ class POSSystem:
 
     def open_product_manager(self):
         """Open product management window"""
+        from product_manager_ui import ProductManagerWindow
         ProductManagerWindow(self.root, self.db)
 
     def open_sales_reports(self):
         """Open sales reports window"""
-        SalesReportWindow(self.root, self.db)
+        from sales_report_ui import SalesReportWindow
+        SalesReportWindow(self.root, self.db, self.report_snapshot)
 
     def view_inventory_report(self):
         """Show inventory report"""
@@ -1428,8 +1621,16 @@ class POSSystem:
     def logout(self):
         """Logout current user"""
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
-            # Clear current user
+            # Clear current user and drop their pending work
             self.current_user = None
+            self.tasks.cancel_all()
+            self.scanner.clear_buffer()
+            self.sale_in_progress = False
+            self.sale_failed = False
+            self.scan_lookup_active = False
+            if self.dashboard_refresh_id:
+                self.root.after_cancel(self.dashboard_refresh_id)
+                self.dashboard_refresh_id = None
 
             # Destroy all widgets
             for widget in self.root.winfo_children():
@@ -1540,30 +1741,38 @@ Developed 2025"""
 
     def initialize_printer(self):
         """Initialize printer with selected or default printer"""
+        # Save receipts to file until printer discovery finishes
+        self.selected_printer.set("Not Connected")
+        self.printer = ReceiptPrinter()
+        self.update_printer_status()
+
+        def on_found(printer_name):
+            if printer_name:
+                self.selected_printer.set(printer_name)
+                self.printer = ReceiptPrinter(printer_name=printer_name)
+            self.update_printer_status()
+
+        self.tasks.submit(self.find_receipt_printer, serial=True,
+                          on_success=on_found, on_error=lambda e: on_found(None))
+
+    @staticmethod
+    def list_printers():
+        """Worker: names of installed printers (raises if win32print is unavailable)"""
+        import win32print
+        return [p[2] for p in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)]
+
+    @classmethod
+    def find_receipt_printer(cls):
+        """Worker: X Printer if installed, else the default printer, else None"""
         try:
             import win32print
-            # Check if X Printer is available
-            printers = [p[2] for p in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)]
-
             # Look for X Printer variants
-            xprinter_name = None
-            for p in printers:
+            for p in cls.list_printers():
                 if 'xprinter' in p.lower() or 'x printer' in p.lower() or 'xp' in p.lower():
-                    xprinter_name = p
-                    break
-
-            if xprinter_name:
-                self.selected_printer.set(xprinter_name)
-                self.printer = ReceiptPrinter(printer_name=xprinter_name)
-            else:
-                default_printer = win32print.GetDefaultPrinter()
-                self.selected_printer.set(default_printer)
-                self.printer = ReceiptPrinter(printer_name=default_printer)
+                    return p
+            return win32print.GetDefaultPrinter()
         except:
-            self.selected_printer.set("Not Connected")
-            self.printer = ReceiptPrinter()
-
-        self.update_printer_status()
+            return None
 
     def update_printer_status(self):
         """Update printer status indicator"""
@@ -1598,10 +1807,13 @@ Developed 2025"""
 
     def select_printer(self):
         """Open dialog to select printer"""
-        try:
-            import win32print
-            printers = [p[2] for p in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)]
+        self.tasks.submit(self.list_printers, serial=True,
+                          on_success=self.show_printer_dialog,
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to list printers:\n{str(e)}"))
 
+    def show_printer_dialog(self, printers):
+        """Printer selection dialog for the enumerated printers"""
+        try:
             if not printers:
                 messagebox.showwarning("No Printers", "No printers found. Please install printer drivers.")
                 return
@@ -1645,27 +1857,30 @@ Developed 2025"""
     def check_printer_status(self):
         """Check and display printer status"""
         self.update_printer_status()
-
-        try:
-            import win32print
-            printers = win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)
-            current_printer = self.selected_printer.get()
-
-            msg = "PRINTER STATUS\n\n"
-            msg += f"Current Printer: {current_printer}\n\n"
-            msg += f"Available Printers ({len(printers)}):\n"
-            for printer_info in printers:
-                msg += f"  • {printer_info[2]}\n"
-
-            messagebox.showinfo("Printer Status", msg)
-        except Exception as e:
-            messagebox.showwarning("Printer Status",
-                                  f"No printer detected.\n\n"
-                                  f"Receipts will be saved as text files.\n\n"
-                                  f"To use a physical printer:\n"
-                                  f"1. Install printer drivers\n"
-                                  f"2. Set printer as default in Windows\n"
-                                  f"3. Install: pip install pywin32")
+        self.tasks.submit(self.list_printers, serial=True,
+                          on_success=self.show_printer_status, on_error=self.show_no_printer)
+
+    def show_printer_status(self, printers):
+        """Display the current and available printers"""
+        current_printer = self.selected_printer.get()
+
+        msg = "PRINTER STATUS\n\n"
+        msg += f"Current Printer: {current_printer}\n\n"
+        msg += f"Available Printers ({len(printers)}):\n"
+        for printer_name in printers:
+            msg += f"  • {printer_name}\n"
+
+        messagebox.showinfo("Printer Status", msg)
+
+    def show_no_printer(self, error=None):
+        """Explain the save-to-file fallback when no printer is available"""
+        messagebox.showwarning("Printer Status",
+                              f"No printer detected.\n\n"
+                              f"Receipts will be saved as text files.\n\n"
+                              f"To use a physical printer:\n"
+                              f"1. Install printer drivers\n"
+                              f"2. Set printer as default in Windows\n"
+                              f"3. Install: pip install pywin32")
 
     def print_test_receipt(self):
         """Print a test receipt"""
@@ -1673,13 +1888,16 @@ Developed 2025"""
                                      "Print a test receipt?\n\n"
                                      "This will test your printer connection.")
         if result:
-            success = self.printer.print_test_receipt()
-            if success:
-                messagebox.showinfo("Success",
-                                  "Test receipt sent to printer!\n\n"
-                                  "Check your printer or the receipt_*.txt file.")
-            else:
-                messagebox.showerror("Error", "Failed to print test receipt")
+            def on_printed(success):
+                if success:
+                    messagebox.showinfo("Success",
+                                      "Test receipt sent to printer!\n\n"
+                                      "Check your printer or the receipt_*.txt file.")
+                else:
+                    messagebox.showerror("Error", "Failed to print test receipt")
+
+            self.tasks.submit(self.printer.print_test_receipt, serial=True,
+                              on_success=on_printed, on_error=lambda e: on_printed(False))
 
     def open_cash_drawer_manual(self):
         """Manually open cash drawer"""
@@ -1687,11 +1905,14 @@ Developed 2025"""
                                      "Open the cash drawer?\n\n"
                                      "This requires a cash drawer connected to the printer.")
         if result:
-            success = self.printer.open_cash_drawer()
-            if success:
-                messagebox.showinfo("Success", "Cash drawer command sent!")
-            else:
-                messagebox.showwarning("Warning", "Cash drawer command failed")
+            def on_sent(success):
+                if success:
+                    messagebox.showinfo("Success", "Cash drawer command sent!")
+                else:
+                    messagebox.showwarning("Warning", "Cash drawer command failed")
+
+            self.tasks.submit(self.printer.open_cash_drawer, serial=True,
+                              on_success=on_sent, on_error=lambda e: on_sent(False))
 
     def manage_quick_sale_items(self):
         """Manage quick sale items (Manager only)"""
@@ -1849,6 +2070,9 @@ def main():
     root = tk.Tk()
     app = POSSystem(root)
     root.mainloop()
+    app.tasks.shutdown()
+    app.report_snapshot.stop()
+    app.backup_service.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+"""
+In-memory product search index for the desktop product manager
+Holds the catalog sorted by name and filters it by name/barcode text and
+low stock without going back to the database. Narrowing a search (typing
+more characters) filters the previous result instead of the whole catalog,
+and single products can be added, updated or removed in place after edits.
+"""
+
+import bisect
+from typing import Dict, List, Optional
+
+class ProductIndex:
+    """Sorted, filterable copy of the product catalog"""
+
+    def __init__(self, products: List[Dict] = None):
+        self.load(products or [])
+
+    def load(self, products: List[Dict]):
+        """Replace the index contents"""
+        self._products = {p['id']: p for p in products}
+        self._keys = sorted(self._sort_key(p) for p in products)
+        self._search_text = {p['id']: self._text(p) for p in products}
+        self._last_query = None     # (text, low_stock_only, ids) of the previous filter
+
+    @staticmethod
+    def _sort_key(product: Dict):
+        return (product['name'].lower(), product['id'])
+
+    @staticmethod
+    def _text(product: Dict) -> str:
+        return f"{product['name'].lower()}\n{product['barcode']}"
+
+    @staticmethod
+    def is_low_stock(product: Dict) -> bool:
+        return product['stock'] <= product['low_stock_threshold']
+
+    def __len__(self):
+        return len(self._products)
+
+    def get(self, product_id) -> Optional[Dict]:
+        return self._products.get(product_id)
+
+    def upsert(self, product: Dict):
+        """Add a product or replace its previous version, keeping name order"""
+        old = self._products.get(product['id'])
+        if old is not None:
+            del self._keys[bisect.bisect_left(self._keys, self._sort_key(old))]
+
+        self._products[product['id']] = product
+        self._search_text[product['id']] = self._text(product)
+        bisect.insort(self._keys, self._sort_key(product))
+        self._last_query = None
+
+    def remove(self, product_id):
+        """Drop a product from the index"""
+        old = self._products.pop(product_id, None)
+        if old is None:
+            return
+        del self._search_text[product_id]
+        del self._keys[bisect.bisect_left(self._keys, self._sort_key(old))]
+        self._last_query = None
+
+    def matches(self, product: Dict, text: str = "", low_stock_only: bool = False) -> bool:
+        """Whether a single product passes the filter"""
+        if low_stock_only and not self.is_low_stock(product):
+            return False
+        return text.strip().lower() in self._search_text.get(product['id'], self._text(product))
+
+    def filter(self, text: str = "", low_stock_only: bool = False) -> List:
+        """Ids of products whose name or barcode contains text, in name order"""
+        text = text.strip().lower()
+
+        # Narrowing the previous query only needs to look at its results
+        candidates = None
+        if self._last_query is not None:
+            last_text, last_low_stock_only, last_ids = self._last_query
+            if text.startswith(last_text) and (low_stock_only or not last_low_stock_only):
+                candidates = last_ids
+        if candidates is None:
+            candidates = [key[1] for key in self._keys]
+
+        ids = [product_id for product_id in candidates
+               if text in self._search_text[product_id]
+               and (not low_stock_only or self.is_low_stock(self._products[product_id]))]
+
+        self._last_query = (text, low_stock_only, ids)
+        return ids
+
+    def position(self, product_id, ids: List) -> int:
+        """Where product_id belongs in a name-ordered id list"""
+        key = self._sort_key(self._products[product_id])
+        low, high = 0, len(ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self._sort_key(self._products[ids[middle]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
@@ -1,16 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from database import Database
+from product_index import ProductIndex
 
 class ProductManagerWindow:
     """Product Management Interface"""
 
+    PAGE_SIZE = 200             # Rows inserted into the table per page
+    SEARCH_DELAY_MS = 150       # Wait for typing to pause before filtering
+
     def __init__(self, parent, db: Database):
         self.window = tk.Toplevel(parent)
         self.window.title("Product Management")
         self.window.geometry("900x600")
         self.db = db
 
+        self.index = ProductIndex()
+        self.filtered_ids = []      # Products matching the current filter, in name order
+        self.loaded_count = 0       # How many of them are in the table so far
+        self.search_var = tk.StringVar()
+        self.low_stock_var = tk.BooleanVar(value=False)
+        self.search_after_id = None
+
         self.setup_ui()
         self.load_products()
 
@@ -35,6 +46,14 @@ class ProductManagerWindow:
         tk.Button(toolbar, text="Refresh", command=self.load_products,
                  bg="#95a5a6", fg="white", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
 
+        # Search and filter
+        tk.Checkbutton(toolbar, text="Low stock only", variable=self.low_stock_var,
+                      command=self.apply_filter, font=("Arial", 10)).pack(side=tk.RIGHT, padx=5)
+        search_entry = tk.Entry(toolbar, textvariable=self.search_var, font=("Arial", 10), width=25)
+        search_entry.pack(side=tk.RIGHT, padx=5)
+        tk.Label(toolbar, text="Search:", font=("Arial", 10)).pack(side=tk.RIGHT)
+        self.search_var.trace('w', self.schedule_filter)
+
         # Products Table
         table_frame = tk.Frame(self.window)
         table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -58,43 +77,120 @@ class ProductManagerWindow:
         self.tree.column("Stock", width=80)
         self.tree.column("Low Stock Alert", width=120)
 
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.config(yscrollcommand=scrollbar.set)
+        # Scrollbar - reaching the end of the loaded rows pulls in the next page
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.config(yscrollcommand=self.on_tree_scroll)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+        # Configure tags
+        self.tree.tag_configure("low_stock", background="#ffcccc")
+
         # Double-click to edit
         self.tree.bind("<Double-1>", lambda e: self.edit_product())
 
+        # Result count
+        self.count_label = tk.Label(self.window, text="", font=("Arial", 9), anchor=tk.W)
+        self.count_label.pack(fill=tk.X, padx=10, pady=(0, 10))
+
     def load_products(self):
-        """Load products from database"""
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Load products
-        products = self.db.get_all_products()
-        for product in products:
-            # Highlight low stock items
-            tag = "low_stock" if product['stock'] <= product['low_stock_threshold'] else ""
-            self.tree.insert("", tk.END, values=(
-                product['id'],
-                product['barcode'],
-                product['name'],
-                f"${product['price']:.2f}",
-                product['stock'],
-                product['low_stock_threshold']
-            ), tags=(tag,))
+        """Load products from database into the search index"""
+        self.index.load(self.db.get_all_products())
+        self.apply_filter()
+
+    def schedule_filter(self, *args):
+        """Filter once typing pauses"""
+        if self.search_after_id is not None:
+            self.window.after_cancel(self.search_after_id)
+        self.search_after_id = self.window.after(self.SEARCH_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self):
+        """Show the first page of products matching the search and low stock filter"""
+        self.search_after_id = None
+        self.filtered_ids = self.index.filter(self.search_var.get(), self.low_stock_var.get())
+
+        self.tree.delete(*self.tree.get_children())
+        self.loaded_count = 0
+        self.load_next_page()
+        self.update_count()
+
+    def load_next_page(self):
+        """Insert the next PAGE_SIZE matching products into the table"""
+        page = self.filtered_ids[self.loaded_count:self.loaded_count + self.PAGE_SIZE]
+        for product_id in page:
+            product = self.index.get(product_id)
+            self.tree.insert("", tk.END, iid=str(product_id),
+                             values=self.row_values(product), tags=self.row_tags(product))
+        self.loaded_count += len(page)
+
+    def on_tree_scroll(self, first, last):
+        """Keep the scrollbar in step and load more rows near the bottom"""
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and self.loaded_count < len(self.filtered_ids):
+            self.window.after_idle(self.load_next_page)
+
+    def row_values(self, product):
+        return (
+            product['id'],
+            product['barcode'],
+            product['name'],
+            f"${product['price']:.2f}",
+            product['stock'],
+            product['low_stock_threshold']
+        )
+
+    def row_tags(self, product):
+        # Highlight low stock items
+        return ("low_stock",) if ProductIndex.is_low_stock(product) else ()
+
+    def update_count(self):
+        self.count_label.config(text=f"Showing {len(self.filtered_ids)} of {len(self.index)} products")
+
+    def refresh_product(self, product_id):
+        """Re-read one product after an add or edit and update just its row"""
+        product = self.db.get_product_by_id(product_id)
+        if product is None:
+            self.remove_row(product_id)
+            return
 
-        # Configure tags
-        self.tree.tag_configure("low_stock", background="#ffcccc")
+        self.index.upsert(product)
+        row_id = str(product_id)
+        in_table = self.tree.exists(row_id)
+        if in_table:
+            self.tree.delete(row_id)
+            self.loaded_count -= 1
+        if product_id in self.filtered_ids:
+            self.filtered_ids.remove(product_id)
+
+        if self.index.matches(product, self.search_var.get(), self.low_stock_var.get()):
+            position = self.index.position(product_id, self.filtered_ids)
+            self.filtered_ids.insert(position, product_id)
+            # Rows past the loaded pages are inserted when scrolled to
+            if position <= self.loaded_count:
+                self.tree.insert("", position, iid=row_id,
+                                 values=self.row_values(product), tags=self.row_tags(product))
+                self.loaded_count += 1
+                self.tree.selection_set(row_id)
+                self.tree.see(row_id)
+
+        self.update_count()
+
+    def remove_row(self, product_id):
+        """Drop a deleted product from the index and table"""
+        self.index.remove(product_id)
+        if self.tree.exists(str(product_id)):
+            self.tree.delete(str(product_id))
+            self.loaded_count -= 1
+        if product_id in self.filtered_ids:
+            self.filtered_ids.remove(product_id)
+        self.update_count()
 
     def add_product(self):
         """Add new product"""
         dialog = ProductDialog(self.window, self.db, mode="add")
         self.window.wait_window(dialog.window)
-        self.load_products()
+        if dialog.saved_product_id is not None:
+            self.refresh_product(dialog.saved_product_id)
 
     def edit_product(self):
         """Edit selected product"""
@@ -107,11 +203,12 @@ class ProductManagerWindow:
         product_id = item['values'][0]
 
         # Get product from database
-        products = [p for p in self.db.get_all_products() if p['id'] == product_id]
-        if products:
-            dialog = ProductDialog(self.window, self.db, mode="edit", product=products[0])
+        product = self.db.get_product_by_id(product_id)
+        if product:
+            dialog = ProductDialog(self.window, self.db, mode="edit", product=product)
             self.window.wait_window(dialog.window)
-            self.load_products()
+            if dialog.saved_product_id is not None:
+                self.refresh_product(product_id)
 
     def delete_product(self):
         """Delete selected product"""
@@ -126,7 +223,7 @@ class ProductManagerWindow:
 
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{product_name}'?"):
             self.db.delete_product(product_id)
-            self.load_products()
+            self.remove_row(product_id)
             messagebox.showinfo("Success", "Product deleted successfully")
 
 
@@ -143,6 +240,7 @@ class ProductDialog:
         self.db = db
         self.mode = mode
         self.product = product
+        self.saved_product_id = None    # Set once the product is saved
 
         self.barcode_var = tk.StringVar(value=product['barcode'] if product else "")
         self.name_var = tk.StringVar(value=product['name'] if product else "")
@@ -223,11 +321,14 @@ class ProductDialog:
         if self.mode == "add":
             success, message = self.db.add_product(barcode, name, price, stock, threshold)
             if success:
+                added = self.db.get_product_by_barcode(barcode)
+                self.saved_product_id = added['id'] if added else None
                 messagebox.showinfo("Success", "Product added successfully")
                 self.window.destroy()
             else:
                 messagebox.showerror("Error", message)
         else:
             self.db.update_product(self.product['id'], name, price, stock, threshold)
+            self.saved_product_id = self.product['id']
             messagebox.showinfo("Success", "Product updated successfully")
             self.window.destroy()
\ No newline at end of file
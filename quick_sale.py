@@ -1,65 +1,16 @@
-import sqlite3
+from sql_profiler import connect
+from migrations import migrate
 
 class QuickSaleManager:
     """Manage quick sale items (non-barcode items)"""
 
     def __init__(self, db_name="lastkings_pos.db"):
         self.db_name = db_name
-        self.init_quick_sale_table()
-        self.create_default_items()
-
-    def init_quick_sale_table(self):
-        """Initialize quick sale items table"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS quick_sale_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                price REAL NOT NULL,
-                category TEXT,
-                icon TEXT,
-                display_order INTEGER DEFAULT 0,
-                is_active INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        conn.commit()
-        conn.close()
-
-    def create_default_items(self):
-        """Create default quick sale items"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # Check if items exist
-        cursor.execute("SELECT COUNT(*) FROM quick_sale_items")
-        if cursor.fetchone()[0] == 0:
-            default_items = [
-                ('Ice Bag', 2.00, 'Supplies', '❄️', 1),
-                ('Plastic Cups', 0.50, 'Supplies', '🥤', 2),
-                ('Cigarettes', 8.00, 'Tobacco', '🚬', 3),
-                ('Lighter', 1.50, 'Tobacco', '🔥', 4),
-                ('Rolling Papers', 1.00, 'Tobacco', '📄', 5),
-                ('Plastic Bag', 0.25, 'Supplies', '🛍️', 6),
-                ('Energy Drink', 2.50, 'Drinks', '⚡', 7),
-                ('Water Bottle', 1.00, 'Drinks', '💧', 8),
-            ]
-
-            cursor.executemany("""
-                INSERT INTO quick_sale_items (name, price, category, icon, display_order)
-                VALUES (?, ?, ?, ?, ?)
-            """, default_items)
-
-            conn.commit()
-
-        conn.close()
+        migrate(db_name)
 
     def get_all_items(self, active_only=True):
         """Get all quick sale items"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         if active_only:
@@ -85,7 +36,7 @@ class QuickSaleManager:
 
     def add_item(self, name, price, category='', icon='📦', display_order=0):
         """Add new quick sale item"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         try:
@@ -103,7 +54,7 @@ class QuickSaleManager:
 
     def update_item(self, item_id, name, price, category='', icon='📦', display_order=0):
         """Update quick sale item"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -118,7 +69,7 @@ class QuickSaleManager:
 
     def delete_item(self, item_id):
         """Delete (deactivate) quick sale item"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -133,7 +84,7 @@ class QuickSaleManager:
 
     def get_item_by_id(self, item_id):
         """Get single item by ID"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         cursor.execute("""
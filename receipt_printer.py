@@ -1,9 +1,20 @@
 from datetime import datetime
 from typing import List, Dict
-try:
-    import win32print
-except ImportError:
-    win32print = None
+
+_win32print = None
+_win32print_checked = False
+
+def load_win32print():
+    """pywin32's win32print, imported on first use - None when it isn't installed"""
+    global _win32print, _win32print_checked
+    if not _win32print_checked:
+        try:
+            import win32print as module
+            _win32print = module
+        except ImportError:
+            _win32print = None
+        _win32print_checked = True
+    return _win32print
 
 class ReceiptPrinter:
     """
@@ -19,6 +30,7 @@ class ReceiptPrinter:
             printer_name: Name of printer, None for default
             cash_drawer_port: True if cash drawer is connected to printer
         """
+        win32print = load_win32print()
         if win32print:
             self.printer_name = printer_name or win32print.GetDefaultPrinter()
         else:
@@ -39,6 +51,7 @@ class ReceiptPrinter:
     @staticmethod
     def list_printers():
         """List all available printers"""
+        win32print = load_win32print()
         if not win32print:
             return ["No printers available - install pywin32"]
         printers = []
@@ -58,7 +71,7 @@ class ReceiptPrinter:
             items: List of items with 'name', 'quantity', 'price', 'subtotal'
         """
         receipt_text = self._format_receipt(sale_data, items)
-        self._send_to_printer(receipt_text)
+        return self._send_to_printer(receipt_text)
 
     def _format_receipt(self, sale_data: Dict, items: List[Dict]) -> str:
         """Format receipt as text"""
@@ -119,6 +132,7 @@ class ReceiptPrinter:
 
     def _send_to_printer(self, text: str):
         """Send formatted text to printer"""
+        win32print = load_win32print()
         # Fallback: Save to file if printer not available
         if not win32print:
             try:
@@ -192,6 +206,7 @@ class ReceiptPrinter:
 
     def open_cash_drawer(self):
         """Manually open cash drawer without printing"""
+        win32print = load_win32print()
         if not win32print:
             print("Cash drawer command sent (simulation mode)")
             return True
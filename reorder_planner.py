@@ -0,0 +1,215 @@
+"""
+Reorder points and suggested purchase quantities
+For every product, daily demand over the last window_days (from the
+product_daily_sales aggregates) gives a reorder point - demand over the
+supplier lead time plus safety stock for its day-to-day variation - and,
+for products at or below it, the quantity that brings stock back up to
+cover the lead time plus one review period. Results replace the contents of
+reorder_suggestions in one transaction; the manager dashboard's low stock
+list and the purchase order draft read from there.
+
+The whole catalog is computed as arrays with NumPy when it is installed
+(50k products in well under a second), otherwise product by product.
+
+Set LASTKINGZ_LEAD_TIME_DAYS (default 7) for the supplier lead time.
+
+Usage:
+    python reorder_planner.py --db lastkings_pos.db
+    python reorder_planner.py --db lastkings_pos.db --lead-time 10 --window 56
+"""
+
+import math
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+from database import Database
+
+DEFAULT_LEAD_TIME_DAYS = int(os.environ.get('LASTKINGZ_LEAD_TIME_DAYS', 7))
+DEFAULT_REVIEW_DAYS = 7         # Days between orders - each order covers one review period
+DEFAULT_WINDOW_DAYS = 28        # Sales history used for demand
+DEFAULT_SERVICE_Z = 1.65        # Safety factor: ~95% of lead times without a stockout
+
+def load_numpy():
+    """numpy module, or None when it isn't installed (per-product fallback)"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+def plan(stock: List[float], sold: List[float], sold_sq: List[float], window_days: int,
+         lead_time_days: float, review_days: float, service_z: float) -> Dict[str, List]:
+    """
+    Reorder figures for parallel lists of stock, units sold over window_days
+    and the sum of squared daily units. Days without sales count as zero demand.
+    """
+    np = load_numpy()
+    n = window_days
+    if np is not None:
+        stock = np.asarray(stock, dtype=float)
+        sold = np.asarray(sold, dtype=float)
+        mean = sold / n
+        std = np.sqrt(np.maximum(np.asarray(sold_sq, dtype=float) - n * mean ** 2, 0) / max(n - 1, 1))
+        safety = service_z * std * math.sqrt(lead_time_days)
+        reorder_point = np.ceil(mean * lead_time_days + safety)
+        target = mean * (lead_time_days + review_days) + safety
+        order = np.where(stock <= reorder_point, np.ceil(np.maximum(target - stock, 0)), 0)
+        return {'daily_demand': mean.tolist(), 'demand_std': std.tolist(), 'safety_stock': safety.tolist(),
+                'reorder_point': reorder_point.astype(int).tolist(), 'order_quantity': order.astype(int).tolist()}
+
+    result = {'daily_demand': [], 'demand_std': [], 'safety_stock': [], 'reorder_point': [], 'order_quantity': []}
+    for on_hand, total, total_sq in zip(stock, sold, sold_sq):
+        mean = total / n
+        std = math.sqrt(max(total_sq - n * mean ** 2, 0) / max(n - 1, 1))
+        safety = service_z * std * math.sqrt(lead_time_days)
+        reorder_point = math.ceil(mean * lead_time_days + safety)
+        target = mean * (lead_time_days + review_days) + safety
+        result['daily_demand'].append(mean)
+        result['demand_std'].append(std)
+        result['safety_stock'].append(safety)
+        result['reorder_point'].append(reorder_point)
+        result['order_quantity'].append(math.ceil(max(target - on_hand, 0)) if on_hand <= reorder_point else 0)
+    return result
+
+class ReorderPlanner:
+    """Computes reorder suggestions for the whole catalog and serves the purchase order draft"""
+
+    def __init__(self, db: Database, lead_time_days: float = DEFAULT_LEAD_TIME_DAYS,
+                 review_days: float = DEFAULT_REVIEW_DAYS, window_days: int = DEFAULT_WINDOW_DAYS,
+                 service_z: float = DEFAULT_SERVICE_Z):
+        if lead_time_days < 0 or review_days < 0 or window_days < 1:
+            raise ValueError("Lead time and review period can't be negative, the window needs a day")
+        self.db = db
+        self.lead_time_days = lead_time_days
+        self.review_days = review_days
+        self.window_days = window_days
+        self.service_z = service_z
+
+    def run(self, today: date = None) -> Dict:
+        """Recompute every product's suggestion from sales in the window ending today"""
+        started = time.perf_counter()
+        today = today or date.today()
+        start = (today - timedelta(days=self.window_days - 1)).isoformat()
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        try:
+            rows = cursor.execute("""
+                SELECT p.id, p.barcode, p.name, p.stock, COALESCE(d.sold, 0), COALESCE(d.sold_sq, 0)
+                FROM products p
+                LEFT JOIN (
+                    SELECT product_id, SUM(quantity) AS sold, SUM(quantity * quantity) AS sold_sq
+                    FROM product_daily_sales
+                    WHERE sale_day BETWEEN ? AND ?
+                    GROUP BY product_id
+                ) d ON d.product_id = p.id
+                WHERE p.barcode NOT LIKE 'QUICK%'
+            """, (start, today.isoformat())).fetchall()
+
+            columns = list(zip(*rows)) or [[]] * 6
+            figures = plan(columns[3], columns[4], columns[5], self.window_days,
+                           self.lead_time_days, self.review_days, self.service_z)
+
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM reorder_suggestions")
+            cursor.executemany("""
+                INSERT INTO reorder_suggestions (product_id, barcode, name, stock, daily_demand, demand_std,
+                                                 safety_stock, reorder_point, order_quantity)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, zip(columns[0], columns[1], columns[2], columns[3],
+                     (round(v, 3) for v in figures['daily_demand']),
+                     (round(v, 3) for v in figures['demand_std']),
+                     (round(v, 2) for v in figures['safety_stock']),
+                     figures['reorder_point'], figures['order_quantity']))
+
+            run = {
+                'products': len(rows),
+                'to_order': sum(1 for q in figures['order_quantity'] if q > 0),
+                'window_start': start,
+                'window_end': today.isoformat(),
+                'lead_time_days': self.lead_time_days,
+                'review_days': self.review_days,
+                'service_z': self.service_z,
+                'vectorized': load_numpy() is not None,
+                'duration_seconds': round(time.perf_counter() - started, 3)
+            }
+            cursor.execute("""
+                INSERT INTO reorder_runs (products, to_order, window_start, window_end, lead_time_days,
+                                          review_days, service_z, duration_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (run['products'], run['to_order'], run['window_start'], run['window_end'],
+                  run['lead_time_days'], run['review_days'], run['service_z'], run['duration_seconds']))
+            conn.commit()
+            return run
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def purchase_order_draft(self) -> Dict:
+        """Products to order from the last run, with the run's settings (None when never run)"""
+        conn = self.db.get_connection()
+        run = conn.execute("""
+            SELECT computed_at, window_start, window_end, lead_time_days, review_days, service_z, products
+            FROM reorder_runs ORDER BY id DESC LIMIT 1
+        """).fetchone()
+        # Current stock, so lines already restocked since the run drop out
+        rows = conn.execute("""
+            SELECT r.product_id, r.barcode, r.name, p.stock, r.reorder_point, r.order_quantity,
+                   r.daily_demand, p.price
+            FROM reorder_suggestions r
+            JOIN products p ON p.id = r.product_id
+            WHERE r.order_quantity > 0 AND p.stock <= r.reorder_point
+            ORDER BY r.name
+        """).fetchall()
+        conn.close()
+
+        lines = [{
+            'product_id': row[0],
+            'barcode': row[1],
+            'name': row[2],
+            'stock': row[3],
+            'reorder_point': row[4],
+            'order_quantity': row[5],
+            'daily_demand': row[6],
+            # Days the current stock lasts at the recent rate
+            'days_of_stock': round(max(row[3], 0) / row[6], 1) if row[6] else None,
+            'unit_price': row[7]
+        } for row in rows]
+
+        return {
+            'computed_at': run[0] if run else None,
+            'window_start': run[1] if run else None,
+            'window_end': run[2] if run else None,
+            'lead_time_days': run[3] if run else None,
+            'review_days': run[4] if run else None,
+            'service_z': run[5] if run else None,
+            'products_planned': run[6] if run else 0,
+            'lines': lines,
+            'total_units': sum(line['order_quantity'] for line in lines)
+        }
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compute reorder points and suggested order quantities")
+    parser.add_argument('--db', default='lastkings_pos.db')
+    parser.add_argument('--lead-time', type=float, default=DEFAULT_LEAD_TIME_DAYS, help="Supplier lead time (days)")
+    parser.add_argument('--review', type=float, default=DEFAULT_REVIEW_DAYS, help="Days between orders")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_DAYS, help="Days of sales history")
+    args = parser.parse_args(argv)
+
+    planner = ReorderPlanner(Database(args.db), args.lead_time, args.review, args.window)
+    run = planner.run()
+    print(f"Planned {run['products']:,} products in {run['duration_seconds']}s "
+          f"({'NumPy' if run['vectorized'] else 'pure Python'}), {run['to_order']:,} to order")
+    for line in planner.purchase_order_draft()['lines']:
+        print(f"  {line['name']:<30} stock {line['stock']:>5}  reorder at {line['reorder_point']:>5}  "
+              f"order {line['order_quantity']:>5}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
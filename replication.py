@@ -0,0 +1,392 @@
+"""
+Branch to head office replication
+Triggers on products, sales and sale_items append every change to a
+change_log table with a monotonic sequence number. A branch ships the
+entries after its last acknowledged sequence to the central database, which
+applies them idempotently and acknowledges the highest sequence applied.
+
+Usage:
+    python replication.py enable --db lastkings_pos.db --node-id shop1
+    python replication.py push --db lastkings_pos.db --url https://hq.example.com --token SECRET
+    python replication.py push --db lastkings_pos.db --central-db hq.db
+    python replication.py status --db lastkings_pos.db
+
+The central app accepts pushes at POST /api/replication/ingest when
+LASTKINGZ_REPLICATION_TOKEN is set.
+"""
+
+import json
+import sys
+from typing import Dict, List
+from database import Database
+
+# Columns carried in each change, in payload order. Sales carry the cashier's
+# username because user ids differ between databases.
+REPLICATED_COLUMNS = {
+    'products': ['barcode', 'name', 'price', 'stock', 'low_stock_threshold'],
+    'sales': ['total_amount', 'cash_received', 'change_given', 'sale_date',
+              '(SELECT username FROM users WHERE id = {row}.cashier_id)', 'payment_method'],
+    'sale_items': ['sale_id', 'barcode', 'product_name', 'quantity', 'unit_price', 'subtotal'],
+}
+
+# Updates to these columns are logged. Bookkeeping updates made by other
+# triggers (e.g. products.row_version) are not.
+LOGGED_UPDATE_COLUMNS = {
+    'products': REPLICATED_COLUMNS['products'],
+    'sales': ['total_amount', 'cash_received', 'change_given', 'sale_date', 'cashier_id', 'payment_method'],
+    'sale_items': REPLICATED_COLUMNS['sale_items'],
+}
+
+# Order existing rows are logged in when replication is first enabled
+SEED_ORDER = ['products', 'sales', 'sale_items']
+
+INSERT, UPDATE, DELETE = 'I', 'U', 'D'
+
+class ReplicationManager:
+    """Change log capture on branches and idempotent apply on the central database"""
+
+    DEFAULT_BATCH_SIZE = 500
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    # ----- Branch side -----
+
+    def get_state(self, key: str, default=None):
+        conn = self.db.get_connection()
+        row = conn.execute("SELECT value FROM replication_state WHERE key = ?", (key,)).fetchone()
+        conn.close()
+        return row[0] if row else default
+
+    def _set_state(self, cursor, key: str, value):
+        cursor.execute("""
+            INSERT INTO replication_state (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (key, str(value)))
+
+    @property
+    def node_id(self):
+        return self.get_state('node_id')
+
+    @property
+    def acked_seq(self) -> int:
+        return int(self.get_state('acked_seq', 0))
+
+    @staticmethod
+    def _payload_sql(table: str, row: str) -> str:
+        columns = [c.format(row=row) if c.startswith('(') else f"{row}.{c}"
+                   for c in REPLICATED_COLUMNS[table]]
+        return f"json_array({', '.join(columns)})"
+
+    @classmethod
+    def create_triggers(cls, cursor):
+        """Change capture triggers (existing ones are left alone)"""
+        # Archival and similar maintenance set 'paused' inside their own transaction
+        not_paused = "(SELECT value FROM replication_state WHERE key = 'paused') IS NULL"
+        for table in REPLICATED_COLUMNS:
+            delete_payload = "json_array(OLD.barcode)" if table == 'products' else "NULL"
+            update_event = f"UPDATE OF {', '.join(LOGGED_UPDATE_COLUMNS[table])}"
+            for op, event, row, payload in ((INSERT, 'INSERT', 'NEW', cls._payload_sql(table, 'NEW')),
+                                            (UPDATE, update_event, 'NEW', cls._payload_sql(table, 'NEW')),
+                                            (DELETE, 'DELETE', 'OLD', delete_payload)):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS replicate_{table}_{event.split()[0].lower()}
+                    AFTER {event} ON {table}
+                    WHEN {not_paused}
+                    BEGIN
+                        INSERT INTO change_log (table_name, row_id, op, payload)
+                        VALUES ('{table}', {row}.id, '{op}', {payload});
+                    END
+                """)
+
+    def enable(self, node_id: str):
+        """Install change capture triggers and log existing rows once"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        self.create_triggers(cursor)
+
+        if self.get_state('seeded') is None:
+            for table in SEED_ORDER:
+                cursor.execute(f"""
+                    INSERT INTO change_log (table_name, row_id, op, payload)
+                    SELECT '{table}', id, '{INSERT}', {self._payload_sql(table, table)}
+                    FROM {table} ORDER BY id
+                """)
+            self._set_state(cursor, 'seeded', 1)
+
+        self._set_state(cursor, 'node_id', node_id)
+        conn.commit()
+        conn.close()
+
+    def pending_changes(self, limit: int = DEFAULT_BATCH_SIZE) -> List[Dict]:
+        """Changes after the last acknowledged sequence, oldest first"""
+        conn = self.db.get_connection()
+        rows = conn.execute("""
+            SELECT seq, table_name, row_id, op, payload
+            FROM change_log
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (self.acked_seq, limit)).fetchall()
+        conn.close()
+
+        return [{
+            'seq': row[0],
+            'table': row[1],
+            'row_id': row[2],
+            'op': row[3],
+            'payload': json.loads(row[4]) if row[4] else None
+        } for row in rows]
+
+    def acknowledge(self, seq: int):
+        """Record that the central side holds everything up to seq and drop those entries"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        self._set_state(cursor, 'acked_seq', max(seq, self.acked_seq))
+        cursor.execute("DELETE FROM change_log WHERE seq <= ?", (seq,))
+        conn.commit()
+        conn.close()
+
+    def push(self, send, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Ship pending changes in batches until none are left.
+        send(node_id, changes) must return the acknowledged sequence.
+        Returns the number of changes sent.
+        """
+        node_id = self.node_id
+        if node_id is None:
+            raise RuntimeError("Replication is not enabled on this database")
+
+        sent = 0
+        while True:
+            changes = self.pending_changes(batch_size)
+            if not changes:
+                return sent
+            acked = send(node_id, changes)
+            if acked < changes[0]['seq']:
+                raise RuntimeError(f"Central database acknowledged {acked}, expected at least {changes[0]['seq']}")
+            self.acknowledge(acked)
+            sent += len(changes)
+
+    # ----- Central side -----
+
+    def apply_changes(self, node_id: str, changes: List[Dict]) -> int:
+        """
+        Apply a branch's changes in one transaction, skipping any already applied.
+        Returns the highest sequence now applied for the branch.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            row = cursor.execute("SELECT last_seq FROM replication_sources WHERE node_id = ?",
+                                 (node_id,)).fetchone()
+            last_seq = row[0] if row else 0
+
+            for change in sorted(changes, key=lambda c: c['seq']):
+                if change['seq'] <= last_seq:
+                    continue    # Resent batch - already applied
+                handler = getattr(self, f"_apply_{change['table']}")
+                handler(cursor, node_id, change)
+                last_seq = change['seq']
+
+            cursor.execute("""
+                INSERT INTO replication_sources (node_id, last_seq, last_sync)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(node_id) DO UPDATE SET last_seq = excluded.last_seq, last_sync = excluded.last_sync
+            """, (node_id, last_seq))
+            conn.commit()
+            return last_seq
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _local_id(self, cursor, node_id, table, source_id):
+        row = cursor.execute("""
+            SELECT local_id FROM replicated_rows
+            WHERE node_id = ? AND table_name = ? AND source_id = ?
+        """, (node_id, table, source_id)).fetchone()
+        return row[0] if row else None
+
+    def _map(self, cursor, node_id, table, source_id, local_id):
+        cursor.execute("""
+            INSERT OR REPLACE INTO replicated_rows (node_id, table_name, source_id, local_id)
+            VALUES (?, ?, ?, ?)
+        """, (node_id, table, source_id, local_id))
+
+    def _unmap(self, cursor, node_id, table, source_id):
+        cursor.execute("""
+            DELETE FROM replicated_rows WHERE node_id = ? AND table_name = ? AND source_id = ?
+        """, (node_id, table, source_id))
+
+    def _product_id(self, cursor, barcode, name, price):
+        """Central product id for a barcode, adding it to the catalog if missing"""
+        row = cursor.execute("SELECT id FROM products WHERE barcode = ?", (barcode,)).fetchone()
+        if row:
+            return row[0]
+        cursor.execute("""
+            INSERT INTO products (barcode, name, price, stock) VALUES (?, ?, ?, 0)
+        """, (barcode, name, price))
+        return cursor.lastrowid
+
+    def _apply_products(self, cursor, node_id, change):
+        if change['op'] == DELETE:
+            # Other branches may still stock it - only this branch's stock goes
+            cursor.execute("DELETE FROM branch_stock WHERE node_id = ? AND barcode = ?",
+                           (node_id, change['payload'][0]))
+            return
+
+        barcode, name, price, stock, threshold = change['payload']
+        cursor.execute("""
+            INSERT INTO products (barcode, name, price, stock, low_stock_threshold)
+            VALUES (?, ?, ?, 0, ?)
+            ON CONFLICT(barcode) DO UPDATE SET
+                name = excluded.name, price = excluded.price,
+                low_stock_threshold = excluded.low_stock_threshold
+        """, (barcode, name, price, threshold))
+        cursor.execute("""
+            INSERT INTO branch_stock (node_id, barcode, stock, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(node_id, barcode) DO UPDATE SET stock = excluded.stock, updated_at = excluded.updated_at
+        """, (node_id, barcode, stock))
+
+    def _apply_sales(self, cursor, node_id, change):
+        local_id = self._local_id(cursor, node_id, 'sales', change['row_id'])
+        if change['op'] == DELETE:
+            if local_id is not None:
+                cursor.execute("DELETE FROM sale_items WHERE sale_id = ?", (local_id,))
+                cursor.execute("DELETE FROM sales WHERE id = ?", (local_id,))
+                self._unmap(cursor, node_id, 'sales', change['row_id'])
+            return
+
+        total, cash, change_given, sale_date, cashier, payment_method = change['payload']
+        cashier_row = cursor.execute("SELECT id FROM users WHERE username = ?", (cashier,)).fetchone()
+        values = (total, cash, change_given, sale_date, cashier_row[0] if cashier_row else None, payment_method)
+
+        if local_id is None:
+            cursor.execute("""
+                INSERT INTO sales (total_amount, cash_received, change_given, sale_date, cashier_id, payment_method)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, values)
+            self._map(cursor, node_id, 'sales', change['row_id'], cursor.lastrowid)
+        else:
+            cursor.execute("""
+                UPDATE sales SET total_amount = ?, cash_received = ?, change_given = ?,
+                                 sale_date = ?, cashier_id = ?, payment_method = ?
+                WHERE id = ?
+            """, values + (local_id,))
+
+    def _apply_sale_items(self, cursor, node_id, change):
+        local_id = self._local_id(cursor, node_id, 'sale_items', change['row_id'])
+        if change['op'] == DELETE:
+            if local_id is not None:
+                cursor.execute("DELETE FROM sale_items WHERE id = ?", (local_id,))
+                self._unmap(cursor, node_id, 'sale_items', change['row_id'])
+            return
+
+        sale_id, barcode, name, quantity, unit_price, subtotal = change['payload']
+        local_sale_id = self._local_id(cursor, node_id, 'sales', sale_id)
+        if local_sale_id is None:
+            raise ValueError(f"Sale item {change['row_id']} from {node_id} refers to unknown sale {sale_id}")
+        values = (local_sale_id, self._product_id(cursor, barcode, name, unit_price),
+                  barcode, name, quantity, unit_price, subtotal)
+
+        if local_id is None:
+            cursor.execute("""
+                INSERT INTO sale_items (sale_id, product_id, barcode, product_name, quantity, unit_price, subtotal)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, values)
+            self._map(cursor, node_id, 'sale_items', change['row_id'], cursor.lastrowid)
+        else:
+            cursor.execute("""
+                UPDATE sale_items SET sale_id = ?, product_id = ?, barcode = ?, product_name = ?,
+                                      quantity = ?, unit_price = ?, subtotal = ?
+                WHERE id = ?
+            """, values + (local_id,))
+
+    def get_sources(self) -> List[Dict]:
+        """Branches that have pushed to this database"""
+        conn = self.db.get_connection()
+        rows = conn.execute("""
+            SELECT node_id, last_seq, last_sync FROM replication_sources ORDER BY node_id
+        """).fetchall()
+        conn.close()
+        return [{'node_id': r[0], 'last_seq': r[1], 'last_sync': r[2]} for r in rows]
+
+def http_sender(url: str, token: str, timeout: int = 30):
+    """send() for push() that posts batches to a central app"""
+    import urllib.request
+
+    endpoint = url.rstrip('/')
+    if not endpoint.endswith('/api/replication/ingest'):
+        endpoint += '/api/replication/ingest'
+
+    def send(node_id, changes):
+        body = json.dumps({'node_id': node_id, 'changes': changes}).encode()
+        request = urllib.request.Request(endpoint, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'X-Replication-Token': token
+        })
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = json.loads(response.read())
+        if not result.get('success'):
+            raise RuntimeError(result.get('message', 'Replication push rejected'))
+        return result['acked_seq']
+
+    return send
+
+def local_sender(central: ReplicationManager):
+    """send() for push() that applies batches straight to another database file"""
+    return central.apply_changes
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replicate branch sales to a central database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enable_parser = subparsers.add_parser('enable', help="Start recording changes on this database")
+    enable_parser.add_argument('--db', default='lastkings_pos.db')
+    enable_parser.add_argument('--node-id', required=True, help="Unique name of this branch")
+
+    push_parser = subparsers.add_parser('push', help="Send recorded changes to the central database")
+    push_parser.add_argument('--db', default='lastkings_pos.db')
+    target = push_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help="Central app base URL")
+    target.add_argument('--central-db', help="Central database file (same machine)")
+    push_parser.add_argument('--token', help="Replication token for --url")
+    push_parser.add_argument('--batch-size', type=int, default=ReplicationManager.DEFAULT_BATCH_SIZE)
+
+    status_parser = subparsers.add_parser('status', help="Show replication state")
+    status_parser.add_argument('--db', default='lastkings_pos.db')
+
+    args = parser.parse_args(argv)
+    replication = ReplicationManager(Database(args.db))
+
+    if args.command == 'enable':
+        replication.enable(args.node_id)
+        print(f"Replication enabled for node '{args.node_id}' - {len(replication.pending_changes(10 ** 9))} changes pending")
+
+    elif args.command == 'push':
+        if args.url:
+            if not args.token:
+                parser.error("--token is required with --url")
+            send = http_sender(args.url, args.token)
+        else:
+            send = local_sender(ReplicationManager(Database(args.central_db)))
+        sent = replication.push(send, args.batch_size)
+        print(f"Pushed {sent} changes, acknowledged up to {replication.acked_seq}")
+
+    else:
+        print(f"Node id:        {replication.node_id or '(not enabled)'}")
+        print(f"Acknowledged:   {replication.acked_seq}")
+        print(f"Pending:        {len(replication.pending_changes(10 ** 9))}")
+        for source in replication.get_sources():
+            print(f"Branch {source['node_id']}: applied up to {source['last_seq']} at {source['last_sync']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
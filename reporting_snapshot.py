@@ -0,0 +1,124 @@
+"""
+Reporting snapshot database
+A background thread copies the till database to a replica file with the
+online backup API, a few pages at a time, on a schedule. Sales reports read
+the replica through read-only connections so long report queries never hold
+locks on the database checkout writes to.
+
+Set LASTKINGZ_REPORT_SNAPSHOT to the refresh interval in seconds to enable it
+(reports read the live database when unset). Every report says how old the
+data it was built from is.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import sql_profiler
+from database import BackupBusy, Database
+
+DEFAULT_REFRESH_INTERVAL = int(os.environ.get('LASTKINGZ_REPORT_SNAPSHOT', 0) or 0)
+
+class ReadOnlyDatabase(Database):
+    """Database whose connections cannot write (mode=ro and query_only)"""
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self._uri = Path(db_name).resolve().as_uri() + '?mode=ro'
+
+    def get_connection(self):
+        conn = sql_profiler.connect(self._uri, uri=True)
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+class ReportingSnapshot:
+    """Replica of the till database refreshed in the background for reports"""
+
+    PAGES_PER_STEP = 64     # Pages copied per backup step
+    STEP_PAUSE = 0.005      # Seconds between steps, so checkout can take the write lock
+
+    def __init__(self, db: Database, path: str = None,
+                 refresh_interval: int = DEFAULT_REFRESH_INTERVAL):
+        self.db = db
+        self.path = path or os.path.splitext(db.db_name)[0] + '.report.db'
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_interval > 0
+
+    def snapshot_time(self) -> Optional[float]:
+        """When the replica was last completed (epoch seconds), or None"""
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        taken = self.snapshot_time()
+        return taken is None or time.time() - taken >= self.refresh_interval
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the replica. The copy is made beside it and swapped in, so
+        readers always see a complete snapshot. Returns False if the old
+        replica was kept: checkout writes kept restarting the copy, or the swap
+        had to wait for a reader still holding the old file open (Windows).
+        """
+        with self._lock:
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                self.db.backup_to(temp_path, self.PAGES_PER_STEP, self.STEP_PAUSE)
+            except BackupBusy:
+                # Reports keep the older replica; the next interval tries again
+                os.remove(temp_path)
+                return False
+            try:
+                os.replace(temp_path, self.path)
+                return True
+            except PermissionError:
+                os.remove(temp_path)
+                return False
+
+    def reader(self) -> Tuple[Database, Dict]:
+        """
+        Database to run report queries against and its freshness.
+        Falls back to the live database when snapshots are off or none exists yet.
+        """
+        taken = self.snapshot_time() if self.enabled else None
+        if taken is None:
+            return self.db, {'source': 'live', 'as_of': datetime.now().isoformat(timespec='seconds'),
+                             'age_seconds': 0}
+        return ReadOnlyDatabase(self.path), {
+            'source': 'snapshot',
+            'as_of': datetime.fromtimestamp(taken).isoformat(timespec='seconds'),
+            'age_seconds': int(time.time() - taken)
+        }
+
+    def start(self):
+        """Refresh on a daemon thread every refresh_interval seconds"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='report-snapshot', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Several web workers share one replica - only refresh when it is due
+            if self.is_stale():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Report snapshot failed: {e}")
+            self._stop.wait(self.refresh_interval)
@@ -0,0 +1,217 @@
+"""
+Offline sale sync for cashier terminals
+Terminals commit sales to a local queue with a client-generated sale id and
+push them here when the server is reachable. Each client sale id is applied
+at most once, so retries after a timeout never double-count a sale.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple
+from database import Database
+
+class SaleSyncManager:
+    """Apply queued terminal sales idempotently"""
+
+    STATUS_PENDING = "pending"
+    STATUS_APPLIED = "applied"
+    STATUS_DUPLICATE = "duplicate"
+    STATUS_REJECTED = "rejected"
+
+    # Largest batch accepted in one push
+    MAX_BATCH_SIZE = 200
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def claim(self, cursor, client_sale_id: str) -> bool:
+        """
+        Reserve a client sale id in the cursor's write transaction, returns False if it was
+        already applied. The claim commits or rolls back with the sale, so a request that
+        dies part way leaves nothing behind to block the resend.
+        """
+        cursor.execute("""
+            INSERT OR IGNORE INTO synced_sales (client_sale_id, status)
+            VALUES (?, ?)
+        """, (client_sale_id, self.STATUS_PENDING))
+        if cursor.rowcount > 0:
+            return True
+        # Left pending by a server that committed claims on their own - that sale never applied
+        cursor.execute("""
+            UPDATE synced_sales SET received_at = CURRENT_TIMESTAMP
+            WHERE client_sale_id = ? AND status = ?
+        """, (client_sale_id, self.STATUS_PENDING))
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _store_result(cursor, client_sale_id: str, status: str, sale_id: int = None,
+                      message: str = None, conflicts: List[Dict] = None):
+        cursor.execute("""
+            UPDATE synced_sales
+            SET status = ?, sale_id = ?, message = ?, conflicts = ?
+            WHERE client_sale_id = ?
+        """, (status, sale_id, message, json.dumps(conflicts or []), client_sale_id))
+
+    def save_sale(self, client_sale_id: Optional[str], sale_items: List[Dict], stocked: List[Tuple],
+                  total: float, cash_received: float, change: float, cashier_id: int = None,
+                  payment_method: str = 'cash', sale_date: str = None,
+                  conflicts: List[Dict] = None) -> Optional[Dict]:
+        """
+        Take stock, save the sale and record its client sale id in one transaction,
+        so a failure part way leaves nothing applied and the resend starts from the same stock.
+        stocked holds (barcode, product, quantity) for the lines that take stock; lines that
+        go negative are added to conflicts. Returns None if the client sale id was already
+        applied, otherwise the sale id and the new stock level of each product sold.
+        """
+        conflicts = [] if conflicts is None else conflicts
+        stock_levels = {}
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        try:
+            self.db.begin_write(cursor)
+            if client_sale_id and not self.claim(cursor, client_sale_id):
+                conn.rollback()
+                return None
+            for barcode, product, quantity in stocked:
+                new_stock = self.db.adjust_stock(cursor, product['id'], quantity)
+                stock_levels[product['id']] = new_stock
+                if new_stock is not None and new_stock < 0:
+                    conflicts.append({
+                        'barcode': barcode,
+                        'name': product['name'],
+                        'stock': new_stock,
+                        'message': f"Stock went negative ({new_stock})"
+                    })
+            sale_id = self.db.insert_sale(cursor, sale_items, total, cash_received, change,
+                                          cashier_id, payment_method, sale_date)
+            if client_sale_id:
+                self._store_result(cursor, client_sale_id, self.STATUS_APPLIED, sale_id, conflicts=conflicts)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return {'sale_id': sale_id, 'stock': stock_levels, 'conflicts': conflicts}
+
+    def get_synced_sale(self, client_sale_id: str) -> Optional[Dict]:
+        """Get stored outcome for a client sale id"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT client_sale_id, sale_id, status, message, conflicts, received_at
+            FROM synced_sales
+            WHERE client_sale_id = ?
+        """, (client_sale_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return {
+                'client_sale_id': row[0],
+                'sale_id': row[1],
+                'status': row[2],
+                'message': row[3],
+                'conflicts': json.loads(row[4]) if row[4] else [],
+                'received_at': row[5]
+            }
+        return None
+
+    @staticmethod
+    def normalize_sale_date(value: str) -> Optional[str]:
+        """Convert a client ISO timestamp to the UTC format used by sale_date"""
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+    def apply_sale(self, sale: Dict, cashier_id: int = None) -> Dict:
+        """
+        Apply one queued sale.
+        The sale already happened at the till, so stock is decremented even if
+        it goes negative; those lines are reported back as conflicts.
+        """
+        client_sale_id = str(sale.get('client_sale_id') or '').strip()
+        if not client_sale_id:
+            return {'client_sale_id': None, 'status': self.STATUS_REJECTED,
+                    'message': 'Missing client_sale_id'}
+
+        try:
+            items = sale.get('items', [])
+            if not items:
+                return {'client_sale_id': client_sale_id, 'status': self.STATUS_REJECTED,
+                        'message': 'Cart is empty'}
+
+            total = sum(float(item['price']) * int(item['quantity']) for item in items)
+            cash_received = float(sale.get('cash_received', 0))
+            if cash_received < total:
+                return {'client_sale_id': client_sale_id, 'status': self.STATUS_REJECTED,
+                        'message': 'Insufficient payment'}
+
+            change = cash_received - total
+            conflicts = []
+            sale_items = []
+            stocked = []    # (barcode, product, quantity) for lines that take stock
+
+            for item in items:
+                quantity = int(item['quantity'])
+                product_id = item.get('id')
+
+                # Quick sale items don't track stock
+                if not item['barcode'].startswith('QUICK'):
+                    product = self.db.get_product_by_barcode(item['barcode'])
+                    if not product:
+                        conflicts.append({
+                            'barcode': item['barcode'],
+                            'name': item.get('name', 'Unknown'),
+                            'message': 'Product not found'
+                        })
+                    else:
+                        product_id = product['id']
+                        stocked.append((item['barcode'], product, quantity))
+
+                if isinstance(product_id, str) and product_id.startswith('quick_'):
+                    product_id = int(product_id.replace('quick_', ''))
+
+                sale_items.append({
+                    **item,
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'subtotal': float(item['price']) * quantity
+                })
+
+            saved = self.save_sale(client_sale_id, sale_items, stocked, total, cash_received, change,
+                                   cashier_id, sale.get('payment_method', 'cash'),
+                                   self.normalize_sale_date(sale.get('created_at')), conflicts)
+            if saved is None:
+                previous = self.get_synced_sale(client_sale_id)
+                return {
+                    'client_sale_id': client_sale_id,
+                    'status': self.STATUS_DUPLICATE,
+                    'sale_id': previous['sale_id'] if previous else None,
+                    'conflicts': previous['conflicts'] if previous else []
+                }
+            sale_id = saved['sale_id']
+
+            return {
+                'client_sale_id': client_sale_id,
+                'status': self.STATUS_APPLIED,
+                'sale_id': sale_id,
+                'total': total,
+                'conflicts': conflicts
+            }
+        except (KeyError, TypeError, ValueError, sqlite3.Error) as e:
+            # Nothing was applied - let the terminal retry once the problem is fixed
+            return {'client_sale_id': client_sale_id, 'status': self.STATUS_REJECTED,
+                    'message': str(e), 'retry': True}
+
+    def apply_batch(self, sales: List[Dict], cashier_id: int = None) -> List[Dict]:
+        """Apply queued sales in the order the terminal recorded them"""
+        return [self.apply_sale(sale, cashier_id) for sale in sales[:self.MAX_BATCH_SIZE]]
@@ -0,0 +1,213 @@
+"""
+Product sales velocity and top sellers
+A trigger on sale_items keeps product_daily_sales - units, revenue and sale
+lines per product per day - current inside each sale's own
+transaction, so questions about what sells read a few hundred small rows
+instead of grouping every sale item joined to its sale. Aggregates stay
+behind when sales are archived, so they cover archived years too. Rows are
+keyed by product id, so price-embedded labels and case codes count towards
+the product they were scanned for.
+
+backfill() rebuilds the aggregates for a date range from the sales still in
+the database (e.g. after restoring or importing sales with triggers off).
+
+Usage:
+    python sales_analytics.py --db lastkings_pos.db --top 10 --days 30
+    python sales_analytics.py --db lastkings_pos.db --backfill
+"""
+
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from database import Database
+
+DEFAULT_DAYS = 30
+DEFAULT_LIMIT = 10
+RANK_COLUMNS = {'quantity': 'quantity', 'revenue': 'revenue'}
+
+def backfill_daily_sales(cursor, start_date: str = None, end_date: str = None) -> int:
+    """Recompute product_daily_sales for days in range from sales and sale_items; returns rows written"""
+    # Archived days have no sales left to count - keep their aggregates
+    archived = cursor.execute("SELECT date(MAX(last_sale_date)) FROM sale_archives").fetchone()[0]
+    if archived and (start_date is None or start_date <= archived):
+        start_date = (date.fromisoformat(archived) + timedelta(days=1)).isoformat()
+    start_date = start_date or '0000-01-01'
+    end_date = end_date or '9999-12-31'
+
+    cursor.execute("DELETE FROM product_daily_sales WHERE sale_day BETWEEN ? AND ?", (start_date, end_date))
+    cursor.execute("""
+        INSERT INTO product_daily_sales (product_id, sale_day, barcode, product_name, quantity, revenue, sale_count)
+        SELECT si.product_id, date(s.sale_date), COALESCE(p.barcode, MAX(si.barcode)), MAX(si.product_name),
+               SUM(si.quantity), SUM(si.subtotal), COUNT(*)
+        FROM sale_items si
+        JOIN sales s ON s.id = si.sale_id
+        LEFT JOIN products p ON p.id = si.product_id
+        WHERE date(s.sale_date) BETWEEN ? AND ?
+        GROUP BY si.product_id, date(s.sale_date)
+    """, (start_date, end_date))
+    return cursor.rowcount
+
+def window(days: int = DEFAULT_DAYS, start_date: str = None, end_date: str = None,
+           today: date = None) -> Tuple[str, str]:
+    """(start, end) YYYY-MM-DD: explicit dates, or the last days days ending today"""
+    today = today or date.today()
+    end_date = end_date or today.isoformat()
+    start_date = start_date or (date.fromisoformat(end_date) - timedelta(days=days - 1)).isoformat()
+    return start_date, end_date
+
+class SalesAnalytics:
+    """Top sellers, slow movers and per-product trends from daily aggregates"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def backfill(self, start_date: str = None, end_date: str = None) -> int:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            written = backfill_daily_sales(cursor, start_date, end_date)
+            conn.commit()
+            return written
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def top_sellers(self, start_date: str, end_date: str, limit: int = DEFAULT_LIMIT,
+                    by: str = 'quantity') -> List[Dict]:
+        """Best selling products between start_date and end_date (inclusive), by units or revenue"""
+        order = RANK_COLUMNS.get(by)
+        if order is None:
+            raise ValueError(f"Unknown ranking {by!r}, use one of {', '.join(RANK_COLUMNS)}")
+
+        conn = self.db.get_connection()
+        rows = conn.execute(f"""
+            SELECT COALESCE(p.barcode, MAX(d.barcode)) AS barcode, COALESCE(p.name, MAX(d.product_name)),
+                   SUM(d.quantity) AS quantity, SUM(d.revenue) AS revenue, SUM(d.sale_count), p.stock
+            FROM product_daily_sales d
+            LEFT JOIN products p ON p.id = d.product_id
+            WHERE d.sale_day BETWEEN ? AND ?
+            GROUP BY d.product_id
+            ORDER BY {order} DESC, barcode
+            LIMIT ?
+        """, (start_date, end_date, limit)).fetchall()
+        conn.close()
+
+        days = self._days(start_date, end_date)
+        return [{
+            'barcode': row[0],
+            'name': row[1],
+            'quantity': row[2],
+            'revenue': round(row[3], 2),
+            'sale_count': row[4],
+            'stock': row[5],
+            'units_per_day': round(row[2] / days, 2)
+        } for row in rows]
+
+    def slow_movers(self, start_date: str, end_date: str, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        """Products in stock that sold least between start_date and end_date, unsold ones first.
+        Quick sale items (QUICK barcodes) have no real stock level and are left out."""
+        conn = self.db.get_connection()
+        rows = conn.execute("""
+            SELECT p.barcode, p.name, p.stock, COALESCE(d.quantity, 0), COALESCE(d.revenue, 0), d.last_sold
+            FROM products p
+            LEFT JOIN (
+                SELECT product_id, SUM(quantity) AS quantity, SUM(revenue) AS revenue, MAX(sale_day) AS last_sold
+                FROM product_daily_sales
+                WHERE sale_day BETWEEN ? AND ?
+                GROUP BY product_id
+            ) d ON d.product_id = p.id
+            WHERE p.stock > 0 AND p.barcode NOT LIKE 'QUICK%'
+            ORDER BY COALESCE(d.quantity, 0), p.stock DESC, p.name
+            LIMIT ?
+        """, (start_date, end_date, limit)).fetchall()
+        conn.close()
+
+        days = self._days(start_date, end_date)
+        results = []
+        for barcode, name, stock, quantity, revenue, last_sold in rows:
+            per_day = quantity / days
+            results.append({
+                'barcode': barcode,
+                'name': name,
+                'stock': stock,
+                'quantity': quantity,
+                'revenue': round(revenue, 2),
+                'last_sold': last_sold,
+                'units_per_day': round(per_day, 2),
+                # Days the current stock lasts at this rate (None: not selling)
+                'days_of_stock': round(stock / per_day, 1) if per_day else None
+            })
+        return results
+
+    def trend(self, barcode: str, start_date: str, end_date: str) -> Dict:
+        """Daily units and revenue for one product, with days without sales filled in as zero.
+        Any code that scans as the product (label, case code) finds it; a deleted product's
+        history is found by the barcode it was last sold under."""
+        product, _ = self.db.find_scanned_product(barcode)
+        conn = self.db.get_connection()
+        if product:
+            barcode = product['barcode']
+            where, key = "product_id = ?", product['id']
+        else:
+            where, key = "barcode = ?", barcode
+        rows = conn.execute(f"""
+            SELECT sale_day, quantity, revenue, product_name
+            FROM product_daily_sales
+            WHERE {where} AND sale_day BETWEEN ? AND ?
+            ORDER BY sale_day
+        """, (key, start_date, end_date)).fetchall()
+        conn.close()
+
+        by_day = {row[0]: row for row in rows}
+        first = date.fromisoformat(start_date)
+        days = []
+        for offset in range(self._days(start_date, end_date)):
+            day = (first + timedelta(days=offset)).isoformat()
+            row = by_day.get(day)
+            days.append({'date': day, 'quantity': row[1] if row else 0,
+                         'revenue': round(row[2], 2) if row else 0.0})
+
+        quantity = sum(d['quantity'] for d in days)
+        return {
+            'barcode': barcode,
+            'name': product['name'] if product else (rows[-1][3] if rows else None),
+            'quantity': quantity,
+            'revenue': round(sum(d['revenue'] for d in days), 2),
+            'units_per_day': round(quantity / len(days), 2) if days else 0,
+            'days': days
+        }
+
+    @staticmethod
+    def _days(start_date: str, end_date: str) -> int:
+        return max((date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1, 1)
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Product sales velocity")
+    parser.add_argument('--db', default='lastkings_pos.db')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="Window ending today")
+    parser.add_argument('--top', type=int, default=DEFAULT_LIMIT, help="Products to list")
+    parser.add_argument('--by', choices=sorted(RANK_COLUMNS), default='quantity')
+    parser.add_argument('--backfill', action='store_true', help="Rebuild the daily aggregates first")
+    args = parser.parse_args(argv)
+
+    analytics = SalesAnalytics(Database(args.db))
+    if args.backfill:
+        print(f"Backfilled {analytics.backfill()} product-days")
+
+    start, end = window(args.days)
+    print(f"Top sellers {start} to {end} (by {args.by}):")
+    for p in analytics.top_sellers(start, end, args.top, args.by):
+        print(f"  {p['name']:<30} {p['quantity']:>6} units  ${p['revenue']:>10,.2f}  {p['units_per_day']:>6}/day")
+    print("Slow movers:")
+    for p in analytics.slow_movers(start, end, args.top):
+        cover = f"{p['days_of_stock']} days of stock" if p['days_of_stock'] else "not selling"
+        print(f"  {p['name']:<30} {p['quantity']:>6} units  {p['stock']:>6} in stock  {cover}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 from database import Database
+from reporting_snapshot import ReportingSnapshot
+from archive_manager import ArchiveManager
 import sqlite3
 
 class SalesReportWindow:
     """Sales Reports Interface"""
 
-    def __init__(self, parent, db: Database):
+    def __init__(self, parent, db: Database, snapshot: ReportingSnapshot = None):
         self.window = tk.Toplevel(parent)
         self.window.title("Sales Reports")
         self.window.geometry("900x700")
         self.db = db
+        self.snapshot = snapshot or ReportingSnapshot(db)
+        self.archives = ArchiveManager(db)
 
         self.setup_ui()
         self.load_today_report()
@@ -46,7 +50,7 @@ class SalesReportWindow:
         summary_frame = tk.LabelFrame(self.window, text="Summary", font=("Arial", 12, "bold"))
         summary_frame.pack(fill=tk.X, padx=10, pady=10)
 
-        self.summary_text = tk.Text(summary_frame, height=8, font=("Arial", 11), bg="#ecf0f1")
+        self.summary_text = tk.Text(summary_frame, height=10, font=("Arial", 11), bg="#ecf0f1")
         self.summary_text.pack(fill=tk.X, padx=10, pady=10)
 
         # Sales Table
@@ -80,11 +84,15 @@ class SalesReportWindow:
         for item in self.tree.get_children():
             self.tree.delete(item)
 
+        # Report queries run against the snapshot when one is kept
+        report_db, freshness = self.snapshot.reader()
+        report_db = self.archives.spanning(report_db, start_date, end_date)
+
         # Get summary
-        summary = self.db.get_sales_report(start_date, end_date)
+        summary = report_db.get_sales_report(start_date, end_date)
 
         # Get individual sales
-        conn = self.db.get_connection()
+        conn = report_db.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT s.id, s.sale_date, s.total_amount, s.cash_received, s.change_given,
@@ -106,9 +114,12 @@ class SalesReportWindow:
         self.summary_text.insert(tk.END, f"Average Sale:       ${(summary['total_revenue'] / summary['total_sales'] if summary['total_sales'] > 0 else 0):.2f}\n")
         self.summary_text.insert(tk.END, f"Cash Collected:     ${summary['total_cash']:.2f}\n")
         self.summary_text.insert(tk.END, f"Change Given:       ${summary['total_change']:.2f}\n")
+        if freshness['source'] == 'snapshot':
+            self.summary_text.insert(tk.END, f"\nData as of {freshness['as_of'].replace('T', ' ')}\n", "note")
 
         self.summary_text.tag_config("title", font=("Arial", 12, "bold"), foreground="#2c3e50")
         self.summary_text.tag_config("bold", font=("Arial", 11, "bold"))
+        self.summary_text.tag_config("note", foreground="#7f8c8d")
 
         # Display sales
         for sale in sales:
@@ -158,8 +169,8 @@ class SalesReportWindow:
         item = self.tree.item(selection[0])
         sale_id = item['values'][0]
 
-        # Get sale items
-        conn = self.db.get_connection()
+        # Get sale items (archived sales keep their ids)
+        conn = self.archives.spanning(self.db).get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT product_name, quantity, unit_price, subtotal
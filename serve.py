@@ -0,0 +1,31 @@
+"""
+Production server for the LastKingz web app
+Runs gunicorn with gunicorn.conf.py (workers and threads sized from the CPU
+count, app preloaded, catalog warmed before forking). Extra arguments are
+passed through to gunicorn, e.g. python serve.py --workers 2.
+
+Windows has no gunicorn, so there the Flask server runs threaded instead.
+"""
+
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG = os.path.join(REPO_DIR, 'gunicorn.conf.py')
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        from app import app
+        port = int(os.environ.get('PORT', 5000))
+        print(f"gunicorn not available - serving with Flask's threaded server on port {port}")
+        app.run(host='0.0.0.0', port=port, threaded=True)
+        return 0
+
+    sys.argv = ['gunicorn', '--config', CONFIG, '--chdir', REPO_DIR, *argv, 'app:app']
+    return run()
+
+if __name__ == "__main__":
+    sys.exit(main())
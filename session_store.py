@@ -0,0 +1,269 @@
+"""
+Server-side web sessions in SQLite
+The session cookie only carries a signed random id; the session itself lives
+in the sessions table of the till database, so every gunicorn worker (and a
+restarted server) sees the same logins. Recently read sessions are kept in a
+small in-memory cache, rows are only rewritten when the session changed or
+half its lifetime has passed, and expired rows are swept in small batches.
+
+Deleting a session (logout, or the old id on login) appends a byte to a
+.sessions_revoked file beside the database. Before trusting its cache a
+worker compares that file's size with the last one it saw, and empties the
+cache when it grew, so an id revoked on one worker is refused by all of them
+on their next request.
+
+The signing key comes from LASTKINGZ_SECRET_KEY, or from a .secret_key file
+generated once next to the database when that is unset.
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from database import Database
+
+SECRET_KEY_FILE = '.secret_key'
+REVOKED_FILE = '.sessions_revoked'
+
+def load_secret_key(db_name: str) -> str:
+    """Stable key for signing cookies: LASTKINGZ_SECRET_KEY, else a key file beside the database"""
+    key = os.environ.get('LASTKINGZ_SECRET_KEY')
+    if key:
+        return key
+
+    path = os.path.join(os.path.dirname(os.path.abspath(db_name)), SECRET_KEY_FILE)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path) as f:
+            return f.read().strip()
+
+    key = secrets.token_hex(32)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key)
+    return key
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its id and whether it was changed"""
+
+    def __init__(self, initial: Dict = None, sid: str = None, new: bool = False,
+                 expires_at: float = None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.previous_sid = None    # Stored id this session moved away from, deleted on save
+
+    def regenerate(self):
+        """Move the session to a fresh id (on login and logout), so an id known before
+        the change - e.g. one planted in the browser - no longer finds it"""
+        if self.previous_sid is None and not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+class SQLiteSessionInterface(SessionInterface):
+    """Flask session interface backed by the sessions table"""
+
+    CACHE_SIZE = 1024       # Sessions kept in memory per worker
+    CACHE_TTL = 5           # Seconds a cached session is trusted before re-reading the row (unless revoked sooner)
+    SWEEP_INTERVAL = 300    # Seconds between expiry sweeps in each worker
+    SWEEP_BATCH = 500       # Rows deleted per sweep transaction
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()   # sid -> (serialized data, expires_at, cached_at)
+        self._last_sweep = time.monotonic()
+        self._revoked_path = os.path.join(os.path.dirname(os.path.abspath(db.db_name)), REVOKED_FILE)
+        self._revocations = self._read_revocations()
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt='lastkingz-session', key_derivation='hmac')
+
+    @staticmethod
+    def _lifetime(app) -> float:
+        return app.permanent_session_lifetime.total_seconds()
+
+    # Cache
+
+    def _read_revocations(self) -> int:
+        """Sessions deleted by any worker so far - the marker file grows a byte per deletion"""
+        try:
+            return os.stat(self._revoked_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _revoke(self):
+        # O_APPEND writes from several workers never overwrite each other
+        with open(self._revoked_path, 'ab') as f:
+            f.write(b'.')
+
+    def _cache_get(self, sid: str) -> Optional[tuple]:
+        revocations = self._read_revocations()
+        with self._lock:
+            if revocations != self._revocations:
+                # A session was deleted somewhere - any cached one may be it
+                self._cache.clear()
+                self._revocations = revocations
+                return None
+            entry = self._cache.get(sid)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] >= self.CACHE_TTL:
+                del self._cache[sid]
+                return None
+            self._cache.move_to_end(sid)
+            return entry
+
+    def _cache_put(self, sid: str, data: str, expires_at: float):
+        with self._lock:
+            self._cache[sid] = (data, expires_at, time.monotonic())
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _cache_drop(self, sid: str):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    # Storage
+
+    def load(self, sid: str) -> Optional[tuple]:
+        """(data, expires_at) for a live session, or None"""
+        entry = self._cache_get(sid)
+        if entry is None:
+            conn = self.db.get_connection()
+            row = conn.execute("SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,)).fetchone()
+            conn.close()
+            if row is None:
+                return None
+            entry = row
+            self._cache_put(sid, *entry)
+
+        data, expires_at = entry[0], entry[1]
+        if expires_at <= time.time():
+            return None
+        return self.serializer.loads(data), expires_at
+
+    def store(self, sid: str, data: Dict, expires_at: float):
+        serialized = self.serializer.dumps(data)
+        conn = self.db.get_connection()
+        conn.execute("""
+            INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+        """, (sid, serialized, expires_at))
+        conn.commit()
+        conn.close()
+        self._cache_put(sid, serialized, expires_at)
+
+    def delete(self, sid: str):
+        conn = self.db.get_connection()
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.commit()
+        conn.close()
+        self._cache_drop(sid)
+        self._revoke()
+
+    def sweep(self, now: float = None) -> int:
+        """Delete expired sessions a batch per transaction, so logins aren't held up. Returns rows deleted."""
+        now = now or time.time()
+        deleted = 0
+        conn = self.db.get_connection()
+        try:
+            while True:
+                cursor = conn.execute("""
+                    DELETE FROM sessions WHERE sid IN (
+                        SELECT sid FROM sessions WHERE expires_at < ? ORDER BY expires_at LIMIT ?
+                    )
+                """, (now, self.SWEEP_BATCH))
+                conn.commit()
+                deleted += cursor.rowcount
+                if cursor.rowcount < self.SWEEP_BATCH:
+                    break
+        finally:
+            conn.close()
+        return deleted
+
+    def _sweep_if_due(self):
+        with self._lock:
+            if time.monotonic() - self._last_sweep < self.SWEEP_INTERVAL:
+                return
+            self._last_sweep = time.monotonic()
+        try:
+            self.sweep()
+        except Exception as e:
+            print(f"Session sweep failed: {e}")
+
+    # Flask SessionInterface
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            entry = self.load(sid) if sid else None
+            if entry is not None:
+                return ServerSideSession(entry[0], sid, expires_at=entry[1])
+
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if not session.new:
+            response.vary.add("Cookie")
+
+        self._sweep_if_due()
+
+        if session.previous_sid is not None:
+            self.delete(session.previous_sid)
+
+        if not session:
+            # Logged out (or never logged in) - drop the row and the cookie
+            if session.modified:
+                if not session.new and session.previous_sid is None:
+                    self.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add("Cookie")
+            return
+
+        # Rewrite the row when it changed or is past half its life (sliding expiry)
+        lifetime = self._lifetime(app)
+        if not (session.modified or session.new
+                or session.expires_at - time.time() < lifetime / 2):
+            return
+
+        session.expires_at = time.time() + lifetime
+        self.store(session.sid, dict(session), session.expires_at)
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite,
+        )
+        response.vary.add("Cookie")
@@ -1,46 +1,107 @@
-from typing import List, Dict
+from typing import Callable, List, Dict
 
 class ShoppingCart:
+    # Change events passed to listeners as listener(event, item)
+    ITEM_ADDED = 'added'
+    ITEM_UPDATED = 'updated'
+    ITEM_REMOVED = 'removed'
+    CLEARED = 'cleared'     # item is None
+
     def __init__(self):
         self.items: List[Dict] = []
+        self._index: Dict = {}        # line_id -> line in self.items
+        self._total = 0.0
+        self._item_count = 0
+        self._listeners: List[Callable] = []
+
+    def add_listener(self, listener: Callable):
+        """Call listener(event, item) whenever a cart line changes"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        """Stop notifying listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: str, item: Dict = None):
+        for listener in list(self._listeners):
+            listener(event, item)
+
+    def _set_quantity(self, item: Dict, quantity: int):
+        """Change a line's quantity and keep the running totals in step"""
+        subtotal = quantity * item['price']
+        self._total += subtotal - item['subtotal']
+        self._item_count += quantity - item['quantity']
+        item['quantity'] = quantity
+        item['subtotal'] = subtotal
 
     def add_item(self, product: Dict, quantity: int = 1):
-        """Add product to cart or increase quantity if already exists"""
+        """
+        Add product to cart or increase quantity if already exists.
+        Lines are keyed by product id unless the product carries its own
+        'line_id' (e.g. a barcode with an embedded price).
+        """
+        line_id = product.get('line_id', product['id'])
+
         # Check if product already in cart
-        for item in self.items:
-            if item['product_id'] == product['id']:
-                item['quantity'] += quantity
-                item['subtotal'] = item['quantity'] * item['price']
-                return
+        item = self._index.get(line_id)
+        if item is not None:
+            self._set_quantity(item, item['quantity'] + quantity)
+            self._notify(self.ITEM_UPDATED, item)
+            return
 
         # Add new item
-        self.items.append({
+        item = {
+            'line_id': line_id,
             'product_id': product['id'],
             'barcode': product['barcode'],
             'name': product['name'],
             'price': product['price'],
             'quantity': quantity,
             'subtotal': product['price'] * quantity
-        })
+        }
+        self.items.append(item)
+        self._index[line_id] = item
+        self._total += item['subtotal']
+        self._item_count += quantity
+        self._notify(self.ITEM_ADDED, item)
 
     def remove_item(self, product_id: int):
-        """Remove item from cart"""
-        self.items = [item for item in self.items if item['product_id'] != product_id]
+        """Remove item from cart (by line id - the product id for ordinary lines)"""
+        item = self._index.pop(product_id, None)
+        if item is None:
+            return
+
+        self.items.remove(item)
+        if self.items:
+            self._total -= item['subtotal']
+            self._item_count -= item['quantity']
+        else:
+            # Reset rather than subtract so rounding error can't build up across sales
+            self._total = 0.0
+            self._item_count = 0
+        self._notify(self.ITEM_REMOVED, item)
 
     def update_quantity(self, product_id: int, quantity: int):
         """Update item quantity"""
-        for item in self.items:
-            if item['product_id'] == product_id:
-                if quantity > 0:
-                    item['quantity'] = quantity
-                    item['subtotal'] = item['quantity'] * item['price']
-                else:
-                    self.remove_item(product_id)
-                return
+        item = self._index.get(product_id)
+        if item is None:
+            return
+
+        if quantity > 0:
+            self._set_quantity(item, quantity)
+            self._notify(self.ITEM_UPDATED, item)
+        else:
+            self.remove_item(product_id)
+
+    def get_item(self, product_id) -> Dict:
+        """Get a single cart line by product id, or None"""
+        return self._index.get(product_id)
 
     def get_total(self) -> float:
-        """Calculate cart total"""
-        return sum(item['subtotal'] for item in self.items)
+        """Cart total, maintained as lines change"""
+        return self._total
 
     def get_items(self) -> List[Dict]:
         """Get all cart items"""
@@ -49,6 +110,10 @@ class ShoppingCart:
     def clear(self):
         """Clear all items from cart"""
         self.items = []
+        self._index = {}
+        self._total = 0.0
+        self._item_count = 0
+        self._notify(self.CLEARED)
 
     def is_empty(self) -> bool:
         """Check if cart is empty"""
@@ -56,4 +121,4 @@ class ShoppingCart:
 
     def get_item_count(self) -> int:
         """Get total number of items"""
-        return sum(item['quantity'] for item in self.items)
\ No newline at end of file
+        return self._item_count
@@ -0,0 +1,202 @@
+"""
+Per-request SQL instrumentation
+Counts statements, SQL time and connections opened while a request is being
+profiled, and flags statements repeated with identical text as likely N+1
+query patterns. Enable in the web app with LASTKINGZ_SQL_PROFILE=1.
+
+All database classes open connections through connect() below. When no
+profile is active on the current thread it is a plain sqlite3.connect().
+"""
+
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Same statement executed this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+_local = threading.local()
+
+class QueryStats:
+    """SQL activity for one profiled unit of work"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0          # Every statement SQLite ran (trace callback)
+        self.queries = Counter()     # Application statements by SQL text
+        self.query_time = defaultdict(float)
+        self.total_time = 0.0
+        self.connections = 0
+
+    def record(self, sql, elapsed):
+        self.queries[sql] += 1
+        self.query_time[sql] += elapsed
+        self.total_time += elapsed
+
+    def add_time(self, sql, elapsed):
+        """Time spent fetching rows of an already recorded statement"""
+        self.query_time[sql] += elapsed
+        self.total_time += elapsed
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def slowest(self):
+        """(sql, total seconds) of the most expensive statement"""
+        if not self.query_time:
+            return None, 0.0
+        sql = max(self.query_time, key=self.query_time.get)
+        return sql, self.query_time[sql]
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statements executed at least threshold times"""
+        return [(sql, count) for sql, count in self.queries.most_common() if count >= threshold]
+
+    def as_dict(self):
+        slowest_sql, slowest_time = self.slowest()
+        return {
+            'queries': self.query_count,
+            'statements': self.statements,
+            'sql_ms': round(self.total_time * 1000, 3),
+            'connections': self.connections,
+            'slowest_sql': compact(slowest_sql) if slowest_sql else None,
+            'slowest_ms': round(slowest_time * 1000, 3),
+            'n_plus_one': [{'sql': compact(sql), 'count': count} for sql, count in self.repeated()]
+        }
+
+    def header_value(self):
+        """Compact value for the X-SQL-Stats debug header"""
+        data = self.as_dict()
+        return (f"queries={data['queries']}; statements={data['statements']}; sql_ms={data['sql_ms']}; "
+                f"connections={data['connections']}; slowest_ms={data['slowest_ms']}; "
+                f"n_plus_one={len(data['n_plus_one'])}")
+
+def compact(sql, limit=160):
+    """Single-line, truncated SQL for headers and logs"""
+    text = " ".join(sql.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that times execute and fetch calls"""
+
+    _last_sql = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._add_fetch_time(time.perf_counter() - started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size if size is not None else self.arraysize)
+        finally:
+            self._add_fetch_time(time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._add_fetch_time(time.perf_counter() - started)
+
+    def _record(self, sql, elapsed):
+        self._last_sql = sql
+        stats = current()
+        if stats is not None:
+            stats.record(sql, elapsed)
+
+    def _add_fetch_time(self, elapsed):
+        stats = current()
+        if stats is not None and self._last_sql:
+            stats.add_time(self._last_sql, elapsed)
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are profiled"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def current():
+    """Stats being collected on this thread, or None"""
+    return getattr(_local, 'stats', None)
+
+def start():
+    """Start collecting SQL stats on this thread"""
+    _local.stats = QueryStats()
+    return _local.stats
+
+def stop():
+    """Stop collecting and return the stats"""
+    stats = current()
+    _local.stats = None
+    return stats
+
+def connect(database, **kwargs):
+    """Open a connection, instrumented when a profile is active"""
+    stats = current()
+    if stats is None:
+        return sqlite3.connect(database, **kwargs)
+
+    stats.connections += 1
+    conn = sqlite3.connect(database, factory=ProfiledConnection, **kwargs)
+
+    def trace(statement):
+        stats.statements += 1
+    conn.set_trace_callback(trace)
+    return conn
+
+def init_app(app, header='X-SQL-Stats'):
+    """Profile every Flask request and report via a debug header and a log line"""
+    from flask import request
+
+    @app.before_request
+    def _start_sql_profile():
+        start()
+
+    @app.after_request
+    def _report_sql_profile(response):
+        stats = stop()
+        if stats is None:
+            return response
+
+        response.headers[header] = stats.header_value()
+        data = stats.as_dict()
+        message = (f"SQL {request.method} {request.path}: {data['queries']} queries, "
+                   f"{data['statements']} statements, {data['sql_ms']}ms, "
+                   f"{data['connections']} connections, slowest {data['slowest_ms']}ms "
+                   f"[{data['slowest_sql']}]")
+        if data['n_plus_one']:
+            repeated = "; ".join(f"{item['count']}x {item['sql']}" for item in data['n_plus_one'])
+            app.logger.warning(f"{message} - possible N+1: {repeated}")
+        else:
+            app.logger.info(message)
+        return response
+
+    @app.teardown_request
+    def _discard_sql_profile(exc):
+        stop()
@@ -0,0 +1,615 @@
+let cart = [];
+let selectedRow = null;
+let searchTimeout = null;
+let paymentMethod = 'cash'; // 'cash' or 'ecocash'
+
+// Store-and-forward queue - every sale is saved here first and pushed in the background
+const OFFLINE_QUEUE_KEY = 'lastkingz_offline_sales';
+const SALE_REQUEST_TIMEOUT_MS = 8000;
+const OFFLINE_SYNC_INTERVAL_MS = 30000;
+const OFFLINE_SYNC_BATCH_SIZE = 50;
+let offlineSyncInProgress = false;
+let offlineSyncRequested = false;
+
+// This terminal's copy of the catalog, so scans don't wait on the server
+const CATALOG_KEY = 'lastkingz_catalog';
+const CATALOG_SYNC_INTERVAL_MS = 60000;
+const CATALOG_FIELDS = ['id', 'barcode', 'name', 'price', 'stock', 'low_stock_threshold'];
+
+// Barcode input - search as you type
+document.getElementById('barcodeInput').addEventListener('input', function(e) {
+    const query = e.target.value.trim();
+
+    if (query.length < 2) {
+        hideSearchResults();
+        return;
+    }
+
+    // Debounce search
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(() => {
+        searchProducts(query);
+    }, 300);
+});
+
+// Barcode input enter key
+document.getElementById('barcodeInput').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        addToCart();
+    }
+});
+
+// Search products by name or barcode
+async function searchProducts(query) {
+    const response = await fetch(`/api/search-products?q=${encodeURIComponent(query)}`);
+    const data = await response.json();
+
+    if (data.success && data.products.length > 0) {
+        showSearchResults(data.products);
+    } else {
+        hideSearchResults();
+    }
+}
+
+// Show search results dropdown
+function showSearchResults(products) {
+    const resultsDiv = document.getElementById('searchResults');
+    resultsDiv.innerHTML = '';
+
+    products.forEach(product => {
+        const item = document.createElement('div');
+        item.style.cssText = 'padding: 10px; cursor: pointer; border-bottom: 1px solid #e2e8f0;';
+        item.innerHTML = `
+            <div style="font-weight: 600;">${product.name}</div>
+            <div style="font-size: 12px; color: #64748b;">Barcode: ${product.barcode} | Price: $${product.price.toFixed(2)} | Stock: ${product.stock}</div>
+        `;
+
+        item.addEventListener('mouseenter', function() {
+            this.style.background = '#f1f5f9';
+        });
+        item.addEventListener('mouseleave', function() {
+            this.style.background = 'white';
+        });
+        item.addEventListener('click', function() {
+            selectProduct(product);
+        });
+
+        resultsDiv.appendChild(item);
+    });
+
+    resultsDiv.style.display = 'block';
+}
+
+// Hide search results
+function hideSearchResults() {
+    document.getElementById('searchResults').style.display = 'none';
+}
+
+// Select product from search
+function selectProduct(product) {
+    document.getElementById('barcodeInput').value = product.barcode;
+    hideSearchResults();
+    addToCart();
+}
+
+// Add to cart
+async function addToCart() {
+    console.log('addToCart called');
+    const input = document.getElementById('barcodeInput').value.trim();
+    console.log('Input value:', input);
+
+    if (!input) {
+        console.log('No input, returning');
+        return;
+    }
+
+    hideSearchResults();
+
+    console.log('Looking up product:', input);
+    try {
+        const product = await lookupProduct(input);
+        console.log('Product:', product);
+
+        if (product) {
+            // Case barcodes and quantity-embedded labels add several units at once
+            const scanQuantity = product.scan_quantity || 1;
+            delete product.scan_quantity;
+            // Price-embedded labels sell at the label's price, each label its own line
+            const lineKey = product.label_code || product.barcode;
+            if (product.label_price !== undefined) {
+                product.price = product.label_price;
+                delete product.label_price;
+            }
+
+            // Check if product is in stock (skip for quick sale items)
+            if (!product.barcode.startsWith('QUICK')) {
+                if (product.stock <= 0) {
+                    showError(`${product.name} is out of stock!`, 'Out of Stock');
+                    document.getElementById('barcodeInput').value = '';
+                    document.getElementById('barcodeInput').focus();
+                    return;
+                }
+
+                // Check if adding to cart would exceed available stock
+                const currentCartQuantity = cart
+                    .filter(item => item.barcode === product.barcode)
+                    .reduce((sum, item) => sum + item.quantity, 0);
+
+                if (currentCartQuantity + scanQuantity > product.stock) {
+                    showWarning(`Only ${product.stock} units of ${product.name} available in stock!`, 'Stock Limit');
+                    document.getElementById('barcodeInput').value = '';
+                    document.getElementById('barcodeInput').focus();
+                    return;
+                }
+            }
+
+            const existingItem = cart.find(item => (item.label_code || item.barcode) === lineKey);
+            if (existingItem) {
+                existingItem.quantity += scanQuantity;
+            } else {
+                cart.push({
+                    ...product,
+                    quantity: scanQuantity
+                });
+            }
+            updateCartDisplay();
+            document.getElementById('barcodeInput').value = '';
+            document.getElementById('barcodeInput').focus();
+        } else {
+            showError('Product not found', 'Not Found');
+        }
+    } catch (error) {
+        console.error('Error in addToCart:', error);
+        showError('Error adding to cart: ' + error.message, 'Error');
+    }
+}
+
+// Add quick sale item
+async function addQuickSaleItem(itemId) {
+    // Format barcode as QUICK0001, QUICK0002, etc.
+    const barcode = `QUICK${itemId.toString().padStart(4, '0')}`;
+
+    // Quick sale items are in the products table, so the catalog has them
+    let product = null;
+    try {
+        product = await lookupProduct(barcode);
+    } catch (error) {
+        // Not in the terminal's catalog and the server is unreachable
+    }
+
+    if (product) {
+        const existingItem = cart.find(item => item.barcode === product.barcode);
+        if (existingItem) {
+            existingItem.quantity += 1;
+        } else {
+            cart.push({
+                ...product,
+                quantity: 1
+            });
+        }
+        updateCartDisplay();
+    } else {
+        showError('Quick sale item not found', 'Not Found');
+    }
+}
+
+// Plain barcodes come from the terminal's catalog; case codes, price labels and names need the server
+async function lookupProduct(input) {
+    const cached = loadCatalog().products[input];
+    if (cached) {
+        return {...cached};
+    }
+    const response = await fetchWithTimeout(`/api/product/${encodeURIComponent(input)}`, {}, SALE_REQUEST_TIMEOUT_MS);
+    const data = await response.json();
+    return data.success ? data.product : null;
+}
+
+// Update cart display
+function updateCartDisplay() {
+    const tbody = document.getElementById('cartItems');
+    tbody.innerHTML = '';
+
+    cart.forEach((item, index) => {
+        const row = tbody.insertRow();
+        row.dataset.index = index;
+        row.onclick = function() {
+            if (selectedRow) selectedRow.style.background = '';
+            selectedRow = this;
+            this.style.background = '#f1f5f9';
+        };
+
+        row.insertCell(0).textContent = item.name;
+        row.insertCell(1).textContent = item.quantity;
+        row.insertCell(2).textContent = `$${item.price.toFixed(2)}`;
+        row.insertCell(3).textContent = `$${(item.price * item.quantity).toFixed(2)}`;
+    });
+
+    updateTotal();
+}
+
+// Update total
+function updateTotal() {
+    const total = cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
+    document.getElementById('totalAmount').textContent = `$${total.toFixed(2)}`;
+    calculateChange();
+}
+
+// Calculate change
+function calculateChange() {
+    const total = cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
+    const cash = parseFloat(document.getElementById('cashReceived').value) || 0;
+    const change = cash - total;
+    document.getElementById('changeAmount').textContent = `$${Math.max(0, change).toFixed(2)}`;
+}
+
+// Remove selected item
+function removeSelectedItem() {
+    if (selectedRow) {
+        const index = parseInt(selectedRow.dataset.index);
+        cart.splice(index, 1);
+        selectedRow = null;
+        updateCartDisplay();
+    }
+}
+
+// Clear cart
+function clearCart() {
+    if (cart.length > 0) {
+        showConfirm(
+            'Are you sure you want to clear all items from the cart?',
+            'Clear Cart',
+            function() {
+                cart = [];
+                selectedRow = null;
+                updateCartDisplay();
+                document.getElementById('cashReceived').value = '';
+            }
+        );
+    }
+}
+
+// Complete sale
+async function completeSale() {
+    if (cart.length === 0) {
+        showWarning('Cart is empty', 'Empty Cart');
+        return;
+    }
+
+    const total = cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
+    const cash = parseFloat(document.getElementById('cashReceived').value) || 0;
+
+    if (cash < total) {
+        showError('Insufficient payment', 'Payment Error');
+        return;
+    }
+
+    const sale = {
+        client_sale_id: newClientSaleId(),
+        created_at: new Date().toISOString(),
+        items: cart,
+        cash_received: cash,
+        payment_method: paymentMethod,
+        print_receipt: true
+    };
+
+    // The sale is final once it is on this terminal - the server catches up in the background
+    queueOfflineSale(sale);
+    const lowStockAlerts = takeCachedStock(cart);
+
+    let message = `<div style="text-align: center; margin-bottom: 15px;">
+        <div style="font-size: 24px; font-weight: 600; color: #16a34a; margin-bottom: 10px;">Sale Completed</div>
+    </div>`;
+
+    message += `<div style="background: #f8fafc; padding: 15px; border-radius: 8px; margin-bottom: 15px;">
+        <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
+            <span><strong>Total:</strong></span>
+            <span style="color: #16a34a; font-weight: 600;">$${total.toFixed(2)}</span>
+        </div>
+        <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
+            <span><strong>Cash Received:</strong></span>
+            <span>$${cash.toFixed(2)}</span>
+        </div>
+        <div style="display: flex; justify-content: space-between; padding-top: 8px; border-top: 2px solid #e2e8f0;">
+            <span><strong>Change:</strong></span>
+            <span style="font-size: 18px; font-weight: 700; color: #2563eb;">$${(cash - total).toFixed(2)}</span>
+        </div>
+    </div>`;
+
+    // Show low stock alerts if any
+    if (lowStockAlerts.length > 0) {
+        message += '<div style="background: #fffbeb; border: 1px solid #fbbf24; padding: 12px; border-radius: 6px; margin-top: 15px;">';
+        message += '<div style="font-weight: 600; color: #d97706; margin-bottom: 8px;">⚠️ LOW STOCK ALERTS:</div>';
+        lowStockAlerts.forEach(alert => {
+            message += `<div style="color: #92400e; font-size: 13px; margin-top: 4px;">${alert}</div>`;
+        });
+        message += '</div>';
+    }
+
+    showSuccess(message, 'Sale Completed');
+    resetAfterSale();
+
+    // Push it now so the receipt prints straight away when the server is reachable
+    flushOfflineQueue();
+}
+
+// Clear cart after a completed or queued sale
+function resetAfterSale() {
+    cart = [];
+    selectedRow = null;
+    updateCartDisplay();
+    document.getElementById('cashReceived').value = '';
+    document.getElementById('barcodeInput').focus();
+}
+
+// Client-generated sale id, so a resent sale is only applied once
+function newClientSaleId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
+async function fetchWithTimeout(url, options, timeoutMs) {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), timeoutMs);
+    try {
+        return await fetch(url, {...options, signal: controller.signal});
+    } finally {
+        clearTimeout(timer);
+    }
+}
+
+function loadOfflineQueue() {
+    try {
+        return JSON.parse(localStorage.getItem(OFFLINE_QUEUE_KEY)) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function saveOfflineQueue(queue) {
+    localStorage.setItem(OFFLINE_QUEUE_KEY, JSON.stringify(queue));
+    updateOfflineStatus(queue.length);
+}
+
+function queueOfflineSale(sale) {
+    const queue = loadOfflineQueue();
+    queue.push(sale);
+    saveOfflineQueue(queue);
+}
+
+function loadCatalog() {
+    try {
+        return JSON.parse(localStorage.getItem(CATALOG_KEY)) || {version: 0, products: {}};
+    } catch (error) {
+        return {version: 0, products: {}};
+    }
+}
+
+function saveCatalog(catalog) {
+    localStorage.setItem(CATALOG_KEY, JSON.stringify(catalog));
+}
+
+// Fetch the products changed since the catalog version this terminal holds
+async function syncCatalog() {
+    try {
+        const since = loadCatalog().version;
+        const response = await fetchWithTimeout(`/api/products/changes?since=${since}`, {}, SALE_REQUEST_TIMEOUT_MS);
+        const data = await response.json();
+        if (!data.success) return;
+
+        // Re-read in case a sale took stock while the fetch was in flight
+        const products = data.full ? {} : loadCatalog().products;
+        const barcodes = {};
+        Object.values(products).forEach(product => { barcodes[product.id] = product.barcode; });
+        data.deleted.forEach(id => delete products[barcodes[id]]);
+        data.products.forEach(product => {
+            // A changed barcode leaves its old entry behind
+            if (barcodes[product.id] !== undefined) delete products[barcodes[product.id]];
+            products[product.barcode] = Object.fromEntries(CATALOG_FIELDS.map(field => [field, product[field]]));
+        });
+        saveCatalog({version: data.version, products});
+    } catch (error) {
+        // Offline - keep selling from the catalog already held
+    }
+}
+
+// Take a sale's stock from the terminal's catalog and return its low stock alerts
+function takeCachedStock(items) {
+    const catalog = loadCatalog();
+    const alerts = [];
+    items.forEach(item => {
+        const product = catalog.products[item.barcode];
+        if (!product || item.barcode.startsWith('QUICK')) return;
+        product.stock -= item.quantity;
+        if (product.stock <= product.low_stock_threshold) {
+            const alert = `LOW STOCK ALERT: ${product.name} - Only ${product.stock} left!`;
+            if (!alerts.includes(alert)) alerts.push(alert);
+        }
+    });
+    saveCatalog(catalog);
+    return alerts;
+}
+
+function updateOfflineStatus(count) {
+    updateStatus(count > 0 ? `📦 ${count} sale(s) waiting to sync` : '');
+}
+
+function describeOfflineSale(sale, reason) {
+    const total = sale.items.reduce((sum, item) => sum + (item.price * item.quantity), 0);
+    const when = new Date(sale.created_at).toLocaleString();
+    return `${when} - $${total.toFixed(2)} (${sale.items.length} item(s)): ${reason}`;
+}
+
+// Push queued sales to the server in order; keep them if the server is still unreachable
+async function flushOfflineQueue() {
+    if (offlineSyncInProgress) {
+        // Go again when the push in flight finishes, so a sale just made isn't left for the interval
+        offlineSyncRequested = true;
+        return;
+    }
+    let queue = loadOfflineQueue();
+    if (queue.length === 0) return;
+
+    offlineSyncInProgress = true;
+    offlineSyncRequested = false;
+    let pushed = false;
+    let more = false;
+    try {
+        const batch = queue.slice(0, OFFLINE_SYNC_BATCH_SIZE);
+        const response = await fetchWithTimeout('/api/sync-sales', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({sales: batch})
+        }, SALE_REQUEST_TIMEOUT_MS);
+        const data = await response.json();
+        if (!data.success) return;
+
+        pushed = true;
+        const done = new Set();
+        const conflicts = [];
+        const rejected = [];
+        let receiptFailed = false;
+        data.results.forEach(result => {
+            if (!result.retry) done.add(result.client_sale_id);
+            if (result.receipt_printed === false) receiptFailed = true;
+            (result.conflicts || []).forEach(conflict => conflicts.push(`${conflict.name}: ${conflict.message}`));
+            if (result.status === 'rejected' && !result.retry) {
+                const sale = batch.find(queued => queued.client_sale_id === result.client_sale_id);
+                rejected.push(sale ? describeOfflineSale(sale, result.message) : result.message);
+            }
+        });
+
+        more = queue.length > batch.length && done.size > 0;
+
+        // Re-read in case a sale was queued while the push was in flight
+        queue = loadOfflineQueue().filter(sale => !done.has(sale.client_sale_id));
+        saveOfflineQueue(queue);
+
+        // The server won't take these - the cashier has to sort them out by hand
+        if (rejected.length > 0) {
+            let message = `<div style="margin-bottom: 10px;">These offline sales were not recorded:</div>${rejected.join('<br>')}`;
+            if (conflicts.length > 0) {
+                message += `<div style="margin-top: 10px;">Synced with conflicts:</div>${conflicts.join('<br>')}`;
+            }
+            showError(message, 'Offline Sales Rejected');
+        } else if (conflicts.length > 0) {
+            showWarning(conflicts.join('<br>'), 'Offline Sales Synced With Conflicts');
+        } else if (receiptFailed) {
+            showWarning('⚠ Receipt saved to file (printer unavailable)', 'Receipt Not Printed');
+        }
+    } catch (error) {
+        // Still offline - try again on the next interval, without printing receipts for sales long gone
+        saveOfflineQueue(loadOfflineQueue().map(sale => ({...sale, print_receipt: false})));
+    } finally {
+        offlineSyncInProgress = false;
+    }
+    if (pushed && (offlineSyncRequested || more)) {
+        flushOfflineQueue();
+    }
+}
+
+// Payment method functions
+function setPaymentMethod(method) {
+    paymentMethod = method;
+
+    const cashBtn = document.getElementById('paymentMethodCash');
+    const ecocashBtn = document.getElementById('paymentMethodEcocash');
+    const changeDisplay = document.getElementById('changeDisplay');
+    const amountLabel = document.getElementById('amountLabel');
+
+    if (method === 'cash') {
+        cashBtn.className = 'btn btn-primary';
+        ecocashBtn.className = 'btn btn-secondary';
+        changeDisplay.style.display = 'flex';
+        amountLabel.textContent = 'Cash Received';
+    } else {
+        cashBtn.className = 'btn btn-secondary';
+        ecocashBtn.className = 'btn btn-primary';
+        changeDisplay.style.display = 'none';
+        amountLabel.textContent = 'EcoCash Amount';
+        document.getElementById('changeAmount').textContent = '$0.00';
+    }
+
+    calculateChange();
+}
+
+// Keypad functions
+let keypadMode = 'barcode'; // 'barcode' or 'payment'
+
+function setKeypadMode(mode) {
+    keypadMode = mode;
+
+    // Update button styles
+    const barcodeBtn = document.getElementById('keypadModeBarcode');
+    const paymentBtn = document.getElementById('keypadModePayment');
+
+    if (mode === 'barcode') {
+        barcodeBtn.className = 'btn btn-primary';
+        paymentBtn.className = 'btn btn-secondary';
+        document.getElementById('barcodeInput').focus();
+    } else {
+        barcodeBtn.className = 'btn btn-secondary';
+        paymentBtn.className = 'btn btn-primary';
+        document.getElementById('cashReceived').focus();
+    }
+}
+
+function keypadInput(value) {
+    const targetInput = keypadMode === 'barcode' ? 'barcodeInput' : 'cashReceived';
+    const input = document.getElementById(targetInput);
+    input.value += value;
+    input.focus();
+
+    // Trigger change calculation for payment
+    if (keypadMode === 'payment') {
+        calculateChange();
+    }
+}
+
+function keypadClear() {
+    const targetInput = keypadMode === 'barcode' ? 'barcodeInput' : 'cashReceived';
+    const input = document.getElementById(targetInput);
+    input.value = '';
+    input.focus();
+
+    // Trigger change calculation for payment
+    if (keypadMode === 'payment') {
+        calculateChange();
+    }
+}
+
+// Auto-focus barcode input on page load and keep it focused
+document.addEventListener('DOMContentLoaded', function() {
+    const barcodeInput = document.getElementById('barcodeInput');
+
+    // Focus on load
+    barcodeInput.focus();
+
+    // Keep the terminal's catalog current and push any sales still queued
+    syncCatalog();
+    setInterval(syncCatalog, CATALOG_SYNC_INTERVAL_MS);
+    updateOfflineStatus(loadOfflineQueue().length);
+    flushOfflineQueue();
+    setInterval(flushOfflineQueue, OFFLINE_SYNC_INTERVAL_MS);
+    window.addEventListener('online', flushOfflineQueue);
+
+    // Re-focus when clicking anywhere on the page (except specific inputs)
+    document.addEventListener('click', function(e) {
+        // Don't interfere if clicking on payment input, buttons, or cart
+        if (e.target.id !== 'cashReceived' &&
+            e.target.tagName !== 'BUTTON' &&
+            e.target.tagName !== 'INPUT' &&
+            e.target.tagName !== 'TR' &&
+            e.target.tagName !== 'TD') {
+            barcodeInput.focus();
+        }
+    });
+
+    // Re-focus after any action that clears the input
+    const originalAddToCart = addToCart;
+    window.addToCart = async function() {
+        await originalAddToCart();
+        setTimeout(() => barcodeInput.focus(), 100);
+    };
+});
@@ -0,0 +1,142 @@
+"""
+Fingerprinted, long-cached static files
+url_for('static', ...) adds a hash of the file's contents (?v=...), and
+requests carrying the current hash are answered with an immutable one-year
+Cache-Control, so terminals only fetch a stylesheet or script again after it
+changes. Gzip and brotli copies made by `python static_assets.py` (run from
+build.sh) are served to browsers that accept them.
+
+Usage:
+    python static_assets.py              # write .gz/.br next to each .css/.js
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.json')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+def load_brotli():
+    """brotli module, or None when it isn't installed (gzip copies only)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+class StaticAssets:
+    """Content hashes and precompressed variants of the files in a static folder"""
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, Tuple[float, str]] = {}   # filename -> (mtime, hash)
+
+    def fingerprint(self, filename: str) -> Optional[str]:
+        """Short hash of a static file's contents, recomputed only when it changes"""
+        path = safe_join(self.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except (OSError, TypeError):
+            return None
+
+        with self._lock:
+            cached = self._hashes.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (mtime, digest)
+        return digest
+
+    def variant(self, filename: str, accept_encoding) -> Tuple[str, Optional[str]]:
+        """(file to send, Content-Encoding) - a compressed copy when one is current and accepted"""
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            return filename, None
+
+        for encoding, suffix in ENCODINGS:
+            if encoding in accept_encoding:
+                try:
+                    if os.path.getmtime(path + suffix) >= os.path.getmtime(path):
+                        return filename + suffix, encoding
+                except OSError:
+                    pass
+        return filename, None
+
+    def compress(self) -> List[str]:
+        """Write .gz (and .br when brotli is installed) copies of text assets; returns files written"""
+        brotli = load_brotli()
+        written = []
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if not name.endswith(COMPRESSIBLE):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    data = f.read()
+
+                variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+                if brotli is not None:
+                    variants.append(('.br', brotli.compress(data, quality=11)))
+                for suffix, compressed in variants:
+                    with open(path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    written.append(path + suffix)
+        return written
+
+def init_app(app) -> StaticAssets:
+    """Fingerprint static URLs and serve static files with long-lived caching"""
+    assets = StaticAssets(app.static_folder)
+
+    @app.url_defaults
+    def add_fingerprint(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            fingerprint = assets.fingerprint(values['filename'])
+            if fingerprint:
+                values['v'] = fingerprint
+
+    def static(filename):
+        served, encoding = assets.variant(filename, request.accept_encodings)
+        response = send_from_directory(app.static_folder, served,
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+
+        # Only a URL naming the current contents may be cached forever
+        version = request.args.get('v')
+        if version and version == assets.fingerprint(filename):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    app.view_functions['static'] = static
+    return assets
+
+def main():
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    written = StaticAssets(folder).compress()
+    for path in written:
+        print(f"  {os.path.relpath(path, folder)}  {os.path.getsize(path):>8,} bytes")
+    print(f"{len(written)} compressed files written"
+          + ("" if load_brotli() else " (install brotli for .br copies)"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Background tasks for the Tk desktop client
+Runs database and printer work on worker threads and hands the results back
+to the Tk main loop through a queue polled with root.after, so the window
+keeps responding during checkout, printing and dashboard refreshes.
+
+Worker functions must not touch widgets - do that in on_success/on_error,
+which always run on the Tk thread.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class Task:
+    """Handle for one submitted background task"""
+
+    def __init__(self, name, on_success=None, on_error=None):
+        self.name = name
+        self.on_success = on_success
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop the task if it hasn't started and drop its result either way"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+class TaskExecutor:
+    """Worker pool whose results are delivered on the Tk main loop"""
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root, max_workers=2, on_busy_change=None, poll_interval=POLL_INTERVAL_MS):
+        """
+        Args:
+            root: Tk root used to schedule result polling
+            max_workers: Threads for independent work (lookups, dashboard queries)
+            on_busy_change: Called with the number of pending tasks whenever it changes
+            poll_interval: Milliseconds between result queue checks while tasks are pending
+        """
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self.poll_interval = poll_interval
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pos-worker")
+        # Sales and printer jobs run one at a time, in the order they were submitted
+        self._serial = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pos-serial")
+        self._results = queue.Queue()
+        self._pending = set()       # Only touched on the Tk thread
+        self._reported_count = 0
+        self._poll_id = None
+
+    def submit(self, func, *args, on_success=None, on_error=None, serial=False, name=None, **kwargs) -> Task:
+        """
+        Run func(*args, **kwargs) on a worker thread
+
+        Args:
+            on_success: Called on the Tk thread with the return value
+            on_error: Called on the Tk thread with the exception; defaults to Tk's error report
+            serial: Queue behind other serial tasks instead of running in parallel
+        """
+        task = Task(name or getattr(func, '__name__', 'task'), on_success, on_error)
+        pool = self._serial if serial else self._pool
+        task.future = pool.submit(self._run, task, func, args, kwargs)
+
+        self._pending.add(task)
+        self._busy_changed()
+        self._schedule_poll()
+        return task
+
+    def _run(self, task, func, args, kwargs):
+        """Worker thread body - never raises, results go through the queue"""
+        try:
+            self._results.put((task, func(*args, **kwargs), None))
+        except Exception as e:
+            self._results.put((task, None, e))
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def is_busy(self) -> bool:
+        return bool(self._pending)
+
+    def cancel_all(self):
+        """Cancel queued tasks and ignore results of running ones"""
+        for task in list(self._pending):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel everything and stop the worker threads"""
+        self.cancel_all()
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass  # Root window already destroyed
+            self._poll_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._serial.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Deliver finished task results on the Tk thread"""
+        self._poll_id = None
+        finished = []
+        while True:
+            try:
+                finished.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+
+        # Cancelled before starting - these never report through the queue
+        self._pending = {task for task in self._pending if not task.future.cancelled()}
+        for task, _, _ in finished:
+            self._pending.discard(task)
+
+        if self._pending:
+            self._schedule_poll()
+        self._busy_changed()
+
+        for task, result, error in finished:
+            if task.cancelled:
+                continue
+            try:
+                if error is None:
+                    if task.on_success:
+                        task.on_success(result)
+                elif task.on_error:
+                    task.on_error(error)
+                else:
+                    self.root.report_callback_exception(type(error), error, error.__traceback__)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+
+    def _busy_changed(self):
+        count = len(self._pending)
+        if count != self._reported_count:
+            self._reported_count = count
+            if self.on_busy_change:
+                self.on_busy_change(count)
@@ -0,0 +1,100 @@
+"""
+Test archiving old sales into yearly databases and reports spanning them
+Four lager sales from 2023 to 2025 in a replicated shop database; the archive files
+are written beside it in a temporary directory
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+from database import Database
+from user_auth import UserAuth
+from archive_manager import ArchiveManager
+from replication import ReplicationManager
+
+def test_archive_manager():
+    """Test archival, replication suppression and spanning reports"""
+    print("=" * 60)
+    print("Testing Sales Archival")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "archive_test.db"))
+        UserAuth(db.db_name)
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        item = {'product_id': 1, 'barcode': "012345600098", 'name': "Test Lager 440ml",
+                'quantity': 2, 'price': 1.50, 'subtotal': 3.00}
+        for sale_date in ["2023-06-01 10:00:00", "2024-03-05 12:00:00", "2024-11-20 09:30:00",
+                          "2025-02-01 08:00:00"]:
+            db.save_sale([item], 3.00, 5.00, 2.00, sale_date=sale_date)
+        replication = ReplicationManager(db)
+        replication.enable("shop1")
+        logged = len(replication.pending_changes())
+
+        # Test 1: Cutoff is the start of a closed month
+        print("\n[TEST 1] Computing the archive cutoff...")
+        assert ArchiveManager.cutoff_for(12, date(2025, 3, 15)) == "2024-03-01"
+        assert ArchiveManager.cutoff_for(2, date(2025, 1, 31)) == "2024-11-01"
+        print("  [PASS] Cutoffs fall on month boundaries")
+
+        # Test 2: Old sales move into one file per year
+        print("\n[TEST 2] Archiving sales before 2025...")
+        archives = ArchiveManager(db)
+        archives.BATCH_SIZE, archives.BATCH_PAUSE = 1, 0
+        move_batch, batches = archives._move_batch, []
+
+        def checkout_then_move(*args):
+            # The write lock must be free before every batch, or checkouts would wait for the whole year
+            other = sqlite3.connect(db.db_name, timeout=0)
+            other.execute("BEGIN IMMEDIATE")
+            other.rollback()
+            other.close()
+            batches.append(args[3:])
+            return move_batch(*args)
+
+        archives._move_batch = checkout_then_move
+        results = archives.archive("2025-01-01")
+        del archives._move_batch
+        assert [(r['year'], r['sales'], r['items']) for r in results] == [("2023", 1, 1), ("2024", 2, 2)]
+        assert db.get_sales_report()['total_sales'] == 1
+        assert os.path.exists(archives.archive_path("2024"))
+        assert len(replication.pending_changes()) == logged
+        assert len(batches) == 5    # One per sale, plus one per year finding nothing left
+        assert [(a['year'], a['sales'], a['first_sale_date']) for a in archives.get_archives()] == \
+            [("2023", 1, "2023-06-01 10:00:00"), ("2024", 2, "2024-03-05 12:00:00")]
+        print("  [PASS] 3 sales archived one batch at a time, no replication deletes logged")
+
+        # Test 3: Hot-only ranges don't attach anything
+        print("\n[TEST 3] Reporting on hot data...")
+        assert archives.spanning(db, "2025-01-01", "2025-12-31") is db
+        print("  [PASS] Hot database used directly")
+
+        # Test 4: Ranges reaching archived periods span hot and archive data
+        print("\n[TEST 4] Reporting across archives...")
+        spanning = archives.spanning(db, "2024-01-01", "2025-12-31")
+        assert [a['year'] for a in spanning.archives] == ["2024"]
+        summary = spanning.get_sales_report("2024-01-01", "2025-12-31")
+        assert summary['total_sales'] == 3 and summary['total_revenue'] == 9.00, summary
+        assert archives.spanning(db).get_sales_report()['total_sales'] == 4
+        print(f"  [PASS] {summary['total_sales']} sales from hot + 2024 archive")
+
+        # Test 5: Archiving again is a no-op
+        print("\n[TEST 5] Re-running the archive...")
+        assert archives.archive("2025-01-01") == []
+        assert archives.get_archives()[1]['sales'] == 2
+        print("  [PASS] Nothing left to archive")
+
+    print("\n[SUCCESS] All archive tests passed!")
+
+def main():
+    try:
+        test_archive_manager()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Test paced, verified and rotated database backups
+Backs up a 50-product database into a temporary backups folder, including copies
+attempted while another connection keeps adding products
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+from database import BackupBusy, Database
+from backup_service import BackupService, verify_backup
+
+def test_backup_service():
+    """Test backup, verification, rotation and status"""
+    print("=" * 60)
+    print("Testing Backup Service")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "backup_test.db"))
+        for i in range(50):
+            db.add_product(f"2000000{i:05d}", f"Product {i}", 1.00 + i, 10, 2)
+        service = BackupService(db, os.path.join(tmp, "backups"), interval=3600, keep=2)
+
+        # Test 1: Status before any backup
+        print("\n[TEST 1] Reading status before the first backup...")
+        assert service.get_status()['success'] is None and service.is_due()
+        print("  [PASS] No backup yet")
+
+        # Test 2: A backup is compressed and passes its integrity check
+        print("\n[TEST 2] Backing up in page steps...")
+        service.PAGES_PER_STEP = 1
+        status = service.run_backup()
+        assert status['success'] and status['integrity'] == 'ok', status
+        path = service.list_backups()[0]
+        with gzip.open(path) as f:
+            assert f.read(16) == b"SQLite format 3\x00"
+        assert verify_backup(path) == 'ok'
+        assert not service.is_due()
+        print(f"  [PASS] {status['file']} ({status['size_bytes']} of {status['database_bytes']} bytes)")
+
+        # Test 3: Rotation keeps the newest backups
+        print("\n[TEST 3] Rotating old backups...")
+        oldest = os.path.join(service.backup_dir, "backup_test-20240101-000000.db.gz")
+        os.rename(path, oldest)
+        shutil.copy(oldest, os.path.join(service.backup_dir, "backup_test-20240102-000000.db.gz"))
+        status = service.run_backup()
+        assert status['removed'] == [os.path.basename(oldest)], status
+        assert len(service.list_backups()) == 2
+        print(f"  [PASS] Removed {status['removed'][0]}")
+
+        # Test 4: Status is shared through the backup directory
+        print("\n[TEST 4] Reading status from another instance...")
+        other = BackupService(db, service.backup_dir)
+        assert other.get_status()['file'] == status['file']
+        print("  [PASS] Status persisted")
+
+        # Test 5: A copy that every write restarts is given up and retried later, backing off
+        print("\n[TEST 5] Backing up while another connection keeps writing...")
+        steps, writes = [], []
+        sleep = time.sleep
+
+        def write_between_steps(seconds):
+            steps.append(seconds)
+            assert len(steps) < 200, "Backup kept restarting without giving up"
+            writes.append(seconds)
+            db.add_product(f"3000000{len(writes):05d}", f"Busy {len(writes)}", 1.00, 10, 2)
+
+        copy = os.path.join(tmp, "busy_copy.db")
+        time.sleep = write_between_steps
+        try:
+            try:
+                db.backup_to(copy, pages=1, pause=0.001)
+                raise AssertionError("Busy backup completed")
+            except BackupBusy:
+                pass
+            steps.clear()
+            first = service.run_backup()
+            steps.clear()
+            second = service.run_backup()
+        finally:
+            time.sleep = sleep
+        assert not first['success'] and first['busy_runs'] == 1, first
+        assert second['busy_runs'] == 2 and f"retrying in {2 * service.RETRY_DELAY} seconds" in second['message']
+        assert not service.is_due() and len(service.list_backups()) == 2
+        assert not [name for name in os.listdir(service.backup_dir) if name.endswith('.tmp')]
+        print(f"  [PASS] Gave up twice, retrying after {service.RETRY_DELAY}s then {2 * service.RETRY_DELAY}s")
+
+        status = service.run_backup()
+        assert status['success'] and 'retry_at' not in service.get_status()
+        print("  [PASS] Quiet database backed up and the backoff cleared")
+
+    print("\n[SUCCESS] All backup service tests passed!")
+
+def main():
+    try:
+        test_backup_service()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Test barcode check digits, variable measure and case code decoding
+Decoding is checked on its own first; lookups use a lager and a per-label biltong
+product plus case codes registered against them
+"""
+
+import os
+import sys
+import tempfile
+from database import Database
+from barcode_decoder import decode_barcode, is_valid_barcode, with_check_digit
+
+def test_check_digits():
+    """Test check digit verification for each symbology"""
+    print("=" * 60)
+    print("Testing Barcode Check Digits")
+    print("=" * 60)
+
+    print("\n[TEST 1] Accepting valid codes...")
+    for code in ["036000291452", "4006381333931", "96385074", "10012345678902"]:
+        assert is_valid_barcode(code), code
+        print(f"  [PASS] {decode_barcode(code).symbology}: {code}")
+
+    print("\n[TEST 2] Rejecting bad reads...")
+    for code in ["036000291453", "4006381333932", "96385075", "1001234567890", "ABC123456789"]:
+        assert not is_valid_barcode(code), code
+        print(f"  [PASS] Rejected: {code}")
+
+def test_decoding():
+    """Test variable measure and case codes against a product table"""
+    print("\n" + "=" * 60)
+    print("Testing Barcode Decoding")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "barcode_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        db.add_product("2012345000001", "Biltong (per label)", 0.01, 100, 10)
+
+        # Test 3: Price-embedded label
+        print("\n[TEST 3] Decoding price-embedded label...")
+        product, decoded = db.find_scanned_product(with_check_digit("201234501299"))
+        assert product['name'] == "Biltong (per label)"
+        assert decoded.kind == 'price' and decoded.price == 12.99, decoded
+        print(f"  [PASS] {product['name']} at ${decoded.price:.2f}")
+
+        # Test 4: A registered case code adds its own units of its own product
+        print("\n[TEST 4] Decoding registered case codes...")
+        lager = db.get_product_by_barcode("012345600098")
+        db.add_case_code(with_check_digit("1001234560009"), lager['id'], 24)
+        db.add_case_code("6009876543210", lager['id'], 12)     # An EAN-13 on a 12-pack tray
+        product, decoded = db.find_scanned_product(with_check_digit("1001234560009"))
+        assert product['barcode'] == "012345600098"
+        assert decoded.kind == 'case' and decoded.quantity == 24, decoded
+        product, decoded = db.find_scanned_product("6009876543210")
+        assert product['id'] == lager['id'] and decoded.quantity == 12
+        print("  [PASS] Case of 24 despite indicator 1, tray of 12 under its own EAN")
+
+        # Test 5: An unregistered case code finds the unit product but no case size
+        print("\n[TEST 5] Decoding an unregistered case code...")
+        product, decoded = db.find_scanned_product(with_check_digit("3001234560009"))
+        assert product['barcode'] == "012345600098"
+        assert decoded.kind == 'case' and decoded.quantity is None, decoded
+        db.delete_product(lager['id'])
+        assert db.find_scanned_product("6009876543210")[0] is None and db.get_case_code("6009876543210") is None
+        print("  [PASS] Case size unknown until registered, case codes go with their product")
+
+    print("\n[SUCCESS] All barcode decoder tests passed!")
+
+def main():
+    try:
+        test_check_digits()
+        test_decoding()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
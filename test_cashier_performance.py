@@ -0,0 +1,124 @@
+"""
+Test the cashier throughput and shift performance report
+Shifts are built from single-product sales by the default cashier and manager
+accounts; the last test bulk-loads 6000 sales and archives all but the last few days
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from database import Database
+from archive_manager import ArchiveManager
+from cashier_performance import CashierPerformance, CSV_COLUMNS
+from test_support import sell
+
+def test_cashier_performance():
+    """Test shift splitting, throughput figures, CSV output and archives"""
+    print("=" * 60)
+    print("Testing Cashier Performance")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "performance_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        lager = db.get_product_by_barcode("012345600098")
+        conn = db.get_connection()
+        users = dict(conn.execute("SELECT username, id FROM users").fetchall())
+        conn.close()
+        cashier, manager = users['cashier'], users['manager']
+
+        # Morning shift with a 10 and a 48 minute lull, then one sale after lunch
+        for quantity, sale_date in [(2, "2025-03-03 08:00:00"), (1, "2025-03-03 08:10:00"),
+                                    (3, "2025-03-03 08:12:00"), (2, "2025-03-03 09:00:00"),
+                                    (1, "2025-03-03 14:00:00")]:
+            sell(db, lager, quantity, sale_date, cashier)
+        sell(db, lager, 4, "2025-03-03 10:00:00", manager)
+        sell(db, lager, 9, "2025-03-03 11:00:00")     # Synced sale with no cashier
+        performance = CashierPerformance(db, ArchiveManager(db))
+
+        # Test 1: A long gap starts a new shift
+        print("\n[TEST 1] Splitting shifts...")
+        report = performance.report("2025-03-03", "2025-03-03", offset=0)
+        shifts = [(s['username'], s['shift_start'], s['sales']) for s in report['shifts']]
+        assert shifts == [("cashier", "2025-03-03 08:00:00", 4), ("cashier", "2025-03-03 14:00:00", 1),
+                          ("manager", "2025-03-03 10:00:00", 1)], shifts
+        print("  [PASS] Two cashier shifts, one manager shift, unattributed sale ignored")
+
+        # Test 2: Throughput and idle time for the morning shift
+        print("\n[TEST 2] Measuring the morning shift...")
+        morning = report['shifts'][0]
+        assert morning['duration_minutes'] == 60.0 and morning['sales_per_hour'] == 4.0
+        assert morning['items'] == 8 and morning['items_per_basket'] == 2.0
+        assert morning['avg_basket'] == 3.0 and morning['items_per_minute'] == round(8 / 60, 2)
+        assert (morning['idle_gaps'], morning['idle_minutes'], morning['longest_gap_minutes']) == (2, 58.0, 48.0)
+        assert report['shifts'][1]['sales_per_hour'] is None
+        print("  [PASS] 4 sales an hour, 58 idle minutes in 2 gaps")
+
+        # Test 3: Per-cashier summary and filtering
+        print("\n[TEST 3] Summarising cashiers...")
+        summary = {c['username']: c for c in report['cashiers']}
+        assert summary['cashier']['shifts'] == 2 and summary['cashier']['sales'] == 5
+        assert summary['cashier']['revenue'] == 13.5 and summary['cashier']['hours'] == 1.0
+        only = performance.report("2025-03-03", "2025-03-03", manager, offset=0)
+        assert [c['username'] for c in only['cashiers']] == ["manager"]
+        print("  [PASS] Cashier totals over both shifts, one cashier on request")
+
+        # Test 4: CSV stream
+        print("\n[TEST 4] Streaming CSV...")
+        rows = list(csv.DictReader(performance.csv_lines("2025-03-03", "2025-03-03", offset=0)))
+        assert len(rows) == 3 and list(rows[0]) == CSV_COLUMNS and rows[0]['idle_minutes'] == "58.0"
+        try:
+            performance.csv_lines("2025-03-04", "2025-03-03")
+            assert False, "Reversed range accepted"
+        except ValueError:
+            pass
+        print("  [PASS] Header plus one line per shift, bad range rejected up front")
+
+        # Test 5: Local time and archived sales
+        print("\n[TEST 5] Shifting time zone and archiving...")
+        local = performance.report("2025-03-03", "2025-03-03", offset=2 * 3600)
+        assert local['shifts'][0]['shift_start'] == "2025-03-03 10:00:00"
+        ArchiveManager(db).archive("2025-04-01")
+        assert performance.report("2025-03-03", "2025-03-03", offset=0)['shifts'] == report['shifts']
+        print("  [PASS] Shifts in shop time, archived sales still reported")
+
+        # Test 6: A range spanning the archive stays fast with thousands of sales on each side
+        print("\n[TEST 6] Timing a report across the archive boundary...")
+        conn = db.get_connection()
+        conn.execute("BEGIN")
+        for n in range(6000):
+            # One sale every 6 minutes from 10 March, two lines of one lager each
+            sale_id = conn.execute("""
+                INSERT INTO sales (total_amount, cash_received, change_given, cashier_id, sale_date)
+                VALUES (3.0, 3.0, 0.0, ?, datetime(1741564800 + ? * 360, 'unixepoch'))
+            """, (cashier if n % 2 else manager, n)).lastrowid
+            conn.executemany("""
+                INSERT INTO sale_items (sale_id, product_id, barcode, product_name, quantity, unit_price, subtotal)
+                VALUES (?, ?, ?, ?, 1, 1.50, 1.50)
+            """, [(sale_id, lager['id'], lager['barcode'], lager['name'])] * 2)
+        conn.commit()
+        conn.close()
+        ArchiveManager(db).archive("2025-04-01")
+        started = time.perf_counter()
+        spanning = performance.report("2025-03-20", "2025-04-10", offset=0)
+        elapsed = time.perf_counter() - started
+        in_range = sum(1 for n in range(6000) if 1742428800 <= 1741564800 + n * 360 < 1744329600)
+        assert sum(c['sales'] for c in spanning['cashiers']) == in_range
+        assert sum(c['items'] for c in spanning['cashiers']) == 2 * in_range
+        assert elapsed < 2, f"Report across the archive took {elapsed:.2f}s"
+        print(f"  [PASS] {in_range} sales in {elapsed:.3f}s")
+
+    print("\n[SUCCESS] All cashier performance tests passed!")
+
+def main():
+    try:
+        test_cashier_performance()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Test the in-process catalog cache used by the web app
+A lager is cached first; later products and edits are written straight to the
+database, as another worker would
+"""
+
+import os
+import sys
+import tempfile
+from database import Database
+from catalog_cache import CatalogCache
+
+def test_catalog_cache():
+    """Test lookups, stock patches and invalidation"""
+    print("=" * 60)
+    print("Testing Catalog Cache")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "catalog_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        catalog = CatalogCache(db, ttl=300)
+
+        # Test 1: Scans are answered from memory, including decoded codes
+        print("\n[TEST 1] Looking up scanned codes...")
+        product, decoded = catalog.find_scanned_product("012345600098")
+        assert product['name'] == "Test Lager 440ml" and decoded is None
+        product, decoded = catalog.find_scanned_product("0012345600098")
+        assert product['barcode'] == "012345600098" and decoded.kind == 'unit'
+        assert not catalog.is_stale()
+        print("  [PASS] Exact and EAN-13 forms found")
+
+        # Test 2: Callers get copies they can modify
+        print("\n[TEST 2] Modifying a returned product...")
+        product['price'] = 0.01
+        assert catalog.find_scanned_product("012345600098")[0]['price'] == 1.50
+        print("  [PASS] Cached product unchanged")
+
+        # Test 3: Stock written by this process is patched in place
+        print("\n[TEST 3] Patching stock after a sale...")
+        db.update_product_stock(product['id'], 97)
+        catalog.set_stock(product['id'], 97)
+        assert catalog.get_all_products()[0]['stock'] == 97
+        print("  [PASS] Stock updated without reloading")
+
+        # Test 4: Products added elsewhere are found, edits show after invalidation
+        print("\n[TEST 4] Picking up catalog changes...")
+        db.add_product("4006381333931", "Test Cider 330ml", 2.00, 50, 5)
+        assert catalog.find_scanned_product("4006381333931")[0]['name'] == "Test Cider 330ml"
+        assert len(catalog.get_all_products()) == 1
+        catalog.invalidate()
+        assert len(catalog.get_all_products()) == 2
+        print("  [PASS] Falls back to the database, reloads when invalidated")
+
+        # Test 5: The change feed returns only what changed since a version
+        print("\n[TEST 5] Reading the product change feed...")
+        version = db.get_catalog_version()
+        assert db.changes_since(version)['products'] == []
+        cider = db.get_product_by_barcode("4006381333931")
+        db.update_product(cider['id'], "Test Cider 330ml", 2.25, 50, 5)
+        db.update_product(cider['id'], "Test Cider 330ml", 2.25, 50, 5)
+        db.delete_product(product['id'])
+        changes = db.changes_since(version)
+        assert changes['version'] == version + 2 and not changes['full']
+        assert [p['price'] for p in changes['products']] == [2.25]
+        assert changes['deleted'] == [product['id']]
+        assert db.changes_since(0)['full'] and len(db.changes_since(0)['products']) == 1
+        print("  [PASS] One edit and one delete (unchanged save ignored)")
+
+        # Test 6: The cache applies the feed instead of reloading
+        print("\n[TEST 6] Refreshing the cache incrementally...")
+        catalog.invalidate()
+        products = catalog.get_all_products()
+        assert [(p['name'], p['price']) for p in products] == [("Test Cider 330ml", 2.25)]
+        assert catalog.find_scanned_product("012345600098")[0] is None
+        print("  [PASS] Edit applied, deleted product dropped")
+
+    print("\n[SUCCESS] All catalog cache tests passed!")
+
+def main():
+    try:
+        test_catalog_cache()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Test the desktop dashboard numbers and the inventory summary behind them
+Sales are dated from today's midnight so "today" and "this week" follow the clock
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from database import Database
+from inventory_manager import InventoryManager
+from dashboard_stats import DashboardStatsProvider
+from test_support import sale_line
+
+def test_dashboard_stats():
+    """Test the SQL inventory summary, sales totals, recent sales and caching"""
+    print("=" * 60)
+    print("Testing Dashboard Stats")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "dashboard_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        db.add_product("4006381333931", "Test Cider 330ml", 4.00, 3, 5)
+        db.add_product("5000112637922", "Test Cola 500ml", 1.00, 0, 5)
+        db.add_product("9780201379624", "Test Crisps 30g", 0.50, 5, 5)
+        inventory = InventoryManager(db)
+
+        # Test 1: The summary agrees with the full inventory report
+        print("\n[TEST 1] Summarising inventory...")
+        summary = inventory.get_inventory_summary(low_stock_limit=2)
+        report = inventory.get_inventory_report()
+        for key in ('total_products', 'low_stock_count', 'out_of_stock_count', 'total_inventory_value'):
+            assert summary[key] == report[key], (key, summary[key], report[key])
+        assert (summary['total_products'], summary['low_stock_count'], summary['out_of_stock_count']) == (4, 3, 1)
+        assert summary['total_inventory_value'] == 164.5
+        print("  [PASS] 4 products, 3 low (one out), $164.50 - same as the full report")
+
+        # Test 2: Only the most urgent low stock rows are returned
+        print("\n[TEST 2] Limiting low stock rows...")
+        assert [p['name'] for p in summary['low_stock_items']] == ["Test Cola 500ml", "Test Cider 330ml"]
+        assert summary['low_stock_items'][0]['stock'] == 0
+        print("  [PASS] Emptiest first, cut at the limit")
+
+        # Two sales just after midnight today, one three days ago, one last month
+        lager = db.get_product_by_barcode("012345600098")
+        midnight = datetime.combine(datetime.now().date(), datetime.min.time())
+        for quantity, when in [(2, midnight + timedelta(seconds=1)), (4, midnight + timedelta(seconds=2)),
+                               (6, midnight - timedelta(days=3)), (8, midnight - timedelta(days=30))]:
+            item = sale_line(lager, quantity)
+            db.save_sale([item, sale_line(lager, 1)], item['subtotal'], item['subtotal'], 0.0,
+                         sale_date=when.strftime('%Y-%m-%d %H:%M:%S'))
+        provider = DashboardStatsProvider(db, inventory, refresh_interval=3600, low_stock_limit=2, recent_limit=3)
+
+        # Test 3: Today's and this week's totals
+        print("\n[TEST 3] Loading sales totals...")
+        assert provider.get_stats() is None and provider.is_stale()
+        stats = provider.refresh()
+        assert (stats['today_transactions'], stats['today_sales']) == (2, 9.0)
+        assert (stats['week_transactions'], stats['week_sales']) == (3, 18.0)
+        assert stats['total_products'] == 4 and stats['low_stock_count'] == 3
+        assert len(stats['low_stock_items']) == 2
+        print("  [PASS] 2 sales today, 3 this week, last month left out")
+
+        # Test 4: Recent sales are newest first with their line counts
+        print("\n[TEST 4] Listing recent sales...")
+        recent = stats['recent_sales']
+        assert [r['total'] for r in recent] == [6.0, 3.0, 9.0]
+        assert all(r['items_count'] == 2 for r in recent)
+        print("  [PASS] Three newest sales, two lines each")
+
+        # Test 5: Cached until a sale or the refresh interval
+        print("\n[TEST 5] Caching...")
+        assert not provider.is_stale() and provider.get_stats() is stats
+        provider.invalidate()
+        assert provider.is_stale()
+        provider.refresh()
+        provider.refresh_interval = 0.05
+        time.sleep(0.06)
+        assert provider.is_stale()
+        print("  [PASS] Stale after invalidate() and after the interval")
+
+    print("\n[SUCCESS] All dashboard stats tests passed!")
+
+def main():
+    try:
+        test_dashboard_stats()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
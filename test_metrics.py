@@ -0,0 +1,129 @@
+"""
+Test the metrics registry, the /metrics endpoint and totals across workers
+A second worker is a real child process writing to the same metrics directory
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from flask import Flask
+import metrics
+
+def make_registry():
+    """A worker's metrics: the same families in every process"""
+    registry = metrics.MetricsRegistry()
+    sales = registry.counter('test_sales_total', 'Sales by payment method', ('method',))
+    printing = registry.gauge('test_print_jobs', 'Print jobs in progress')
+    latency = registry.histogram('test_latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    return registry, sales, printing, latency
+
+def other_worker(directory):
+    registry, sales, printing, latency = make_registry()
+    sales.inc(3, method='cash')
+    printing.inc()
+    latency.observe(0.5)
+    metrics.SharedMetrics(directory, registry).write()
+
+def test_metrics():
+    """Test exposition format, token checks, cross-worker totals and retired workers"""
+    print("=" * 60)
+    print("Testing Metrics")
+    print("=" * 60)
+
+    registry, sales, printing, latency = make_registry()
+
+    # Test 1: Counters and cumulative histogram buckets
+    print("\n[TEST 1] Rendering one process...")
+    sales.inc(method='cash')
+    sales.inc(2, method='ecocash')
+    latency.observe(0.05)
+    latency.observe(2.0)
+    text = registry.render()
+    assert 'test_sales_total{method="cash"} 1.0' in text
+    assert 'test_sales_total{method="ecocash"} 2.0' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 1' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count 2' in text and 'test_latency_seconds_sum 2.05' in text
+    print("  [PASS] Labelled counters, buckets counted up to +Inf")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = metrics.SharedMetrics(tmp, registry)
+
+        # Test 2: Another worker's numbers are added in
+        print("\n[TEST 2] Adding up two workers...")
+        worker = multiprocessing.Process(target=other_worker, args=(tmp,))
+        worker.start()
+        worker.join()
+        assert worker.exitcode == 0
+        printing.inc()
+        text = shared.render()
+        assert 'test_sales_total{method="cash"} 4.0' in text
+        assert 'test_print_jobs 2.0' in text
+        assert 'test_latency_seconds_bucket{le="1.0"} 2' in text and 'test_latency_seconds_count 3' in text
+        print("  [PASS] Counters, gauges and histograms summed over both files")
+
+        # Test 3: An exited worker keeps its counts but not its gauges
+        print("\n[TEST 3] Retiring the exited worker...")
+        shared.retire(worker.pid)
+        assert not os.path.exists(os.path.join(tmp, f"{worker.pid}.json"))
+        text = shared.render()
+        assert 'test_sales_total{method="cash"} 4.0' in text and 'test_print_jobs 1.0' in text
+        shared.retire(worker.pid)      # Already folded in - nothing to do
+        assert 'test_sales_total{method="cash"} 4.0' in shared.render()
+        print("  [PASS] Sales still counted, its print job dropped")
+
+        # Test 4: The writer thread keeps the file current without a request writing it
+        print("\n[TEST 4] Writing snapshots in the background...")
+        writer_dir = os.path.join(tmp, 'writer')
+        writer = metrics.SharedMetrics(writer_dir, registry, interval=0.05)
+        writer.start()
+        sales.inc(5, method='cash')
+        time.sleep(0.3)
+        assert 'test_sales_total{method="cash"} 6.0' in registry.render(writer.read_all())
+        sales.inc(method='cash')
+        writer.stop()
+        assert 'test_sales_total{method="cash"} 7.0' in registry.render(writer.read_all())
+        print("  [PASS] Written every interval, and once more on stop")
+
+        # Test 5: The endpoint needs a token, and adds up workers when a directory is set
+        print("\n[TEST 5] Reading /metrics...")
+        saved = {name: os.environ.pop(name, None) for name in ('LASTKINGZ_METRICS_TOKEN', 'LASTKINGZ_METRICS_DIR')}
+        try:
+            app = Flask(__name__)
+            metrics.init_app(app)
+            assert app.test_client().get('/metrics').status_code == 403
+
+            os.environ['LASTKINGZ_METRICS_TOKEN'] = 'scrape-secret'
+            os.environ['LASTKINGZ_METRICS_DIR'] = os.path.join(tmp, 'app')
+            app = Flask(__name__)
+            metrics.init_app(app)
+            client = app.test_client()
+            assert client.get('/metrics').status_code == 401
+            assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+            response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+            assert response.status_code == 200
+            assert 'lastkingz_http_requests_total{method="GET",endpoint="metrics",status="401"}' in response.text
+            assert os.path.exists(os.path.join(tmp, 'app', f"{os.getpid()}.json"))
+            app.extensions['shared_metrics'].stop()
+        finally:
+            for name, value in saved.items():
+                os.environ.pop(name, None)
+                if value is not None:
+                    os.environ[name] = value
+        print("  [PASS] Refused without a token, served with it from the shared files")
+
+    print("\n[SUCCESS] All metrics tests passed!")
+
+def main():
+    try:
+        test_metrics()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Test the versioned schema migrations
+Creates a new database and upgrades one built with the old pre-versioning tables,
+both in a temporary directory
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import migrations
+import sql_profiler
+from database import Database
+from user_auth import UserAuth
+
+def table_names(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')").fetchall()
+    conn.close()
+    return {row[0] for row in rows}
+
+def test_migrations():
+    """Test fresh, legacy and already current databases"""
+    print("=" * 60)
+    print("Testing Schema Migrations")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Test 1: A new database gets every migration once
+        print("\n[TEST 1] Creating a new database...")
+        path = os.path.join(tmp, "fresh.db")
+        Database(path)
+        assert migrations.get_version(path) == migrations.LATEST_VERSION
+        assert {'products', 'sales', 'users', 'quick_sale_items', 'change_log',
+                'idx_sale_items_sale_id'} <= table_names(path)
+        assert UserAuth(path).authenticate('manager', 'manager123') is not None
+        print(f"  [PASS] Schema version {migrations.LATEST_VERSION}")
+
+        # Test 2: Databases from before versioning keep their data and gain new columns
+        print("\n[TEST 2] Upgrading a pre-versioning database...")
+        path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE sales (id INTEGER PRIMARY KEY AUTOINCREMENT, total_amount REAL NOT NULL,
+                                cash_received REAL NOT NULL, change_given REAL NOT NULL,
+                                sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+        """)
+        conn.execute("INSERT INTO sales (total_amount, cash_received, change_given) VALUES (5, 10, 5)")
+        conn.commit()
+        conn.close()
+        assert migrations.migrate(path) == len(migrations.MIGRATIONS)
+        assert Database(path).get_sales_report()['total_revenue'] == 5
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT payment_method FROM sales").fetchone()[0] == 'cash'
+        conn.close()
+        print("  [PASS] Existing sale kept, payment_method added")
+
+        # Test 3: Later constructions in this process skip the check entirely
+        print("\n[TEST 3] Reopening in the same process...")
+        assert migrations.migrate(path) == 0
+        print("  [PASS] No migration work")
+
+        # Test 4: A current database in a new process costs one pragma read
+        print("\n[TEST 4] Starting against a current database...")
+        migrations._current.clear()
+        stats = sql_profiler.start()
+        try:
+            assert migrations.migrate(path) == 0
+        finally:
+            sql_profiler.stop()
+        assert stats.statements == 1, stats.as_dict()
+        print("  [PASS] Single PRAGMA user_version read")
+
+    print("\n[SUCCESS] All migration tests passed!")
+
+def main():
+    try:
+        test_migrations()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
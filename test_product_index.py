@@ -0,0 +1,63 @@
+"""
+Test the product manager search index
+"""
+
+import sys
+from product_index import ProductIndex
+
+def make_product(product_id, name, barcode, stock=50, threshold=10):
+    return {'id': product_id, 'barcode': barcode, 'name': name, 'price': 9.99,
+            'stock': stock, 'low_stock_threshold': threshold}
+
+def test_product_index():
+    """Test filtering and in-place updates"""
+    print("=" * 60)
+    print("Testing Product Index")
+    print("=" * 60)
+
+    index = ProductIndex([
+        make_product(1, "Castle Lager 6pk", "6001108000011"),
+        make_product(2, "Amarula Cream 750ml", "6001495000017", stock=3),
+        make_product(3, "Castle Lite 6pk", "6001108000028", stock=0),
+    ])
+
+    # Test 1: Name order
+    print("\n[TEST 1] Listing products in name order...")
+    assert index.filter() == [2, 1, 3], index.filter()
+    print("  [PASS] Products sorted by name")
+
+    # Test 2: Search by name, then narrow the search
+    print("\n[TEST 2] Searching by name...")
+    assert index.filter("castle") == [1, 3]
+    assert index.filter("castle li") == [3]
+    print("  [PASS] Name search narrows as you type")
+
+    # Test 3: Search by barcode and low stock only
+    print("\n[TEST 3] Searching by barcode and low stock...")
+    assert index.filter("6001108") == [1, 3]
+    assert index.filter("", low_stock_only=True) == [2, 3]
+    print("  [PASS] Barcode and low stock filters work")
+
+    # Test 4: Updates keep order and filters current
+    print("\n[TEST 4] Updating products in place...")
+    index.upsert(make_product(1, "Zambezi Lager 6pk", "6001108000011", stock=2))
+    index.upsert(make_product(4, "Bols Brandy 750ml", "6001495000024"))
+    assert index.filter() == [2, 4, 3, 1], index.filter()
+    assert index.filter("", low_stock_only=True) == [2, 3, 1]
+    assert index.position(4, [2, 3, 1]) == 1
+    index.remove(2)
+    assert index.filter("", low_stock_only=True) == [3, 1]
+    print("  [PASS] Index updated without reloading")
+
+    print("\n[SUCCESS] All product index tests passed!")
+
+def main():
+    try:
+        test_product_index()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Test reorder points and the purchase order draft
+The planner maths is checked on plain lists first, then a run reads four weeks of
+daily lager sales and a cider that never sold
+"""
+
+import math
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from database import Database
+from reorder_planner import ReorderPlanner, plan
+from test_support import sell
+
+def test_reorder_planner():
+    """Test the reorder formula, a planning run and the draft"""
+    print("=" * 60)
+    print("Testing Reorder Planner")
+    print("=" * 60)
+
+    # Test 1: Steady demand needs no safety stock, variable demand does
+    print("\n[TEST 1] Computing reorder points...")
+    figures = plan([10, 10, 100], [28, 28, 0], [28, 112, 0], 28, 7, 7, 1.65)
+    assert figures['daily_demand'][:2] == [1.0, 1.0] and figures['safety_stock'][0] == 0
+    assert figures['reorder_point'][0] == 7 and figures['order_quantity'][0] == 0
+    std = math.sqrt((112 - 28) / 27)
+    assert figures['reorder_point'][1] == math.ceil(7 + 1.65 * std * math.sqrt(7))
+    assert figures['order_quantity'][1] == math.ceil(14 + 1.65 * std * math.sqrt(7) - 10)
+    assert figures['reorder_point'][2] == 0 and figures['order_quantity'][2] == 0
+    print(f"  [PASS] Lumpy demand reorders at {figures['reorder_point'][1]} instead of 7")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "reorder_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 12, 50)
+        db.add_product("4006381333931", "Test Cider 330ml", 4.00, 40, 50)
+        lager = db.get_product_by_barcode("012345600098")
+        cider = db.get_product_by_barcode("4006381333931")
+        today = date(2025, 3, 28)
+        for offset in range(28):
+            sell(db, lager, 2, f"{today - timedelta(days=offset)} 12:00:00")
+
+        # Test 2: A run writes a suggestion for every product
+        print("\n[TEST 2] Planning the catalog...")
+        planner = ReorderPlanner(db, lead_time_days=7, review_days=7)
+        run = planner.run(today)
+        assert run['products'] == 2 and run['to_order'] == 1
+        print(f"  [PASS] {run['products']} products planned in {run['duration_seconds']}s")
+
+        # Test 3: The draft lists what to order, sized for lead time plus review period
+        print("\n[TEST 3] Drafting the purchase order...")
+        draft = planner.purchase_order_draft()
+        assert [(l['name'], l['reorder_point'], l['order_quantity']) for l in draft['lines']] == \
+            [("Test Lager 440ml", 14, 16)]
+        assert draft['lead_time_days'] == 7 and draft['lines'][0]['days_of_stock'] == 6.0
+        print("  [PASS] 16 lager to cover 14 days at 2 a day")
+
+        # Test 4: The dashboard's low stock list follows reorder points, not the manual threshold
+        print("\n[TEST 4] Restocking and checking low stock...")
+        db.update_product_stock(lager['id'], 40)
+        assert planner.purchase_order_draft()['lines'] == []
+        conn = db.get_connection()
+        low = conn.execute("""
+            SELECT p.name FROM products p LEFT JOIN reorder_suggestions r ON r.product_id = p.id
+            WHERE p.stock <= COALESCE(r.reorder_point, p.low_stock_threshold)
+        """).fetchall()
+        conn.close()
+        assert low == [] and cider['stock'] <= cider['low_stock_threshold']
+        print("  [PASS] Unsold cider under its manual threshold isn't flagged")
+
+    print("\n[SUCCESS] All reorder planner tests passed!")
+
+def main():
+    try:
+        test_reorder_planner()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Test change log replication from a branch database to a central one
+A branch and a central database in one temporary directory; pushes go through
+local_sender instead of HTTP
+"""
+
+import os
+import sys
+import tempfile
+from database import Database
+from user_auth import UserAuth
+from replication import ReplicationManager, local_sender
+from test_support import sale_line
+
+def make_sale(db, product, quantity, cashier_id):
+    item = sale_line(product, quantity)
+    sale_id = db.save_sale([item], item['subtotal'], 20.0, 20.0 - item['subtotal'], cashier_id)
+    db.update_product_stock(product['id'], product['stock'] - quantity)
+    return sale_id
+
+def count(db, sql, params=()):
+    conn = db.get_connection()
+    value = conn.execute(sql, params).fetchone()[0]
+    conn.close()
+    return value
+
+def test_replication():
+    """Test branch capture, push and idempotent apply"""
+    print("=" * 60)
+    print("Testing Replication")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        branch_path = os.path.join(tmp, "branch.db")
+        central_path = os.path.join(tmp, "central.db")
+        branch_db, central_db = Database(branch_path), Database(central_path)
+        UserAuth(branch_path)
+        UserAuth(central_path)
+        cashier = UserAuth(branch_path).authenticate('cashier', 'cashier123')
+
+        # Test 1: Existing rows are logged once when replication is enabled
+        print("\n[TEST 1] Enabling replication on a branch...")
+        branch_db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        branch = ReplicationManager(branch_db)
+        branch.enable("shop1")
+        branch.enable("shop1")
+        assert len(branch.pending_changes()) == 1
+        print("  [PASS] Existing product logged once")
+
+        # Test 2: Sales and stock changes are captured by triggers
+        print("\n[TEST 2] Capturing a sale...")
+        product = branch_db.get_product_by_barcode("012345600098")
+        make_sale(branch_db, product, 2, cashier['id'])
+        ops = [(c['table'], c['op']) for c in branch.pending_changes()]
+        assert ops == [('products', 'I'), ('sales', 'I'), ('sale_items', 'I'), ('products', 'U')], ops
+        print(f"  [PASS] {len(ops)} changes logged in order")
+
+        # Test 3: Push applies everything and prunes the acknowledged log
+        print("\n[TEST 3] Pushing to the central database...")
+        central = ReplicationManager(central_db)
+        sent = branch.push(local_sender(central), batch_size=3)
+        assert sent == 4 and not branch.pending_changes()
+        assert count(central_db, "SELECT COUNT(*) FROM sales WHERE total_amount = 3.0") == 1
+        assert count(central_db, "SELECT stock FROM branch_stock WHERE node_id = 'shop1'") == 98
+        assert count(central_db, """
+            SELECT COUNT(*) FROM sales s JOIN users u ON u.id = s.cashier_id WHERE u.username = 'cashier'
+        """) == 1
+        print(f"  [PASS] Sent {sent} changes, acknowledged up to {branch.acked_seq}")
+
+        # Test 4: A resent batch is not applied twice
+        print("\n[TEST 4] Re-applying a batch...")
+        make_sale(branch_db, branch_db.get_product_by_barcode("012345600098"), 1, cashier['id'])
+        batch = branch.pending_changes()
+        first = central.apply_changes("shop1", batch)
+        again = central.apply_changes("shop1", batch)
+        assert first == again == batch[-1]['seq']
+        assert count(central_db, "SELECT COUNT(*) FROM sales") == 2
+        assert count(central_db, "SELECT COUNT(*) FROM sale_items") == 2
+        print("  [PASS] Duplicate batch skipped")
+
+        # Test 5: Deleting a sale on the branch removes it centrally
+        print("\n[TEST 5] Replicating a delete...")
+        branch.acknowledge(first)
+        conn = branch_db.get_connection()
+        conn.execute("DELETE FROM sale_items WHERE sale_id = 1")
+        conn.execute("DELETE FROM sales WHERE id = 1")
+        conn.commit()
+        conn.close()
+        branch.push(local_sender(central))
+        assert count(central_db, "SELECT COUNT(*) FROM sales") == 1
+        assert count(central_db, "SELECT COUNT(*) FROM sale_items") == 1
+        print("  [PASS] Sale removed from the central database")
+
+    print("\n[SUCCESS] All replication tests passed!")
+
+def main():
+    try:
+        test_replication()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
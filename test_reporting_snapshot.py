@@ -0,0 +1,73 @@
+"""
+Test the reporting snapshot replica and its read-only connections
+The replica is copied from a one-sale database into a temporary folder and compared
+with the live file as more sales arrive
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from database import Database
+from reporting_snapshot import ReportingSnapshot
+
+def test_reporting_snapshot():
+    """Test replica refresh, read-only access and freshness"""
+    print("=" * 60)
+    print("Testing Reporting Snapshot")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "report_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        item = {'product_id': 1, 'barcode': "012345600098", 'name': "Test Lager 440ml",
+                'quantity': 2, 'price': 1.50, 'subtotal': 3.00}
+        db.save_sale([item], 3.00, 5.00, 2.00)
+
+        # Test 1: Without a replica reports read the live database
+        print("\n[TEST 1] Reading before the first snapshot...")
+        snapshot = ReportingSnapshot(db, refresh_interval=300)
+        report_db, freshness = snapshot.reader()
+        assert report_db is db and freshness['source'] == 'live'
+        print("  [PASS] Falls back to the live database")
+
+        # Test 2: Refresh copies the database in page steps
+        print("\n[TEST 2] Building the replica...")
+        snapshot.PAGES_PER_STEP = 1
+        assert snapshot.refresh()
+        report_db, freshness = snapshot.reader()
+        assert freshness['source'] == 'snapshot' and freshness['age_seconds'] < 5
+        assert report_db.get_sales_report()['total_revenue'] == 3.00
+        print(f"  [PASS] Replica as of {freshness['as_of']}")
+
+        # Test 3: Later sales only show up after the next refresh
+        print("\n[TEST 3] Checking snapshot isolation...")
+        db.save_sale([item], 3.00, 3.00, 0.00)
+        assert report_db.get_sales_report()['total_sales'] == 1
+        snapshot.refresh()
+        assert snapshot.reader()[0].get_sales_report()['total_sales'] == 2
+        print("  [PASS] Replica updated on refresh")
+
+        # Test 4: Replica connections cannot write
+        print("\n[TEST 4] Writing through a report connection...")
+        conn = report_db.get_connection()
+        try:
+            conn.execute("DELETE FROM sales")
+            assert False, "Report connection accepted a write"
+        except sqlite3.OperationalError:
+            print("  [PASS] Write rejected")
+        finally:
+            conn.close()
+
+    print("\n[SUCCESS] All reporting snapshot tests passed!")
+
+def main():
+    try:
+        test_reporting_snapshot()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Test offline sale sync
+Queued offline sales are replayed against a 5-unit lager six-pack, so overselling
+and part-failed sales show up as stock changes
+"""
+
+import os
+import sys
+import tempfile
+from database import Database
+from sale_sync import SaleSyncManager
+
+def make_sale(client_sale_id, barcode, quantity, price=10.00, cash=100.00):
+    return {
+        'client_sale_id': client_sale_id,
+        'created_at': '2025-01-15T14:30:00Z',
+        'cash_received': cash,
+        'payment_method': 'cash',
+        'items': [{'id': 1, 'barcode': barcode, 'name': 'Test Lager 6pk',
+                   'price': price, 'quantity': quantity}]
+    }
+
+def test_offline_sale_sync():
+    """Test idempotent ingest of queued terminal sales"""
+    print("=" * 60)
+    print("Testing Offline Sale Sync")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "sync_test.db"))
+        sync = SaleSyncManager(db)
+        db.add_product("5000000000017", "Test Lager 6pk", 10.00, 5, 2)
+
+        # Test 1: Apply a queued sale
+        print("\n[TEST 1] Applying queued sale...")
+        result = sync.apply_sale(make_sale("terminal1-0001", "5000000000017", 3))
+        assert result['status'] == SaleSyncManager.STATUS_APPLIED, result
+        assert db.get_product_by_barcode("5000000000017")['stock'] == 2
+        print(f"  [PASS] Sale applied as #{result['sale_id']}")
+
+        # Test 2: Resending the same sale is a no-op
+        print("\n[TEST 2] Resending same client sale id...")
+        again = sync.apply_sale(make_sale("terminal1-0001", "5000000000017", 3))
+        assert again['status'] == SaleSyncManager.STATUS_DUPLICATE, again
+        assert again['sale_id'] == result['sale_id']
+        assert db.get_product_by_barcode("5000000000017")['stock'] == 2
+        print("  [PASS] Duplicate detected, stock unchanged")
+
+        # Test 3: Offline sale date is preserved
+        print("\n[TEST 3] Checking sale timestamp...")
+        conn = db.get_connection()
+        sale_date = conn.execute("SELECT sale_date FROM sales WHERE id = ?",
+                                 (result['sale_id'],)).fetchone()[0]
+        conn.close()
+        assert sale_date == "2025-01-15 14:30:00", sale_date
+        print(f"  [PASS] Sale recorded at {sale_date}")
+
+        # Test 4: Overselling while offline is reported as a conflict
+        print("\n[TEST 4] Applying sale that oversells stock...")
+        batch = sync.apply_batch([make_sale("terminal2-0001", "5000000000017", 4),
+                                  make_sale("terminal2-0002", "5000000000017", 1, cash=1.00)])
+        assert batch[0]['status'] == SaleSyncManager.STATUS_APPLIED
+        assert batch[0]['conflicts'] and batch[0]['conflicts'][0]['stock'] == -2
+        assert batch[1]['status'] == SaleSyncManager.STATUS_REJECTED
+        print(f"  [PASS] Conflict reported: {batch[0]['conflicts'][0]['message']}")
+        print(f"  [PASS] Underpaid sale rejected: {batch[1]['message']}")
+
+        # Test 5: A sale that fails part way leaves stock alone, so the resend counts once
+        print("\n[TEST 5] Failing after the stock update, then resending...")
+        broken = make_sale("terminal3-0001", "5000000000017", 1)
+        broken['items'].append({'id': 1, 'barcode': "5000000000017", 'price': 10.00, 'quantity': 1})
+        failed = sync.apply_sale(broken)
+        assert failed['status'] == SaleSyncManager.STATUS_REJECTED and failed['retry'], failed
+        assert db.get_product_by_barcode("5000000000017")['stock'] == -2
+        broken['items'][1]['name'] = 'Test Lager 6pk'
+        assert sync.apply_sale(broken)['status'] == SaleSyncManager.STATUS_APPLIED
+        assert db.get_product_by_barcode("5000000000017")['stock'] == -4
+        print("  [PASS] Stock decremented once, by the resend")
+
+        # Test 6: A failed sale leaves no claim, and a claim left pending by older servers is taken over
+        print("\n[TEST 6] Checking claims after a failure...")
+        assert sync.get_synced_sale("terminal3-0001")['status'] == SaleSyncManager.STATUS_APPLIED
+        broken = make_sale("terminal4-0001", "5000000000017", 1)
+        broken['items'][0]['price'] = 'ten'
+        assert sync.apply_sale(broken)['retry']
+        assert sync.get_synced_sale("terminal4-0001") is None
+        conn = db.get_connection()
+        conn.execute("INSERT INTO synced_sales (client_sale_id, status) VALUES (?, ?)",
+                     ("terminal4-0002", SaleSyncManager.STATUS_PENDING))
+        conn.commit()
+        conn.close()
+        assert sync.apply_sale(make_sale("terminal4-0002", "5000000000017", 1))['status'] == \
+            SaleSyncManager.STATUS_APPLIED
+        assert db.get_product_by_barcode("5000000000017")['stock'] == -5
+        print("  [PASS] Nothing recorded for the failed sale, stranded claim applied on resend")
+
+    print("\n[SUCCESS] All offline sale sync tests passed!")
+
+def main():
+    try:
+        test_offline_sale_sync()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
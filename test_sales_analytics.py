@@ -0,0 +1,114 @@
+"""
+Test the product daily sales aggregates and the analytics built on them
+Sales of lager, cider and a per-label biltong across the end of 2024, with 2024
+archived before the last checks
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+from database import Database
+from archive_manager import ArchiveManager
+from sales_analytics import SalesAnalytics, window
+from barcode_decoder import with_check_digit
+from test_support import sell
+
+def daily_rows(db):
+    conn = db.get_connection()
+    rows = conn.execute("""
+        SELECT barcode, sale_day, quantity, revenue, sale_count FROM product_daily_sales ORDER BY 2, 1
+    """).fetchall()
+    conn.close()
+    return rows
+
+def test_sales_analytics():
+    """Test trigger maintenance, backfill, rankings, trends and archival"""
+    print("=" * 60)
+    print("Testing Sales Analytics")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "analytics_test.db"))
+        db.add_product("012345600098", "Test Lager 440ml", 1.50, 100, 10)
+        db.add_product("4006381333931", "Test Cider 330ml", 4.00, 40, 5)
+        db.add_product("5000112637922", "Test Cola 500ml", 1.00, 60, 5)
+        lager = db.get_product_by_barcode("012345600098")
+        cider = db.get_product_by_barcode("4006381333931")
+        sell(db, lager, 6, "2024-12-30 18:00:00")
+        sell(db, lager, 2, "2025-03-01 10:00:00")
+        sell(db, lager, 4, "2025-03-01 15:00:00")
+        sell(db, cider, 3, "2025-03-03 12:00:00")
+        analytics = SalesAnalytics(db)
+
+        # Test 1: Each sale updates its product's day
+        print("\n[TEST 1] Recording sales...")
+        assert ("012345600098", "2025-03-01", 6, 9.0, 2) in daily_rows(db)
+        print("  [PASS] Two sales of 2 and 4 give one row of 6 units")
+
+        # Test 2: A backfill reproduces what the trigger maintained
+        print("\n[TEST 2] Backfilling...")
+        maintained = daily_rows(db)
+        assert analytics.backfill() == len(maintained)
+        assert daily_rows(db) == maintained
+        print(f"  [PASS] {len(maintained)} product-days rebuilt identically")
+
+        # Test 3: Top sellers by units and by revenue
+        print("\n[TEST 3] Ranking top sellers...")
+        start, end = window(7, today=date(2025, 3, 5))
+        assert (start, end) == ("2025-02-27", "2025-03-05")
+        by_units = analytics.top_sellers(start, end)
+        assert [(p['name'], p['quantity']) for p in by_units] == [("Test Lager 440ml", 6), ("Test Cider 330ml", 3)]
+        assert by_units[0]['units_per_day'] == round(6 / 7, 2)
+        by_revenue = analytics.top_sellers(start, end, by='revenue')
+        assert by_revenue[0]['name'] == "Test Cider 330ml" and by_revenue[0]['revenue'] == 12.0
+        print("  [PASS] Lager sells most units, cider earns most")
+
+        # Test 4: Slow movers put unsold stock first
+        print("\n[TEST 4] Finding slow movers...")
+        slow = analytics.slow_movers(start, end)
+        assert slow[0]['name'] == "Test Cola 500ml" and slow[0]['days_of_stock'] is None
+        assert slow[-1]['name'] == "Test Lager 440ml" and slow[-1]['days_of_stock'] == round(100 / (6 / 7), 1)
+        print("  [PASS] Unsold cola first, days of stock estimated")
+
+        # Test 5: Trends fill days without sales
+        print("\n[TEST 5] Building a trend...")
+        trend = analytics.trend("012345600098", "2025-02-28", "2025-03-02")
+        assert [d['quantity'] for d in trend['days']] == [0, 6, 0] and trend['quantity'] == 6
+        print("  [PASS] Three days, one with sales")
+
+        # Test 6: Archiving old sales keeps their aggregates
+        print("\n[TEST 6] Archiving 2024...")
+        ArchiveManager(db).archive("2025-01-01")
+        analytics.backfill()
+        assert analytics.top_sellers("2024-12-01", "2024-12-31")[0]['quantity'] == 6
+        print("  [PASS] Archived sales still counted, even after a backfill")
+
+        # Test 7: Price-embedded labels count towards their product
+        print("\n[TEST 7] Selling labelled packs...")
+        db.add_product("2012345000001", "Test Biltong (per label)", 0.01, 100, 10)
+        biltong = db.get_product_by_barcode("2012345000001")
+        for label, price in [(with_check_digit("201234501299"), 12.99), (with_check_digit("201234500850"), 8.50)]:
+            sell(db, biltong, 1, "2025-03-04 09:00:00", price=price, barcode=label)
+        biltong_days = [row for row in daily_rows(db) if row[0] == "2012345000001"]
+        assert [(day, quantity, round(revenue, 2), count) for _, day, quantity, revenue, count in biltong_days] \
+            == [("2025-03-04", 2, 21.49, 2)], biltong_days
+        top = analytics.top_sellers("2025-03-04", "2025-03-04")
+        assert [(p['barcode'], p['quantity']) for p in top] == [("2012345000001", 2)]
+        assert analytics.trend(with_check_digit("201234501299"), "2025-03-04", "2025-03-04")['quantity'] == 2
+        slow = analytics.slow_movers("2025-03-04", "2025-03-04")
+        assert (slow[-1]['name'], slow[-1]['quantity']) == ("Test Biltong (per label)", 2)
+        print("  [PASS] Two labels give one biltong row under its own barcode")
+
+    print("\n[SUCCESS] All sales analytics tests passed!")
+
+def main():
+    try:
+        test_sales_analytics()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Test the server-side session store
+Two Flask apps share one temporary database, like two gunicorn workers
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from flask import Flask, session
+from database import Database
+from session_store import SQLiteSessionInterface, load_secret_key
+
+def make_app(db, secret_key):
+    """A worker: its own app and session cache over the shared database"""
+    app = Flask(__name__)
+    app.secret_key = secret_key
+    app.permanent_session_lifetime = timedelta(hours=8)
+    app.session_interface = SQLiteSessionInterface(db)
+
+    @app.route('/login/<name>')
+    def login(name):
+        session.regenerate()
+        session.permanent = True
+        session['username'] = name
+        return 'ok'
+
+    @app.route('/visit')
+    def visit():
+        session['visited'] = True
+        return 'ok'
+
+    @app.route('/whoami')
+    def whoami():
+        return session.get('username', 'anonymous')
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        session.regenerate()
+        return 'ok'
+
+    return app
+
+def cookie_value(response):
+    return response.headers['Set-Cookie'].split(';')[0].split('=', 1)[1]
+
+def count_sessions(db):
+    conn = db.get_connection()
+    count = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    conn.close()
+    return count
+
+def test_session_store():
+    """Test shared sessions, the secret key, logout, id rotation and expiry sweeps"""
+    print("=" * 60)
+    print("Testing Session Store")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "session_test.db")
+        db = Database(db_name)
+
+        # Test 1: The generated key is kept for the next start
+        print("\n[TEST 1] Loading the secret key...")
+        os.environ.pop('LASTKINGZ_SECRET_KEY', None)
+        key = load_secret_key(db_name)
+        assert len(key) == 64 and load_secret_key(db_name) == key
+        print("  [PASS] Same key on every load")
+
+        # Test 2: A login on one worker is seen by another
+        print("\n[TEST 2] Logging in on worker A, reading on worker B...")
+        worker_a = make_app(db, key).test_client()
+        worker_b = make_app(db, key).test_client()
+        response = worker_a.get('/login/cashier')
+        cookie = cookie_value(response)
+        worker_b.set_cookie('session', cookie)
+        assert worker_b.get('/whoami').text == 'cashier'
+        assert count_sessions(db) == 1
+        print("  [PASS] Session shared through the database")
+
+        # Test 3: Reads don't rewrite the row or reissue the cookie
+        print("\n[TEST 3] Reading the session again...")
+        response = worker_b.get('/whoami')
+        assert response.text == 'cashier' and 'Set-Cookie' not in response.headers
+        print("  [PASS] No write for an unchanged session")
+
+        # Test 4: A tampered cookie starts an empty session
+        print("\n[TEST 4] Sending a forged cookie...")
+        forged = make_app(db, key).test_client()
+        forged.set_cookie('session', cookie[:-2] + 'xx')
+        assert forged.get('/whoami').text == 'anonymous'
+        print("  [PASS] Bad signature rejected")
+
+        # Test 5: Logging out on one worker is seen at once by a worker that cached the session
+        print("\n[TEST 5] Logging out...")
+        assert worker_a.get('/whoami').text == 'cashier'
+        worker_b.get('/logout')
+        assert count_sessions(db) == 0
+        worker_a.set_cookie('session', cookie)
+        assert worker_a.get('/whoami').text == 'anonymous'
+        print("  [PASS] Session gone on every worker, cached or not")
+
+        # Test 6: Expired sessions are swept in batches
+        print("\n[TEST 6] Sweeping expired sessions...")
+        store = SQLiteSessionInterface(db)
+        store.SWEEP_BATCH = 10
+        for i in range(25):
+            store.store(f"expired-{i}", {'username': 'old'}, time.time() - 60)
+        store.store("live", {'username': 'manager'}, time.time() + 3600)
+        assert store.load("expired-0") is None
+        assert store.sweep() == 25
+        assert count_sessions(db) == 1 and store.load("live")[0] == {'username': 'manager'}
+        print("  [PASS] 25 expired rows removed, live session kept")
+
+        # Test 7: Logging in moves a session planted before login to a new id
+        print("\n[TEST 7] Logging in with a planted session id...")
+        attacker = make_app(db, key).test_client()
+        planted = cookie_value(attacker.get('/visit'))
+        victim = make_app(db, key).test_client()
+        victim.set_cookie('session', planted)
+        logged_in = cookie_value(victim.get('/login/manager'))
+        assert logged_in != planted and victim.get('/whoami').text == 'manager'
+        replay = make_app(db, key).test_client()
+        replay.set_cookie('session', planted)
+        assert replay.get('/whoami').text == 'anonymous'
+        victim.get('/logout')
+        assert count_sessions(db) == 1     # Only the live session from test 6
+        print("  [PASS] New id on login, old and logged-in rows deleted")
+
+    print("\n[SUCCESS] All session store tests passed!")
+
+def main():
+    try:
+        test_session_store()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Test per-request SQL counting, the X-SQL-Stats header and N+1 detection
+A small Flask app runs its queries against a products table in a temporary file
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+from flask import Flask
+import sql_profiler
+
+def make_app(db_name):
+    app = Flask(__name__)
+    sql_profiler.init_app(app)
+
+    @app.route('/product/<int:product_id>')
+    def product(product_id):
+        conn = sql_profiler.connect(db_name)
+        row = conn.execute("SELECT name FROM products WHERE id = ?", (product_id,)).fetchone()
+        conn.close()
+        return row[0]
+
+    @app.route('/names/<int:count>')
+    def names(count):
+        # One lookup per id - the N+1 pattern the profiler should flag
+        conn = sql_profiler.connect(db_name)
+        cursor = conn.cursor()
+        found = [cursor.execute("SELECT name FROM products WHERE id = ?", (i,)).fetchone()[0]
+                 for i in range(1, count + 1)]
+        conn.close()
+        return ",".join(found)
+
+    return app
+
+def header_fields(response):
+    return dict(part.split('=', 1) for part in response.headers['X-SQL-Stats'].split('; '))
+
+def test_sql_profiler():
+    """Test counting, the stats header and the N+1 threshold"""
+    print("=" * 60)
+    print("Testing SQL Profiler")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "profiler_test.db")
+        conn = sqlite3.connect(db_name)
+        conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO products (name) VALUES (?)", [(f"Product {i}",) for i in range(10)])
+        conn.commit()
+        conn.close()
+
+        # Test 1: Statements, connections and time are counted while profiling
+        print("\n[TEST 1] Counting queries...")
+        stats = sql_profiler.start()
+        conn = sql_profiler.connect(db_name)
+        conn.execute("SELECT COUNT(*) FROM products").fetchone()
+        cursor = conn.cursor()
+        cursor.executemany("UPDATE products SET name = name WHERE id = ?", [(1,), (2,)])
+        conn.close()
+        assert sql_profiler.stop() is stats and sql_profiler.current() is None
+        assert stats.query_count == 2 and stats.connections == 1
+        assert stats.statements >= 3 and stats.total_time > 0
+        assert stats.slowest()[0] in stats.queries
+        print(f"  [PASS] 2 queries ({stats.statements} statements) on 1 connection")
+
+        # Test 2: Connections opened outside a profile are plain sqlite3
+        print("\n[TEST 2] Connecting without a profile...")
+        conn = sql_profiler.connect(db_name)
+        assert type(conn) is sqlite3.Connection
+        conn.close()
+        print("  [PASS] No instrumentation when nothing is profiled")
+
+        # Test 3: Every response carries the request's stats
+        print("\n[TEST 3] Reading the X-SQL-Stats header...")
+        client = make_app(db_name).test_client()
+        response = client.get('/product/3')
+        assert response.text == "Product 2"
+        fields = header_fields(response)
+        assert (fields['queries'], fields['connections'], fields['n_plus_one']) == ('1', '1', '0'), fields
+        assert sql_profiler.current() is None
+        print(f"  [PASS] {response.headers['X-SQL-Stats']}")
+
+        # Test 4: Repeating one statement up to the threshold is flagged as N+1
+        print("\n[TEST 4] Detecting N+1 queries...")
+        below = sql_profiler.N_PLUS_ONE_THRESHOLD - 1
+        assert header_fields(client.get(f'/names/{below}'))['n_plus_one'] == '0'
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        app = make_app(db_name)
+        app.logger.addHandler(handler)
+        response = app.test_client().get(f'/names/{sql_profiler.N_PLUS_ONE_THRESHOLD}')
+        app.logger.removeHandler(handler)
+        fields = header_fields(response)
+        assert fields['queries'] == str(sql_profiler.N_PLUS_ONE_THRESHOLD) and fields['n_plus_one'] == '1'
+        warnings = [r.getMessage() for r in records if r.levelno == logging.WARNING]
+        assert len(warnings) == 1 and f"{sql_profiler.N_PLUS_ONE_THRESHOLD}x SELECT name FROM products" in warnings[0]
+        print(f"  [PASS] {below} repeats pass, {sql_profiler.N_PLUS_ONE_THRESHOLD} are logged as possible N+1")
+
+    print("\n[SUCCESS] All SQL profiler tests passed!")
+
+def main():
+    try:
+        test_sql_profiler()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
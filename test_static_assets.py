@@ -0,0 +1,86 @@
+"""
+Test fingerprinted static URLs, caching headers and precompressed copies
+Uses a temporary static folder so the real assets are untouched
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+import time
+from flask import Flask, url_for
+import static_assets
+
+def test_static_assets():
+    """Test fingerprints, immutable caching and gzip variants"""
+    print("=" * 60)
+    print("Testing Static Assets")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'js'))
+        script = os.path.join(tmp, 'js', 'pos.js')
+        with open(script, 'w') as f:
+            f.write("let cart = [];\n" * 200)
+
+        app = Flask(__name__, static_folder=tmp, static_url_path='/static')
+        assets = static_assets.init_app(app)
+        client = app.test_client()
+
+        # Test 1: Static URLs carry a hash of the contents
+        print("\n[TEST 1] Building a static URL...")
+        with app.test_request_context():
+            url = url_for('static', filename='js/pos.js')
+        assert url == f"/static/js/pos.js?v={assets.fingerprint('js/pos.js')}"
+        print(f"  [PASS] {url}")
+
+        # Test 2: The current URL is cached forever, others are revalidated
+        print("\n[TEST 2] Checking Cache-Control...")
+        response = client.get(url)
+        assert response.status_code == 200 and 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+        response.close()
+        response = client.get('/static/js/pos.js?v=stale')
+        assert 'no-cache' in response.headers['Cache-Control']
+        response.close()
+        print("  [PASS] Immutable only for the current fingerprint")
+
+        # Test 3: A precompressed copy is served to browsers that accept it
+        print("\n[TEST 3] Serving the gzip copy...")
+        written = assets.compress()
+        assert script + '.gz' in written
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Content-Type'].startswith('text/javascript')
+        assert gzip.decompress(response.data) == ("let cart = [];\n" * 200).encode()
+        response.close()
+        response = client.get(url)
+        assert 'Content-Encoding' not in response.headers
+        response.close()
+        print(f"  [PASS] {os.path.getsize(script + '.gz')} of {os.path.getsize(script)} bytes sent")
+
+        # Test 4: Editing the file changes the URL and retires the stale copy
+        print("\n[TEST 4] Changing the file...")
+        with open(script, 'a') as f:
+            f.write("let total = 0;\n")
+        future = time.time() + 5
+        os.utime(script, (future, future))
+        with app.test_request_context():
+            assert url_for('static', filename='js/pos.js') != url
+        response = client.get('/static/js/pos.js', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        response.close()
+        print("  [PASS] New fingerprint, outdated gzip copy ignored")
+
+    print("\n[SUCCESS] All static asset tests passed!")
+
+def main():
+    try:
+        test_static_assets()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
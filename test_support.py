@@ -0,0 +1,16 @@
+"""
+Helpers shared by the test scripts
+Builds cart lines and records sales the way the till does, through Database.save_sale
+"""
+
+def sale_line(product, quantity, price=None, barcode=None):
+    """Cart line for quantity of product, at its own price or a label's price and code"""
+    price = product['price'] if price is None else price
+    return {'product_id': product['id'], 'barcode': barcode or product['barcode'], 'name': product['name'],
+            'quantity': quantity, 'price': price, 'subtotal': price * quantity}
+
+def sell(db, product, quantity, sale_date=None, cashier_id=None, price=None, barcode=None):
+    """Record a one-line sale paid with the exact amount; returns the sale id"""
+    item = sale_line(product, quantity, price, barcode)
+    return db.save_sale([item], item['subtotal'], item['subtotal'], 0.0,
+                        cashier_id=cashier_id, sale_date=sale_date)
@@ -182,6 +182,23 @@ def test_shopping_cart():
         print("  [FAIL] Cart should be empty")
         return False
 
+    # Test 7: Change notifications
+    print("\n[TEST 7] Testing cart change notifications...")
+    events = []
+    cart.add_listener(lambda event, item: events.append((event, item['quantity'] if item else None)))
+    cart.add_item(test_product, 2)
+    cart.add_item(test_product, 1)
+    cart.update_quantity(1, 4)
+    cart.remove_item(1)
+    cart.clear()
+    expected = [(ShoppingCart.ITEM_ADDED, 2), (ShoppingCart.ITEM_UPDATED, 3), (ShoppingCart.ITEM_UPDATED, 4),
+                (ShoppingCart.ITEM_REMOVED, 4), (ShoppingCart.CLEARED, None)]
+    if events == expected and cart.get_total() == 0 and cart.get_item_count() == 0:
+        print(f"  [PASS] {len(events)} change events received")
+    else:
+        print(f"  [FAIL] Unexpected events: {events}")
+        return False
+
     print("\n[SUCCESS] All shopping cart tests passed!")
     return True
 
@@ -195,7 +212,7 @@ def test_barcode_scanner():
 
     # Test 1: Validate valid barcodes
     print("\n[TEST 1] Validating barcodes...")
-    valid_barcodes = ["012345678901", "0123456789012"]
+    valid_barcodes = ["036000291452", "4006381333931", "96385074", "10012345678902"]
     for barcode in valid_barcodes:
         if scanner.validate_barcode(barcode):
             print(f"  [PASS] Valid barcode accepted: {barcode}")
@@ -205,7 +222,7 @@ def test_barcode_scanner():
 
     # Test 2: Reject invalid barcodes
     print("\n[TEST 2] Rejecting invalid barcodes...")
-    invalid_barcodes = ["123", "abcd12345678", "12345"]
+    invalid_barcodes = ["123", "abcd12345678", "12345", "036000291453"]
     for barcode in invalid_barcodes:
         if not scanner.validate_barcode(barcode):
             print(f"  [PASS] Invalid barcode rejected: {barcode}")
@@ -229,6 +246,22 @@ def test_barcode_scanner():
         print(f"  [FAIL] Expected {test_barcode}, got {result}")
         return False
 
+    # Test 4: Tell scanner bursts from typing and queue them in order
+    print("\n[TEST 4] Classifying scanner bursts...")
+    scanner.clear_buffer()
+    clock = 100.0
+    for code, gap in (("012345678901", 0.01), ("0123456789012", 0.01), ("12345", 0.3)):
+        for char in code + "\r":
+            clock += gap
+            scanner.process_input(char, clock)
+    scans = scanner.drain()
+    if ([s.code for s in scans] == ["012345678901", "0123456789012", "12345"]
+            and [s.from_scanner for s in scans] == [True, True, False]):
+        print(f"  [PASS] {len(scans)} inputs queued in order: {scans}")
+    else:
+        print(f"  [FAIL] Unexpected scans: {scans}")
+        return False
+
     print("\n[SUCCESS] All barcode scanner tests passed!")
     return True
 
@@ -299,7 +332,7 @@ def test_complete_sale_workflow():
 
     # Get a real product from database
     print("\n[TEST 1] Loading product from database...")
-    product = db.get_product_by_barcode("012345678909")  # Budweiser
+    product = db.get_product_by_barcode("012345600098")  # Budweiser
     if not product:
         print("  [FAIL] Product not found in database")
         return False
@@ -0,0 +1,140 @@
+"""
+Test background tasks for the desktop client
+A stand-in root records after() callbacks so the test plays the Tk main loop
+"""
+
+import sys
+import threading
+import time
+from task_executor import TaskExecutor
+
+class FakeRoot:
+    """The parts of Tk the executor uses; pump() runs scheduled callbacks"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.next_id = 0
+        self.reported = []
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.callbacks[self.next_id] = func
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.callbacks.pop(after_id, None)
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        self.reported.append(exc)
+
+    def pump(self, executor, timeout=5.0):
+        """Poll like the Tk loop until no task is pending"""
+        deadline = time.monotonic() + timeout
+        while self.callbacks:
+            assert time.monotonic() < deadline, f"{executor.pending_count} tasks still pending"
+            time.sleep(0.01)
+            for after_id in list(self.callbacks):
+                self.callbacks.pop(after_id)()
+
+def test_task_executor():
+    """Test result delivery, serial ordering, errors and cancellation"""
+    print("=" * 60)
+    print("Testing Task Executor")
+    print("=" * 60)
+
+    root = FakeRoot()
+    busy = []
+    tasks = TaskExecutor(root, on_busy_change=busy.append)
+    main_thread = threading.get_ident()
+
+    # Test 1: Results come back through the polled queue on the main thread
+    print("\n[TEST 1] Delivering a result...")
+    delivered = []
+    tasks.submit(lambda: threading.current_thread().name,
+                 on_success=lambda name: delivered.append((name, threading.get_ident())))
+    assert tasks.pending_count == 1 and busy == [1]
+    time.sleep(0.1)
+    assert delivered == [], "Result delivered without polling"
+    root.pump(tasks)
+    assert delivered[0][0].startswith("pos-worker") and delivered[0][1] == main_thread
+    assert tasks.pending_count == 0 and busy == [1, 0]
+    print("  [PASS] Ran on a worker, callback on the polling thread")
+
+    # Test 2: Serial tasks run one at a time in submission order
+    print("\n[TEST 2] Queueing serial tasks...")
+    ran, results = [], []
+
+    def job(n):
+        ran.append((n, threading.current_thread().name))
+        time.sleep(0.02 * (5 - n))      # Earlier jobs are slower
+        return n
+
+    for n in range(5):
+        tasks.submit(job, n, serial=True, on_success=results.append)
+    root.pump(tasks)
+    assert [n for n, _ in ran] == list(range(5)) and results == list(range(5))
+    assert len({name for _, name in ran}) == 1
+    print("  [PASS] 0..4 ran and reported in order on one thread")
+
+    # Test 3: Errors go to on_error, or to Tk's error report without one
+    print("\n[TEST 3] Reporting errors...")
+    errors = []
+
+    def fail():
+        raise ValueError("printer offline")
+
+    tasks.submit(fail, on_error=errors.append)
+    tasks.submit(fail)
+    root.pump(tasks)
+    assert [str(e) for e in errors] == ["printer offline"]
+    assert [str(e) for e in root.reported] == ["printer offline"]
+    print("  [PASS] One to its handler, one to the error report")
+
+    # Test 4: A queued task is cancelled, a running one has its result dropped
+    print("\n[TEST 4] Cancelling tasks...")
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        return "sale saved"
+
+    outcomes = []
+    running = tasks.submit(blocking, serial=True, on_success=outcomes.append)
+    queued = tasks.submit(lambda: outcomes.append("queued ran"), serial=True)
+    kept = tasks.submit(job, 4, serial=True, on_success=outcomes.append)
+    assert started.wait(5)
+    queued.cancel()
+    running.cancel()
+    release.set()
+    root.pump(tasks)
+    assert outcomes == [4], outcomes
+    assert queued.future.cancelled() and running.done()
+    print("  [PASS] Queued task skipped, running result ignored, later task delivered")
+
+    # Test 5: cancel_all clears the pending count for logout
+    print("\n[TEST 5] Cancelling everything...")
+    release.clear()
+    started.clear()
+    tasks.submit(blocking, serial=True, on_success=outcomes.append)
+    tasks.submit(job, 1, serial=True, on_success=outcomes.append)
+    assert started.wait(5)
+    tasks.cancel_all()
+    release.set()
+    root.pump(tasks)
+    assert outcomes == [4] and tasks.pending_count == 0 and busy[-1] == 0
+    tasks.shutdown()
+    print("  [PASS] Nothing delivered after cancel_all")
+
+    print("\n[SUCCESS] All task executor tests passed!")
+
+def main():
+    try:
+        test_task_executor()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
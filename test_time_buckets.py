@@ -0,0 +1,93 @@
+"""
+Test sales time buckets: heatmaps, series and the closed-day cache
+Sales at known UTC times in March 2025 with a two hour shop offset; March is
+archived for the last check
+"""
+
+import os
+import sys
+import tempfile
+from database import Database
+from archive_manager import ArchiveManager
+from time_buckets import SalesTimeBuckets
+
+OFFSET = 2 * 3600   # UTC+2
+
+def count_queries(buckets, call):
+    """Run call and return how many grouped bucket queries it needed"""
+    queries = []
+    original = buckets._reader
+    buckets._reader = lambda first, last: queries.append((first, last)) or original(first, last)
+    try:
+        call()
+    finally:
+        buckets._reader = original
+    return len(queries)
+
+def test_time_buckets():
+    """Test local-time grouping, series widths, caching and archives"""
+    print("=" * 60)
+    print("Testing Sales Time Buckets")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "buckets_test.db"))
+        # sale_date is UTC: 07:30 UTC on Monday 3 March 2025 is 09:30 in the shop
+        for sale_date, total in [("2025-03-03 07:30:00", 10.0), ("2025-03-03 07:45:00", 5.0),
+                                 ("2025-03-04 15:10:00", 2.5), ("2025-03-08 23:30:00", 4.0)]:
+            db.save_sale([], total, total, 0.0, sale_date=sale_date)
+        buckets = SalesTimeBuckets(db, ArchiveManager(db))
+
+        # Test 1: sale_epoch is filled in for new sales
+        print("\n[TEST 1] Storing epoch seconds...")
+        conn = db.get_connection()
+        assert conn.execute("SELECT MIN(sale_epoch) FROM sales").fetchone()[0] == 1740987000
+        conn.close()
+        print("  [PASS] 2025-03-03 07:30:00 -> 1740987000")
+
+        # Test 2: The heatmap is in local time
+        print("\n[TEST 2] Building the weekday x hour heatmap...")
+        grid = buckets.heatmap("2025-03-01", "2025-03-31", OFFSET)
+        assert grid['sales'][0][9] == 2 and grid['revenue'][0][9] == 15.0
+        assert grid['sales'][1][17] == 1
+        assert grid['sales'][6][1] == 1     # Saturday 23:30 UTC is Sunday 01:30 local
+        assert sum(buckets.hour_of_day("2025-03-01", "2025-03-31", OFFSET)['sales']) == 4
+        assert buckets.day_of_week("2025-03-01", "2025-03-31", OFFSET)['sales'] == [2, 1, 0, 0, 0, 0, 1]
+        print("  [PASS] Monday 09:00 has 2 sales, late Saturday moves to Sunday")
+
+        # Test 3: Series of any width, hourly or not
+        print("\n[TEST 3] Building series...")
+        daily = buckets.series("2025-03-03", "2025-03-09", 86400, OFFSET)
+        assert daily['sales'] == [2, 1, 0, 0, 0, 0, 1] and daily['revenue'][0] == 15.0
+        quarter_hours = buckets.series("2025-03-03", "2025-03-03", 900, OFFSET)
+        assert len(quarter_hours['sales']) == 96
+        assert quarter_hours['sales'][38] == 1 and quarter_hours['sales'][39] == 1
+        print("  [PASS] Daily and 15-minute buckets")
+
+        # Test 4: Closed days come from the cache, late sales refresh their day
+        print("\n[TEST 4] Caching closed days...")
+        assert count_queries(buckets, lambda: buckets.heatmap("2025-03-01", "2025-03-31", OFFSET)) == 0
+        db.save_sale([], 7.0, 7.0, 0.0, sale_date="2025-03-04 15:20:00")
+        assert count_queries(buckets, lambda: buckets.heatmap("2025-03-01", "2025-03-31", OFFSET)) == 1
+        assert buckets.heatmap("2025-03-01", "2025-03-31", OFFSET)['sales'][1][17] == 2
+        print("  [PASS] No queries for cached days, late sale picked up")
+
+        # Test 5: Archived sales are still counted
+        print("\n[TEST 5] Archiving March...")
+        ArchiveManager(db).archive("2025-04-01")
+        buckets.invalidate()
+        assert buckets.day_of_week("2025-03-01", "2025-03-31", OFFSET)['sales'] == [2, 2, 0, 0, 0, 0, 1]
+        print("  [PASS] Heatmap spans the archive")
+
+    print("\n[SUCCESS] All time bucket tests passed!")
+
+def main():
+    try:
+        test_time_buckets()
+        return 0
+    except AssertionError as e:
+        print(f"\n[FAIL] {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
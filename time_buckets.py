@@ -0,0 +1,178 @@
+"""
+Sales by time bucket: hour of day, day of week, heatmaps and series
+Buckets are computed with integer arithmetic on sales.sale_epoch (seconds,
+UTC, indexed) shifted by the shop's UTC offset, and returned as plain arrays
+ready for charts. Per-hour totals of closed days are kept in memory, so a
+12-month heatmap only queries today's sales once the past is cached, and
+archived years are attached when a range reaches them. Sales recorded late
+for a closed day (offline terminals) drop that day from the cache; call
+invalidate() after bulk changes such as replication.
+
+The UTC offset defaults to LASTKINGZ_UTC_OFFSET_MINUTES, else the server's.
+"""
+
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from database import Database
+from archive_manager import ArchiveManager
+
+DAY = 86400
+HOUR = 3600
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+EPOCH_WEEKDAY = 3       # 1970-01-01 was a Thursday (Mon = 0)
+MAX_CACHED_DAYS = 5000  # Per-day entries kept across all offsets
+MAX_BUCKETS = 10000     # Longest series returned
+
+DEFAULT_UTC_OFFSET = int(os.environ.get('LASTKINGZ_UTC_OFFSET_MINUTES',
+                                        time.localtime().tm_gmtoff // 60)) * 60
+
+def day_number(day: str) -> int:
+    """Days since 1970-01-01 for a YYYY-MM-DD date"""
+    return (date.fromisoformat(day) - date(1970, 1, 1)).days
+
+def day_string(number: int) -> str:
+    return (date(1970, 1, 1) + timedelta(days=number)).isoformat()
+
+class SalesTimeBuckets:
+    """Sale counts and revenue grouped by local time"""
+
+    def __init__(self, db: Database, archives: ArchiveManager = None):
+        self.db = db
+        self.archives = archives
+        self._lock = threading.Lock()
+        self._days: Dict[int, Dict[int, Tuple[List[int], List[float]]]] = {}   # offset -> day -> (sales, revenue) per hour
+        self._seen_id = None    # Highest sale id when the cache was last checked
+
+    def _reader(self, first: int, last: int) -> Database:
+        """Database holding sales for local days first..last, archives attached if needed"""
+        if self.archives is None:
+            return self.db
+        # A day either side covers any UTC offset
+        return self.archives.spanning(self.db, day_string(first - 1), day_string(last + 1))
+
+    def invalidate(self):
+        with self._lock:
+            self._days.clear()
+
+    def _drop_late_sales(self, conn):
+        """Forget cached days that gained sales since the last check"""
+        high = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sales").fetchone()[0]
+        with self._lock:
+            seen, self._seen_id = self._seen_id, high
+            if seen is None or high == seen or not self._days:
+                return
+            for offset, days in self._days.items():
+                for (day,) in conn.execute("""
+                    SELECT DISTINCT (sale_epoch + ?) / 86400 FROM sales WHERE id > ?
+                """, (offset, seen)):
+                    days.pop(day, None)
+
+    def hourly(self, start_day: int, end_day: int, offset: int = DEFAULT_UTC_OFFSET) -> Dict[int, Tuple[List[int], List[float]]]:
+        """Per local day in [start_day, end_day] (day numbers): sales and revenue for each hour"""
+        today = (int(time.time()) + offset) // DAY
+        conn = self.db.get_connection()
+        try:
+            self._drop_late_sales(conn)
+        finally:
+            conn.close()
+        with self._lock:
+            cached = self._days.setdefault(offset, {})
+            result = {day: cached[day] for day in range(start_day, end_day + 1) if day in cached}
+        missing = [day for day in range(start_day, end_day + 1) if day not in result]
+        if not missing:
+            return result
+
+        # One grouped pass over the index for the uncached span
+        fetched = {day: ([0] * 24, [0.0] * 24) for day in missing}
+        conn = self._reader(missing[0], missing[-1]).get_connection()
+        try:
+            rows = conn.execute("""
+                SELECT (sale_epoch + ?) / 86400, ((sale_epoch + ?) % 86400) / 3600,
+                       COUNT(*), SUM(total_amount)
+                FROM sales
+                WHERE sale_epoch >= ? AND sale_epoch < ?
+                GROUP BY 1, 2
+            """, (offset, offset, missing[0] * DAY - offset, (missing[-1] + 1) * DAY - offset)).fetchall()
+        finally:
+            conn.close()
+
+        for day, hour, count, revenue in rows:
+            if day in fetched:
+                fetched[day][0][hour] = count
+                fetched[day][1][hour] = revenue
+
+        with self._lock:
+            if sum(len(days) for days in self._days.values()) > MAX_CACHED_DAYS:
+                self._days.clear()
+            cached = self._days.setdefault(offset, {})
+            for day, cells in fetched.items():
+                if day < today:     # Closed days only - today is still selling
+                    cached[day] = cells
+        result.update(fetched)
+        return result
+
+    def heatmap(self, start_date: str, end_date: str, offset: int = DEFAULT_UTC_OFFSET) -> Dict:
+        """7 x 24 grid (Mon-Sun by hour) of sales and revenue"""
+        sales = [[0] * 24 for _ in WEEKDAYS]
+        revenue = [[0.0] * 24 for _ in WEEKDAYS]
+        for day, (counts, totals) in self.hourly(day_number(start_date), day_number(end_date), offset).items():
+            weekday = (day + EPOCH_WEEKDAY) % 7
+            for hour in range(24):
+                sales[weekday][hour] += counts[hour]
+                revenue[weekday][hour] += totals[hour]
+        return {'weekdays': WEEKDAYS, 'hours': list(range(24)), 'sales': sales,
+                'revenue': [[round(v, 2) for v in row] for row in revenue]}
+
+    def hour_of_day(self, start_date: str, end_date: str, offset: int = DEFAULT_UTC_OFFSET) -> Dict:
+        grid = self.heatmap(start_date, end_date, offset)
+        return {'hours': grid['hours'], 'sales': [sum(col) for col in zip(*grid['sales'])],
+                'revenue': [round(sum(col), 2) for col in zip(*grid['revenue'])]}
+
+    def day_of_week(self, start_date: str, end_date: str, offset: int = DEFAULT_UTC_OFFSET) -> Dict:
+        grid = self.heatmap(start_date, end_date, offset)
+        return {'weekdays': WEEKDAYS, 'sales': [sum(row) for row in grid['sales']],
+                'revenue': [round(sum(row), 2) for row in grid['revenue']]}
+
+    def series(self, start_date: str, end_date: str, width: int = DAY,
+               offset: int = DEFAULT_UTC_OFFSET) -> Dict:
+        """
+        Consecutive buckets of width seconds from local midnight of start_date.
+        Whole-hour widths are built from the cached hourly totals; others
+        are grouped in SQL.
+        """
+        if width < 60:
+            raise ValueError("Bucket width must be at least 60 seconds")
+        first, last = day_number(start_date), day_number(end_date)
+        if last < first:
+            raise ValueError("End date is before start date")
+        start = first * DAY     # Local epoch seconds
+        count = -(-(last + 1 - first) * DAY // width)
+        if count > MAX_BUCKETS:
+            raise ValueError(f"{count} buckets requested, use a wider bucket or shorter range (max {MAX_BUCKETS})")
+        sales, revenue = [0] * count, [0.0] * count
+
+        if width % HOUR == 0:
+            for day, (counts, totals) in self.hourly(first, last, offset).items():
+                for hour in range(24):
+                    if counts[hour]:
+                        bucket = (day * DAY + hour * HOUR - start) // width
+                        sales[bucket] += counts[hour]
+                        revenue[bucket] += totals[hour]
+        else:
+            conn = self._reader(first, last).get_connection()
+            rows = conn.execute("""
+                SELECT (sale_epoch + ? - ?) / ?, COUNT(*), SUM(total_amount)
+                FROM sales
+                WHERE sale_epoch >= ? AND sale_epoch < ?
+                GROUP BY 1
+            """, (offset, start, width, start - offset, (last + 1) * DAY - offset)).fetchall()
+            conn.close()
+            for bucket, bucket_sales, bucket_revenue in rows:
+                sales[bucket] = bucket_sales
+                revenue[bucket] = bucket_revenue
+
+        return {'start': f"{start_date}T00:00:00", 'width': width, 'utc_offset_minutes': offset // 60,
+                'sales': sales, 'revenue': [round(v, 2) for v in revenue]}
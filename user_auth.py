@@ -1,4 +1,6 @@
 import sqlite3
+from sql_profiler import connect
+from migrations import migrate
 import hashlib
 from datetime import datetime
 
@@ -10,69 +12,16 @@ class UserAuth:
 
     def __init__(self, db_name="lastkings_pos.db"):
         self.db_name = db_name
-        self.init_users_table()
-        self.create_default_users()
+        migrate(db_name)
 
-    def init_users_table(self):
-        """Initialize users table"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                full_name TEXT NOT NULL,
-                role TEXT NOT NULL,
-                is_active INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS login_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                login_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-
-        conn.commit()
-        conn.close()
-
-    def hash_password(self, password):
+    @staticmethod
+    def hash_password(password):
         """Hash password using SHA256"""
         return hashlib.sha256(password.encode()).hexdigest()
 
-    def create_default_users(self):
-        """Create default manager and cashier accounts"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # Check if users exist
-        cursor.execute("SELECT COUNT(*) FROM users")
-        if cursor.fetchone()[0] == 0:
-            # Create default manager
-            cursor.execute("""
-                INSERT INTO users (username, password_hash, full_name, role)
-                VALUES (?, ?, ?, ?)
-            """, ('manager', self.hash_password('manager123'), 'Store Manager', self.ROLE_MANAGER))
-
-            # Create default cashier
-            cursor.execute("""
-                INSERT INTO users (username, password_hash, full_name, role)
-                VALUES (?, ?, ?, ?)
-            """, ('cashier', self.hash_password('cashier123'), 'Cashier', self.ROLE_CASHIER))
-
-            conn.commit()
-
-        conn.close()
-
     def authenticate(self, username, password):
         """Authenticate user and return user data"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -106,7 +55,7 @@ class UserAuth:
 
     def add_user(self, username, password, full_name, role):
         """Add new user (manager only)"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         try:
@@ -123,7 +72,7 @@ class UserAuth:
 
     def get_all_users(self):
         """Get all users (manager only)"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -141,7 +90,7 @@ class UserAuth:
 
     def change_password(self, user_id, new_password):
         """Change user password"""
-        conn = sqlite3.connect(self.db_name)
+        conn = connect(self.db_name)
         cursor = conn.cursor()
 
         cursor.execute("""